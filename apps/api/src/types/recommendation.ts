@@ -2,6 +2,7 @@ export const ALGORITHM_OVERRIDES = [
   "vector_only",
   "vector_ranked",
   "vector_ranked_mmr",
+  "vector_ranked_mmr_embedding",
 ] as const;
 
 export type AlgorithmOverride = (typeof ALGORITHM_OVERRIDES)[number];
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import gzip
+import http.client
+import io
+import threading
+import time
+import urllib.error
+import urllib.parse
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+_HostKey = Tuple[str, str, int]
+
+# サーバ側が keep-alive を切った接続を再利用したときに出る例外（新しい接続で 1 回だけ送り直す）
+_STALE_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+@dataclass(frozen=True)
+class HttpPoolConfig:
+    # 全ホスト合計で保持する待機中の接続数
+    max_idle: int = 10
+    # ホストごとの同時接続数（使用中 + 待機中）。超える場合は空くまで待つ
+    max_per_host: int = 10
+    # これより長く使われていない接続は破棄する（サーバ側の keep-alive 切断より短くする）
+    idle_timeout_sec: float = 30.0
+    # Accept-Encoding: gzip を付け、gzip レスポンスを展開する
+    gzip: bool = True
+
+
+@dataclass(frozen=True)
+class HttpTiming:
+    # 新規接続時の TCP + TLS ハンドシェイク（再利用時は 0）
+    connect_sec: float
+    # 送信開始からレスポンスヘッダ受信まで
+    ttfb_sec: float
+    # 接続取得から本文読み終わりまで
+    total_sec: float
+    reused: bool
+
+
+@dataclass(frozen=True)
+class HttpResponse:
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+    timing: HttpTiming
+
+
+class HttpConnectionPool:
+    """keep-alive 接続をホストごとに使い回す HTTP クライアント（スレッドセーフ）。
+
+    失敗は urllib と同じ例外（ステータス 400 以上は HTTPError、接続失敗は URLError）で返すため、
+    呼び出し側のリトライ処理は urlopen のときと同じ形のまま使える。
+    """
+
+    def __init__(self, config: HttpPoolConfig = HttpPoolConfig()) -> None:
+        self._config = config
+        self._cond = threading.Condition()
+        self._idle: Dict[_HostKey, List[Tuple[http.client.HTTPConnection, float]]] = {}
+        self._in_use: Dict[_HostKey, int] = {}
+        self._local = threading.local()
+        self._stats = {
+            "requests": 0,
+            "connections_opened": 0,
+            "reused": 0,
+            "connect_sec": 0.0,
+            "ttfb_sec": 0.0,
+            "total_sec": 0.0,
+        }
+
+    @property
+    def last_timing(self) -> Optional[HttpTiming]:
+        """このスレッドで直前に行ったリクエストの所要時間。"""
+        return getattr(self._local, "timing", None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {k: round(v, 3) if isinstance(v, float) else v for k, v in self._stats.items()}
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: Optional[bytes] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float,
+    ) -> HttpResponse:
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme or "http"
+        port = parsed.port or (443 if scheme == "https" else 80)
+        key: _HostKey = (scheme, parsed.hostname or "", port)
+        path = parsed.path or "/"
+        if parsed.query:
+            path = f"{path}?{parsed.query}"
+        send_headers = dict(headers or {})
+        if self._config.gzip:
+            send_headers.setdefault("Accept-Encoding", "gzip")
+
+        started = time.perf_counter()
+        conn = self._checkout(key, timeout)
+        reused = conn is not None
+        # 取得したスロットはどの経路でも 1 回だけ返す（再利用できる接続のときだけプールに戻す）
+        keep: Optional[http.client.HTTPConnection] = None
+        try:
+            try:
+                if conn is None:
+                    conn = self._connect(key, timeout)
+                try:
+                    connect_sec, ttfb_sec, res, data = self._send(conn, reused, method, path, body, send_headers)
+                except _STALE_ERRORS:
+                    if not reused:
+                        raise
+                    conn.close()
+                    conn, reused = self._connect(key, timeout), False
+                    connect_sec, ttfb_sec, res, data = self._send(conn, reused, method, path, body, send_headers)
+            except (OSError, http.client.HTTPException) as exc:
+                raise urllib.error.URLError(exc) from exc
+            if not res.will_close:
+                keep = conn
+        finally:
+            if keep is None and conn is not None:
+                conn.close()
+            self._checkin(key, keep)
+
+        if res.getheader("Content-Encoding", "").lower() == "gzip":
+            data = gzip.decompress(data)
+        timing = HttpTiming(
+            connect_sec=connect_sec,
+            ttfb_sec=ttfb_sec,
+            total_sec=time.perf_counter() - started,
+            reused=reused,
+        )
+        self._record(timing)
+
+        if res.status >= 400:
+            raise urllib.error.HTTPError(url, res.status, res.reason, res.headers, io.BytesIO(data))
+        return HttpResponse(status=res.status, headers=res.headers, body=data, timing=timing)
+
+    def close(self) -> None:
+        with self._cond:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
+
+    def _send(
+        self,
+        conn: http.client.HTTPConnection,
+        reused: bool,
+        method: str,
+        path: str,
+        body: Optional[bytes],
+        headers: Mapping[str, str],
+    ) -> Tuple[float, float, http.client.HTTPResponse, bytes]:
+        connect_sec = 0.0
+        if not reused:
+            t0 = time.perf_counter()
+            conn.connect()
+            connect_sec = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        conn.request(method, path, body=body, headers=headers)
+        res = conn.getresponse()
+        ttfb_sec = time.perf_counter() - t0
+        data = res.read()
+        return connect_sec, ttfb_sec, res, data
+
+    def _checkout(self, key: _HostKey, timeout: float) -> Optional[http.client.HTTPConnection]:
+        """待機中の接続があれば返し、無ければ None（呼び出し側で新規接続する）。
+
+        ホストの同時接続数が上限のときは timeout 秒まで空きを待ち、それでも空かなければ URLError。
+        """
+        expired: List[http.client.HTTPConnection] = []
+        deadline = time.monotonic() + timeout
+        try:
+            with self._cond:
+                while True:
+                    conn = self._pop_idle(key, expired)
+                    if conn is not None or self._in_use.get(key, 0) < self._config.max_per_host:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise urllib.error.URLError(f"connection pool timeout: {key[1]}:{key[2]}")
+                    self._cond.wait(remaining)
+                self._in_use[key] = self._in_use.get(key, 0) + 1
+        finally:
+            for old in expired:
+                old.close()
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+        return conn
+
+    def _pop_idle(
+        self, key: _HostKey, expired: List[http.client.HTTPConnection]
+    ) -> Optional[http.client.HTTPConnection]:
+        idle = self._idle.get(key, [])
+        now = time.monotonic()
+        while idle:
+            conn, last_used = idle.pop()
+            if now - last_used <= self._config.idle_timeout_sec:
+                return conn
+            expired.append(conn)
+        return None
+
+    def _connect(self, key: _HostKey, timeout: float) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        conn_cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return conn_cls(host, port, timeout=timeout)
+
+    def _checkin(self, key: _HostKey, conn: Optional[http.client.HTTPConnection]) -> None:
+        evicted: Optional[http.client.HTTPConnection] = None
+        with self._cond:
+            self._in_use[key] = self._in_use.get(key, 1) - 1
+            if conn is not None:
+                self._idle.setdefault(key, []).append((conn, time.monotonic()))
+                if sum(len(v) for v in self._idle.values()) > self._config.max_idle:
+                    evicted = self._evict_oldest()
+            self._cond.notify_all()
+        if evicted is not None:
+            evicted.close()
+
+    def _evict_oldest(self) -> Optional[http.client.HTTPConnection]:
+        oldest_key = min(
+            (k for k, v in self._idle.items() if v),
+            key=lambda k: self._idle[k][0][1],
+            default=None,
+        )
+        if oldest_key is None:
+            return None
+        conn, _ = self._idle[oldest_key].pop(0)
+        return conn
+
+    def _record(self, timing: HttpTiming) -> None:
+        self._local.timing = timing
+        with self._cond:
+            self._stats["requests"] += 1
+            self._stats["reused"] += int(timing.reused)
+            self._stats["connect_sec"] += timing.connect_sec
+            self._stats["ttfb_sec"] += timing.ttfb_sec
+            self._stats["total_sec"] += timing.total_sec
@@ -3,15 +3,20 @@ from __future__ import annotations
 import json
 import time
 import urllib.error
-import urllib.request
 from dataclasses import dataclass
-from typing import Any, Mapping, Sequence
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from clients.http_pool import HttpConnectionPool, HttpPoolConfig, HttpTiming
 
 
 class OpenAIClientError(RuntimeError):
     pass
 
 
+class OpenAIClientAuthError(OpenAIClientError):
+    pass
+
+
 @dataclass(frozen=True)
 class OpenAIClientConfig:
     api_key: str
@@ -19,33 +24,57 @@ class OpenAIClientConfig:
     timeout_sec: float = 30.0
     max_retries: int = 5
     backoff_base_sec: float = 1.0
+    pool_config: HttpPoolConfig = HttpPoolConfig()
 
 
 class OpenAIClient:
-    def __init__(self, *, config: OpenAIClientConfig) -> None:
+    def __init__(
+        self,
+        *,
+        config: OpenAIClientConfig,
+        pool: Optional[HttpConnectionPool] = None,
+    ) -> None:
         self._config = config
+        self._pool = pool or HttpConnectionPool(config.pool_config)
+
+    def http_stats(self) -> Dict[str, Any]:
+        return self._pool.stats()
+
+    @property
+    def last_timing(self) -> Optional[HttpTiming]:
+        return self._pool.last_timing
 
     def embed(self, *, source_text: str) -> Sequence[float]:
-        payload = {"model": self._config.model, "input": source_text}
+        return _extract_embeddings(self._post_embeddings(source_text), 1)[0]
+
+    def embed_many(self, *, source_texts: Sequence[str]) -> List[Sequence[float]]:
+        """複数 input を 1 リクエストで送り、入力と同じ順序で返す（レスポンスの index で対応付ける）。"""
+        if not source_texts:
+            return []
+        return _extract_embeddings(self._post_embeddings(list(source_texts)), len(source_texts))
+
+    def _post_embeddings(self, input_value: str | List[str]) -> Mapping[str, Any]:
+        payload = {"model": self._config.model, "input": input_value}
         body = json.dumps(payload).encode("utf-8")
         headers = {
             "Authorization": f"Bearer {self._config.api_key}",
             "Content-Type": "application/json",
         }
-        request = urllib.request.Request(
-            "https://api.openai.com/v1/embeddings", data=body, headers=headers, method="POST"
-        )
 
         for attempt in range(1, self._config.max_retries + 1):
             try:
-                with urllib.request.urlopen(request, timeout=self._config.timeout_sec) as res:
-                    raw = res.read().decode("utf-8")
-                    payload = json.loads(raw)
-                    return _extract_embedding(payload)
+                res = self._pool.request(
+                    "POST",
+                    "https://api.openai.com/v1/embeddings",
+                    body=body,
+                    headers=headers,
+                    timeout=self._config.timeout_sec,
+                )
+                return json.loads(res.body.decode("utf-8"))
             except urllib.error.HTTPError as exc:
                 status = exc.code
                 if status in (401, 403):
-                    raise OpenAIClientError(f"OpenAI auth error: {status}") from exc
+                    raise OpenAIClientAuthError(f"OpenAI auth error: {status}") from exc
                 if status == 429 or 500 <= status < 600:
                     _sleep_backoff(exc.headers.get("Retry-After"), attempt, self._config)
                     continue
@@ -57,13 +86,19 @@ class OpenAIClient:
         raise OpenAIClientError("OpenAI API retries exhausted")
 
 
-def _extract_embedding(payload: Mapping[str, Any]) -> Sequence[float]:
+def _extract_embeddings(payload: Mapping[str, Any], expected: int) -> List[Sequence[float]]:
     data = payload.get("data")
-    if isinstance(data, list) and data:
-        embedding = data[0].get("embedding") if isinstance(data[0], dict) else None
-        if isinstance(embedding, list):
-            return [float(value) for value in embedding]
-    raise OpenAIClientError("Invalid embedding response")
+    if not isinstance(data, list) or len(data) != expected:
+        raise OpenAIClientError("Invalid embedding response")
+    results: List[Sequence[float] | None] = [None] * expected
+    for position, entry in enumerate(data):
+        if not isinstance(entry, dict) or not isinstance(entry.get("embedding"), list):
+            raise OpenAIClientError("Invalid embedding response")
+        index = entry.get("index", position)
+        if not isinstance(index, int) or not 0 <= index < expected or results[index] is not None:
+            raise OpenAIClientError("Invalid embedding response")
+        results[index] = [float(value) for value in entry["embedding"]]
+    return results  # type: ignore[return-value]
 
 
 def _sleep_backoff(retry_after: str | None, attempt: int, config: OpenAIClientConfig) -> None:
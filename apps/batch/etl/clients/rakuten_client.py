@@ -4,9 +4,11 @@ import json
 import time
 import urllib.error
 import urllib.parse
-import urllib.request
 from dataclasses import dataclass
-from typing import Any, Mapping, Optional
+from typing import Any, Dict, Mapping, Optional
+
+from clients.http_pool import HttpConnectionPool, HttpPoolConfig, HttpTiming
+from clients.rate_limiter import TokenBucketRateLimiter
 
 
 class RakutenClientError(RuntimeError):
@@ -20,11 +22,42 @@ class RakutenClientConfig:
     timeout_sec: float = 10.0
     max_attempts: int = 5
     base_backoff_sec: float = 1.0
+    # None の場合は事前のレート制御を行わない（429 を受けてからのバックオフのみ）
+    requests_per_sec: Optional[float] = None
+    # 429 が出なければ requests_per_sec からこの値まで徐々に上げる
+    max_requests_per_sec: Optional[float] = None
+    pool_config: HttpPoolConfig = HttpPoolConfig()
 
 
 class RakutenClient:
-    def __init__(self, *, config: RakutenClientConfig) -> None:
+    def __init__(
+        self,
+        *,
+        config: RakutenClientConfig,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        pool: Optional[HttpConnectionPool] = None,
+    ) -> None:
         self._config = config
+        self._pool = pool or HttpConnectionPool(config.pool_config)
+        # 全 fetch_* とスレッドで 1 つのバケットを共有する（同じアプリ ID の複数クライアントにも渡せる）
+        if rate_limiter is None and config.requests_per_sec:
+            rate_limiter = TokenBucketRateLimiter(
+                rate_per_sec=config.requests_per_sec,
+                max_rate_per_sec=config.max_requests_per_sec,
+            )
+        self._rate_limiter = rate_limiter
+
+    def rate_limit_stats(self) -> Optional[Dict[str, Any]]:
+        if self._rate_limiter is None:
+            return None
+        return self._rate_limiter.stats()
+
+    def http_stats(self) -> Dict[str, Any]:
+        return self._pool.stats()
+
+    @property
+    def last_timing(self) -> Optional[HttpTiming]:
+        return self._pool.last_timing
 
     def fetch_ranking(self, *, genre_id: int) -> Mapping[str, Any]:
         return self._get_json(
@@ -64,14 +97,24 @@ class RakutenClient:
         url = f"{endpoint}?{query}"
 
         for attempt in range(1, self._config.max_attempts + 1):
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
             try:
-                with urllib.request.urlopen(url, timeout=self._config.timeout_sec) as res:
-                    payload = res.read().decode("utf-8")
-                    return json.loads(payload)
+                res = self._pool.request("GET", url, timeout=self._config.timeout_sec)
+                result = json.loads(res.body.decode("utf-8"))
+                if self._rate_limiter is not None:
+                    self._rate_limiter.on_success()
+                return result
             except urllib.error.HTTPError as exc:
                 status = exc.code
                 if status in (401, 403):
                     raise RakutenClientError(f"Rakuten API auth error: {status}") from exc
+                if status == 429 and self._rate_limiter is not None:
+                    # 待機はバケット側で行い、他スレッドのリクエストもまとめて止める
+                    self._rate_limiter.on_throttled(
+                        self._backoff_delay(exc.headers.get("Retry-After"), attempt)
+                    )
+                    continue
                 if status == 429 or 500 <= status < 600:
                     self._sleep_backoff(exc.headers.get("Retry-After"), attempt)
                     continue
@@ -83,11 +126,12 @@ class RakutenClient:
         raise RakutenClientError("Rakuten API retries exhausted")
 
     def _sleep_backoff(self, retry_after: Optional[str], attempt: int) -> None:
+        time.sleep(self._backoff_delay(retry_after, attempt))
+
+    def _backoff_delay(self, retry_after: Optional[str], attempt: int) -> float:
         if retry_after:
             try:
-                delay = float(retry_after)
+                return float(retry_after)
             except ValueError:
-                delay = self._config.base_backoff_sec * (2 ** (attempt - 1))
-        else:
-            delay = self._config.base_backoff_sec * (2 ** (attempt - 1))
-        time.sleep(delay)
+                pass
+        return self._config.base_backoff_sec * (2 ** (attempt - 1))
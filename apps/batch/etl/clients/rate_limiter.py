@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class TokenBucketRateLimiter:
+    """スレッド間で共有するトークンバケット（requests/sec。acquire(n) で tokens/sec の制御にも使う）。
+
+    429 を受けるとレートを decrease_factor 倍に下げ、Retry-After の間は全スレッドの取得を止める。
+    success_window 回続けて成功するたびに increase_step だけ戻す（max_rate_per_sec まで）。
+    """
+
+    def __init__(
+        self,
+        *,
+        rate_per_sec: float,
+        burst: float = 1.0,
+        max_rate_per_sec: Optional[float] = None,
+        min_rate_per_sec: float = 0.1,
+        decrease_factor: float = 0.5,
+        increase_step: Optional[float] = None,
+        success_window: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        if rate_per_sec <= 0:
+            raise ValueError("rate_per_sec must be positive")
+        self._lock = threading.Lock()
+        self._clock = clock
+        self._sleep = sleep
+        self._burst = max(1.0, burst)
+        self._rate = rate_per_sec
+        self._max_rate = max(rate_per_sec, max_rate_per_sec or rate_per_sec)
+        self._min_rate = min(min_rate_per_sec, rate_per_sec)
+        self._decrease_factor = decrease_factor
+        self._increase_step = increase_step if increase_step is not None else self._max_rate * 0.1
+        self._success_window = max(1, success_window)
+        self._tokens = self._burst
+        self._updated_at = clock()
+        self._paused_until = 0.0
+        self._successes = 0
+        self._acquired = 0
+        self._throttled_count = 0
+        self._throttled_sec = 0.0
+
+    @property
+    def rate_per_sec(self) -> float:
+        with self._lock:
+            return self._rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """トークンを tokens 個取得する（取れるまでブロック）。待った秒数を返す。
+
+        burst を超える要求は burst 個として扱う（永久に取れなくなるのを防ぐ）。
+        """
+        cost = min(tokens, self._burst)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= cost:
+                    self._tokens -= cost
+                    self._acquired += 1
+                    self._throttled_sec += waited
+                    return waited
+                delay = max(self._paused_until - now, (cost - self._tokens) / self._rate)
+            self._do_sleep(delay)
+            waited += delay
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._successes += 1
+            if self._successes >= self._success_window and self._rate < self._max_rate:
+                self._rate = min(self._max_rate, self._rate + self._increase_step)
+                self._successes = 0
+
+    def on_throttled(self, retry_after_sec: Optional[float] = None) -> None:
+        """429 を受けたときに呼ぶ。レートを下げ、retry_after_sec の間は全体を止める。"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._throttled_count += 1
+            self._successes = 0
+            self._rate = max(self._min_rate, self._rate * self._decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after_sec is not None and retry_after_sec > 0:
+                self._paused_until = max(self._paused_until, now + retry_after_sec)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate_per_sec": round(self._rate, 3),
+                "acquired": self._acquired,
+                "throttled_count": self._throttled_count,
+                "throttled_sec": round(self._throttled_sec, 3),
+            }
+
+    def _refill(self, now: float) -> None:
+        # 停止中はトークンを貯めない（再開直後にバーストで送らない）
+        elapsed = now - max(self._updated_at, self._paused_until)
+        if elapsed > 0:
+            self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+        self._updated_at = now
+
+    def _do_sleep(self, delay: float) -> None:
+        # time.sleep は呼び出し時に解決する（テストでの差し替えを効かせるため）
+        (self._sleep or time.sleep)(delay)
@@ -12,6 +12,9 @@ class AppConfig:
     rakuten_affiliate_id: str | None
     s3_bucket_raw: str
     aws_region: str
+    etl_max_workers: int = 1
+    rakuten_requests_per_sec: float | None = None
+    rakuten_max_requests_per_sec: float | None = None
 
 
 def load_config() -> AppConfig:
@@ -21,6 +24,9 @@ def load_config() -> AppConfig:
     rakuten_affiliate_id = os.getenv("RAKUTEN_AFFILIATE_ID")
     aws_region = _require("AWS_REGION")
     s3_bucket_raw = _require(_bucket_env_name(env))
+    etl_max_workers = int(os.getenv("ETL_MAX_WORKERS") or "1")
+    rakuten_requests_per_sec = _optional_float("RAKUTEN_REQUESTS_PER_SEC")
+    rakuten_max_requests_per_sec = _optional_float("RAKUTEN_MAX_REQUESTS_PER_SEC")
     return AppConfig(
         env=env,
         database_url=database_url,
@@ -28,6 +34,9 @@ def load_config() -> AppConfig:
         rakuten_affiliate_id=rakuten_affiliate_id,
         s3_bucket_raw=s3_bucket_raw,
         aws_region=aws_region,
+        etl_max_workers=etl_max_workers,
+        rakuten_requests_per_sec=rakuten_requests_per_sec,
+        rakuten_max_requests_per_sec=rakuten_max_requests_per_sec,
     )
 
 
@@ -43,3 +52,8 @@ def _require(name: str) -> str:
     if not value:
         raise ValueError(f"Missing required env var: {name}")
     return value
+
+
+def _optional_float(name: str) -> float | None:
+    value = os.getenv(name)
+    return float(value) if value else None
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import logging
 import os
 import uuid
 
@@ -9,6 +10,8 @@ from core.logging import get_logger
 from repos.apl.item_embedding_repo import ItemEmbeddingRepo
 from repos.db import db_connection
 from services.context import build_context
+from services.embedding_batcher import DEFAULT_BATCH_MAX_TOKENS, DEFAULT_BATCH_SIZE
+from services.embedding_pipeline import EmbeddingPipeline, EmbeddingPipelineConfig
 
 JOB_ID = "JOB-E-02"
 
@@ -22,6 +25,12 @@ def run_job(
     timeout_sec: float,
     max_retries: int,
     backoff_base_sec: float,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    batch_max_tokens: int = DEFAULT_BATCH_MAX_TOKENS,
+    workers: int = 4,
+    requests_per_min: float | None = None,
+    tokens_per_min: float | None = None,
+    write_batch_size: int = 500,
     run_id: str | None = None,
     dry_run: bool = False,
 ) -> dict:
@@ -39,50 +48,95 @@ def run_job(
         )
     )
 
-    with db_connection(database_url=database_url) as conn:
-        repo = ItemEmbeddingRepo(conn=conn)
-        targets = repo.fetch_diff_sources(model=model)
-        total_targets = len(targets)
-        upsert_inserted = 0
-        upsert_updated = 0
-        skipped_no_diff = 0
-        failure_count = 0
-
-        for row in targets:
-            try:
-                if ctx.dry_run:
-                    skipped_no_diff += 1
-                    continue
-                embedding = client.embed(source_text=row.source_text)
-                result = repo.upsert_embedding(
-                    item_id=row.item_id,
-                    model=model,
-                    embedding=embedding,
-                    source_hash=row.source_hash,
-                )
-                if result == "inserted":
-                    upsert_inserted += 1
-                elif result == "updated":
-                    upsert_updated += 1
-                else:
-                    skipped_no_diff += 1
-            except Exception:
-                failure_count += 1
-                logger.exception("embedding build failed: item_id=%s", row.item_id)
-
-        failure_rate = failure_count / total_targets if total_targets else 0
+    # 読み出し（サーバサイドカーソル）と書き込み（chunk ごとに commit）で接続を分ける
+    with (
+        db_connection(database_url=database_url) as read_conn,
+        db_connection(database_url=database_url) as write_conn,
+    ):
+        source_repo = ItemEmbeddingRepo(conn=read_conn)
+        repo = ItemEmbeddingRepo(conn=write_conn)
+        targets = source_repo.iter_diff_sources(model=model)
+
+        if ctx.dry_run:
+            total_targets = sum(1 for _ in targets)
+            result = {
+                "total_targets": total_targets,
+                "upsert_inserted": 0,
+                "upsert_updated": 0,
+                "skipped_no_diff": total_targets,
+                "deduplicated": 0,
+                "failure_count": 0,
+                "embed_requests": 0,
+                "elapsed_sec": 0.0,
+                "items_per_sec": 0.0,
+            }
+        else:
+            result = _build_pipeline(
+                client=client,
+                repo=repo,
+                model=model,
+                config=EmbeddingPipelineConfig(
+                    workers=workers,
+                    batch_size=batch_size,
+                    batch_max_tokens=batch_max_tokens,
+                    requests_per_min=requests_per_min,
+                    tokens_per_min=tokens_per_min,
+                    write_batch_size=write_batch_size,
+                ),
+                logger=logger,
+            ).run(targets)
+
+        total_targets = result["total_targets"]
+        failure_rate = result["failure_count"] / total_targets if total_targets else 0
         summary = {
             "total_targets": total_targets,
-            "upsert_inserted": upsert_inserted,
-            "upsert_updated": upsert_updated,
-            "skipped_no_diff": skipped_no_diff,
-            "failure_count": failure_count,
+            "upsert_inserted": result["upsert_inserted"],
+            "upsert_updated": result["upsert_updated"],
+            "skipped_no_diff": result["skipped_no_diff"],
+            "deduplicated": result["deduplicated"],
+            "failure_count": result["failure_count"],
             "failure_rate": failure_rate,
+            "embed_requests": result["embed_requests"],
+            "elapsed_sec": result["elapsed_sec"],
+            "items_per_sec": result["items_per_sec"],
         }
         logger.info("embedding build summary: %s", summary)
+        logger.info("openai http: %s", client.http_stats())
         return summary
 
 
+def _build_pipeline(
+    *,
+    client: OpenAIClient,
+    repo: ItemEmbeddingRepo,
+    model: str,
+    config: EmbeddingPipelineConfig,
+    logger: logging.Logger,
+) -> EmbeddingPipeline:
+    def write_many(embedded):
+        return repo.upsert_embeddings(
+            model=model,
+            rows=[(row.item_id, embedding, row.source_hash) for row, embedding in embedded],
+        )
+
+    def write_one(embedded):
+        row, embedding = embedded
+        return repo.upsert_embedding(
+            item_id=row.item_id,
+            model=model,
+            embedding=embedding,
+            source_hash=row.source_hash,
+        )
+
+    return EmbeddingPipeline(
+        client=client,
+        write_many=write_many,
+        write_one=write_one,
+        config=config,
+        logger=logger,
+    )
+
+
 def _require(name: str) -> str:
     value = os.getenv(name)
     if not value:
@@ -123,6 +177,12 @@ def main() -> int:
     timeout_sec = _get_float("OPENAI_TIMEOUT_SEC", 30.0)
     max_retries = _get_int("OPENAI_MAX_RETRIES", 5)
     backoff_base_sec = _get_float("OPENAI_BACKOFF_BASE_SEC", 1.0)
+    batch_size = _get_int("OPENAI_EMBED_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+    batch_max_tokens = _get_int("OPENAI_EMBED_BATCH_MAX_TOKENS", DEFAULT_BATCH_MAX_TOKENS)
+    workers = _get_int("OPENAI_EMBED_WORKERS", 4)
+    requests_per_min = _get_float("OPENAI_EMBED_RPM", 0.0) or None
+    tokens_per_min = _get_float("OPENAI_EMBED_TPM", 0.0) or None
+    write_batch_size = _get_int("EMBEDDING_WRITE_BATCH_SIZE", 500)
 
     run_job(
         env=env,
@@ -132,6 +192,12 @@ def main() -> int:
         timeout_sec=timeout_sec,
         max_retries=max_retries,
         backoff_base_sec=backoff_base_sec,
+        batch_size=batch_size,
+        batch_max_tokens=batch_max_tokens,
+        workers=workers,
+        requests_per_min=requests_per_min,
+        tokens_per_min=tokens_per_min,
+        write_batch_size=write_batch_size,
         run_id=args.run_id,
         dry_run=args.dry_run,
     )
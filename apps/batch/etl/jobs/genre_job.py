@@ -34,6 +34,8 @@ def run_job(*, config: AppConfig, run_id: str | None = None, dry_run: bool = Fal
             config=RakutenClientConfig(
                 application_id=config.rakuten_app_id,
                 affiliate_id=config.rakuten_affiliate_id,
+                requests_per_sec=config.rakuten_requests_per_sec,
+                max_requests_per_sec=config.rakuten_max_requests_per_sec,
             )
         )
         service = EtlService(
@@ -54,7 +56,7 @@ def run_job(*, config: AppConfig, run_id: str | None = None, dry_run: bool = Fal
         def applier(normalized: Mapping[str, Any], _job_ctx: JobContext, _target: str) -> None:
             genre_repo.upsert_genre(normalized_genre=normalized)
 
-        return service.run_entity_etl(
+        result = service.run_entity_etl(
             ctx=ctx,
             source="rakuten",
             entity="genre",
@@ -63,6 +65,11 @@ def run_job(*, config: AppConfig, run_id: str | None = None, dry_run: bool = Fal
             applier=applier,
             apply_version=GENRE_APPLY_VERSION,
         )
+        stats = client.rate_limit_stats()
+        if stats is not None:
+            logger.info("rakuten rate limit: %s", stats)
+        logger.info("rakuten http: %s", client.http_stats())
+        return result
 
 
 def main() -> int:
@@ -36,6 +36,8 @@ def run_job(*, config: AppConfig, run_id: str | None = None, dry_run: bool = Fal
             config=RakutenClientConfig(
                 application_id=config.rakuten_app_id,
                 affiliate_id=config.rakuten_affiliate_id,
+                requests_per_sec=config.rakuten_requests_per_sec,
+                max_requests_per_sec=config.rakuten_max_requests_per_sec,
             )
         )
         service = EtlService(
@@ -43,6 +45,7 @@ def run_job(*, config: AppConfig, run_id: str | None = None, dry_run: bool = Fal
             raw_store=raw_store,
             s3_bucket=config.s3_bucket_raw,
             logger=logger,
+            max_workers=config.etl_max_workers,
         )
 
         def target_provider(job_ctx: JobContext):
@@ -75,7 +78,7 @@ def run_job(*, config: AppConfig, run_id: str | None = None, dry_run: bool = Fal
             tag_ids = _extract_tag_ids(item_payload)
             item_tag_repo.sync_item_tags(item_id=item_id, rakuten_tag_ids=tag_ids)
 
-        return service.run_entity_etl(
+        result = service.run_entity_etl(
             ctx=ctx,
             source="rakuten",
             entity="item",
@@ -84,6 +87,11 @@ def run_job(*, config: AppConfig, run_id: str | None = None, dry_run: bool = Fal
             applier=applier,
             apply_version=ITEM_APPLY_VERSION,
         )
+        stats = client.rate_limit_stats()
+        if stats is not None:
+            logger.info("rakuten rate limit: %s", stats)
+        logger.info("rakuten http: %s", client.http_stats())
+        return result
 
 
 def _extract_item_payload(normalized: Mapping[str, Any]) -> Mapping[str, Any] | None:
@@ -2,21 +2,23 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Protocol, Sequence
+from typing import Dict, Iterator, Optional, Protocol, Sequence, Tuple
 
 
 class Cursor(Protocol):
     def execute(self, query: str, params: Sequence[object] | None = None) -> None: ...
     def fetchall(self) -> Sequence[Sequence[object]]: ...
     def fetchone(self) -> Optional[Sequence[object]]: ...
+    def fetchmany(self, size: int) -> Sequence[Sequence[object]]: ...
     @property
     def rowcount(self) -> int: ...
     def close(self) -> None: ...
 
 
 class Connection(Protocol):
-    def cursor(self) -> Cursor: ...
+    def cursor(self, name: Optional[str] = None) -> Cursor: ...
     def commit(self) -> None: ...
+    def rollback(self) -> None: ...
 
 
 @dataclass(frozen=True)
@@ -31,13 +33,7 @@ class ItemEmbeddingRepo:
         self._conn = conn
 
     def fetch_diff_sources(self, *, model: str) -> Sequence[EmbeddingSourceRow]:
-        sql_path = (
-            Path(__file__).resolve().parents[2]
-            / "sql"
-            / "common"
-            / "embedding_source_diff_select.sql"
-        )
-        sql = sql_path.read_text(encoding="utf-8")
+        sql = _diff_sql()
         cur = self._conn.cursor()
         try:
             cur.execute(sql, (model,))
@@ -49,6 +45,23 @@ class ItemEmbeddingRepo:
             for row in rows
         ]
 
+    def iter_diff_sources(self, *, model: str, fetch_size: int = 1000) -> Iterator[EmbeddingSourceRow]:
+        """差分対象をサーバサイドカーソルで fetch_size 件ずつ読む（全件をメモリに載せない）。
+
+        カーソルは commit で閉じられるため、書き込みとは別の接続で使う。
+        """
+        cur = self._conn.cursor(name="item_embedding_diff_sources")
+        try:
+            cur.execute(_diff_sql(), (model,))
+            while True:
+                rows = cur.fetchmany(fetch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield EmbeddingSourceRow(item_id=str(row[0]), source_text=row[1], source_hash=row[2])
+        finally:
+            cur.close()
+
     def upsert_embedding(
         self,
         *,
@@ -80,6 +93,66 @@ class ItemEmbeddingRepo:
             return "skipped"
         return "inserted" if bool(row[0]) else "updated"
 
+    def upsert_embeddings(
+        self,
+        *,
+        model: str,
+        rows: Sequence[Tuple[str, Sequence[float], str]],
+    ) -> Dict[str, int]:
+        """(item_id, embedding, source_hash) をまとめて 1 文で upsert し、1 回だけ commit する。
+
+        失敗時は rollback して例外を投げる（呼び出し側で 1 件ずつの upsert に切り替えられる）。
+        skipped は source_hash が変わらず更新しなかった件数。同じ item_id が複数あり、
+        後の値で置き換えて書かなかった分は deduplicated として別に数える。
+        """
+        if not rows:
+            return {"inserted": 0, "updated": 0, "skipped": 0, "deduplicated": 0}
+        # 同じ文の中で同じキーを 2 回更新できないため、item_id ごとに最後の値だけ残す
+        latest = {item_id: (item_id, embedding, source_hash) for item_id, embedding, source_hash in rows}
+        values_sql = ",".join(["(%s, %s, %s, %s, now())"] * len(latest))
+        sql = (
+            "insert into apl.item_embedding "
+            "(item_id, model, embedding, source_hash, updated_at) "
+            f"values {values_sql} "
+            "on conflict (item_id, model) do update set "
+            "embedding = excluded.embedding, "
+            "source_hash = excluded.source_hash, "
+            "updated_at = now() "
+            "where apl.item_embedding.source_hash is distinct from excluded.source_hash "
+            "returning (xmax = 0) as inserted"
+        )
+        params: list[object] = []
+        for item_id, embedding, source_hash in latest.values():
+            params.extend((item_id, model, _format_embedding(embedding), source_hash))
+        cur = self._conn.cursor()
+        try:
+            cur.execute(sql, params)
+            returned = cur.fetchall()
+        except Exception:
+            self._conn.rollback()
+            raise
+        finally:
+            cur.close()
+        self._conn.commit()
+        inserted = sum(1 for row in returned if bool(row[0]))
+        updated = len(returned) - inserted
+        return {
+            "inserted": inserted,
+            "updated": updated,
+            "skipped": len(latest) - inserted - updated,
+            "deduplicated": len(rows) - len(latest),
+        }
+
+
+def _diff_sql() -> str:
+    sql_path = (
+        Path(__file__).resolve().parents[2]
+        / "sql"
+        / "common"
+        / "embedding_source_diff_select.sql"
+    )
+    return sql_path.read_text(encoding="utf-8")
+
 
 def _format_embedding(values: Sequence[float]) -> str:
     return "[" + ",".join(f"{value:.8f}" for value in values) + "]"
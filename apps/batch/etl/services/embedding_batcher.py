@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple
+
+from clients.openai_client import OpenAIClientAuthError
+from repos.apl.item_embedding_repo import EmbeddingSourceRow
+
+# OpenAI の上限（1 リクエスト 2048 input / 合計 300k tokens）より十分小さくする
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_BATCH_MAX_TOKENS = 200_000
+
+
+class EmbeddingClient(Protocol):
+    def embed_many(self, *, source_texts: Sequence[str]) -> Sequence[Sequence[float]]: ...
+
+
+@dataclass(frozen=True)
+class EmbeddingBatchResult:
+    embedded: List[Tuple[EmbeddingSourceRow, Sequence[float]]]
+    failed: List[Tuple[EmbeddingSourceRow, Exception]]
+    requests: int
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算（多めに見積もる）。
+
+    tokenizer を持たないため UTF-8 のバイト数 / 2 とする。
+    日本語（3 byte/文字）は 1.5 token/文字、英数字は 0.5 token/文字になり、実際より大きく出る。
+    """
+    return max(1, len(text.encode("utf-8")) // 2)
+
+
+def build_batches(
+    rows: Iterable[EmbeddingSourceRow],
+    *,
+    max_items: int = DEFAULT_BATCH_SIZE,
+    max_tokens: int = DEFAULT_BATCH_MAX_TOKENS,
+) -> Iterator[List[EmbeddingSourceRow]]:
+    """件数・推定トークン数の上限を超えない範囲で行をまとめる（入力順は保つ）。
+
+    1 行で max_tokens を超える場合はその行だけのバッチにする（API 側で失敗すれば failure として扱う）。
+    """
+    batch: List[EmbeddingSourceRow] = []
+    batch_tokens = 0
+    for row in rows:
+        tokens = estimate_tokens(row.source_text)
+        if batch and batch_tokens + tokens > max_tokens:
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(row)
+        batch_tokens += tokens
+        # 件数が埋まったら次の行を待たずに流す（行の読み出しと並行して処理できる）
+        if len(batch) >= max_items:
+            yield batch
+            batch, batch_tokens = [], 0
+    if batch:
+        yield batch
+
+
+def embed_batch(
+    client: EmbeddingClient,
+    rows: Sequence[EmbeddingSourceRow],
+    acquire: Optional[Callable[[Sequence[EmbeddingSourceRow]], None]] = None,
+) -> EmbeddingBatchResult:
+    """1 バッチ分の embedding を取得する。
+
+    クライアント側のリトライ後も失敗した場合は半分に分けて再送し、
+    1 行まで分けても失敗する行だけを failed に入れる（他の行の結果は捨てない）。
+    認証エラーは分けても回復しないため、分割せずバッチ全体を failed にする。
+    acquire は分割後の再送も含め、API を呼ぶたびに送る行を渡して呼ぶ（レート制御用）。
+    """
+    if acquire is not None:
+        acquire(rows)
+    try:
+        embeddings = client.embed_many(source_texts=[row.source_text for row in rows])
+    except Exception as exc:
+        if len(rows) <= 1 or isinstance(exc, OpenAIClientAuthError):
+            return EmbeddingBatchResult(embedded=[], failed=[(row, exc) for row in rows], requests=1)
+        mid = len(rows) // 2
+        left = embed_batch(client, rows[:mid], acquire)
+        right = embed_batch(client, rows[mid:], acquire)
+        return EmbeddingBatchResult(
+            embedded=left.embedded + right.embedded,
+            failed=left.failed + right.failed,
+            requests=1 + left.requests + right.requests,
+        )
+    return EmbeddingBatchResult(embedded=list(zip(rows, embeddings)), failed=[], requests=1)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from clients.rate_limiter import TokenBucketRateLimiter
+from repos.apl.item_embedding_repo import EmbeddingSourceRow
+from services.embedding_batcher import (
+    DEFAULT_BATCH_MAX_TOKENS,
+    DEFAULT_BATCH_SIZE,
+    EmbeddingBatchResult,
+    EmbeddingClient,
+    build_batches,
+    embed_batch,
+    estimate_tokens,
+)
+
+Embedded = Tuple[EmbeddingSourceRow, Sequence[float]]
+# 書き込み先（まとめて upsert して inserted / updated / skipped / deduplicated の件数を返す）
+BulkWriter = Callable[[List[Embedded]], Dict[str, int]]
+RowWriter = Callable[[Embedded], str]
+
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class EmbeddingPipelineConfig:
+    workers: int = 4
+    batch_size: int = DEFAULT_BATCH_SIZE
+    batch_max_tokens: int = DEFAULT_BATCH_MAX_TOKENS
+    # None の場合は制限しない。OpenAI のアカウント上限より少し低く設定する
+    requests_per_min: Optional[float] = None
+    tokens_per_min: Optional[float] = None
+    # 1 回の upsert + commit で書く件数（クラッシュ時に失うのは未 commit 分のみ）
+    write_batch_size: int = 500
+    progress_interval_sec: float = 30.0
+
+
+class EmbeddingPipeline:
+    """差分行の読み出し → embedding 取得 → DB 書き込みを並行に流す。
+
+    - producer スレッド：行を読みながらバッチにまとめてキューに積む
+    - workers 本のスレッド：RPM / TPM の範囲で embed_batch を呼ぶ
+    - 呼び出し元スレッド（writer）：結果を write_batch_size 件ずつまとめて upsert する
+
+    書き込みは 1 つのスレッドだけが行うため、DB 接続をスレッド間で共有しない。
+    commit 済みの行は差分 SQL から外れるため、途中で落ちても再実行で続きから処理される。
+    """
+
+    def __init__(
+        self,
+        *,
+        client: EmbeddingClient,
+        write_many: BulkWriter,
+        write_one: RowWriter,
+        config: EmbeddingPipelineConfig,
+        logger: logging.Logger,
+    ) -> None:
+        self._client = client
+        self._write_many = write_many
+        self._write_one = write_one
+        self._config = config
+        self._logger = logger
+        self._request_limiter = _per_minute_limiter(config.requests_per_min, burst=1.0)
+        # 1 バッチ分の推定トークンを一度に取れるよう、burst はバッチ上限に合わせる
+        self._token_limiter = _per_minute_limiter(config.tokens_per_min, burst=config.batch_max_tokens)
+
+    def run(self, rows: Iterable[EmbeddingSourceRow]) -> Dict[str, Any]:
+        workers = max(1, self._config.workers)
+        batches: "queue.Queue[Any]" = queue.Queue(maxsize=workers * 2)
+        results: "queue.Queue[Any]" = queue.Queue(maxsize=workers * 2)
+        counts = {"total_targets": 0}
+        producer_error: List[BaseException] = []
+
+        def produce() -> None:
+            try:
+                for batch in build_batches(
+                    _counting(rows, counts),
+                    max_items=self._config.batch_size,
+                    max_tokens=self._config.batch_max_tokens,
+                ):
+                    batches.put(batch)
+            except BaseException as exc:
+                producer_error.append(exc)
+            finally:
+                for _ in range(workers):
+                    batches.put(_DONE)
+
+        def work() -> None:
+            try:
+                while True:
+                    batch = batches.get()
+                    if batch is _DONE:
+                        return
+                    results.put(self._embed(batch))
+            finally:
+                results.put(_DONE)
+
+        threads = [threading.Thread(target=produce, name="embedding-producer", daemon=True)]
+        threads += [
+            threading.Thread(target=work, name=f"embedding-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        summary = self._drain(results, workers, counts)
+        for thread in threads:
+            thread.join()
+        if producer_error:
+            raise producer_error[0]
+        return summary
+
+    def _embed(self, batch: List[EmbeddingSourceRow]) -> EmbeddingBatchResult:
+        return embed_batch(self._client, batch, self._acquire)
+
+    def _acquire(self, rows: Sequence[EmbeddingSourceRow]) -> None:
+        # 失敗バッチを分割して再送する分も 1 リクエスト + 推定トークン数として数える
+        if self._request_limiter is not None:
+            self._request_limiter.acquire()
+        if self._token_limiter is not None:
+            self._token_limiter.acquire(sum(estimate_tokens(row.source_text) for row in rows))
+
+    def _drain(self, results: "queue.Queue[Any]", workers: int, counts: Dict[str, int]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        next_progress = started + self._config.progress_interval_sec
+        summary = {
+            "upsert_inserted": 0,
+            "upsert_updated": 0,
+            "skipped_no_diff": 0,
+            "deduplicated": 0,
+            "failure_count": 0,
+            "embed_requests": 0,
+        }
+        pending: List[Embedded] = []
+        remaining = workers
+        while remaining:
+            result = results.get()
+            if result is _DONE:
+                remaining -= 1
+                continue
+            summary["embed_requests"] += result.requests
+            for row, exc in result.failed:
+                summary["failure_count"] += 1
+                self._logger.error("embedding build failed: item_id=%s error=%s", row.item_id, exc)
+            pending.extend(result.embedded)
+            if len(pending) >= self._config.write_batch_size:
+                self._flush(pending, summary)
+                pending = []
+            if time.perf_counter() >= next_progress:
+                next_progress += self._config.progress_interval_sec
+                self._log_progress(summary, counts, started)
+        self._flush(pending, summary)
+
+        elapsed = time.perf_counter() - started
+        written = summary["upsert_inserted"] + summary["upsert_updated"] + summary["skipped_no_diff"]
+        summary["total_targets"] = counts["total_targets"]
+        summary["elapsed_sec"] = round(elapsed, 3)
+        summary["items_per_sec"] = round(written / elapsed, 2) if elapsed > 0 else 0.0
+        return summary
+
+    def _flush(self, pending: List[Embedded], summary: Dict[str, int]) -> None:
+        if not pending:
+            return
+        try:
+            counts = self._write_many(pending)
+        except Exception:
+            # まとめて書けない場合は 1 件ずつ書き、失敗した行だけを failure にする
+            self._logger.exception("embedding bulk upsert failed: rows=%s (fallback to per-row)", len(pending))
+            for embedded in pending:
+                try:
+                    self._count(self._write_one(embedded), summary)
+                except Exception:
+                    summary["failure_count"] += 1
+                    self._logger.exception("embedding upsert failed: item_id=%s", embedded[0].item_id)
+            return
+        summary["upsert_inserted"] += counts.get("inserted", 0)
+        summary["upsert_updated"] += counts.get("updated", 0)
+        summary["skipped_no_diff"] += counts.get("skipped", 0)
+        summary["deduplicated"] += counts.get("deduplicated", 0)
+
+    @staticmethod
+    def _count(result: str, summary: Dict[str, int]) -> None:
+        if result == "inserted":
+            summary["upsert_inserted"] += 1
+        elif result == "updated":
+            summary["upsert_updated"] += 1
+        else:
+            summary["skipped_no_diff"] += 1
+
+    def _log_progress(self, summary: Dict[str, int], counts: Dict[str, int], started: float) -> None:
+        written = summary["upsert_inserted"] + summary["upsert_updated"] + summary["skipped_no_diff"]
+        elapsed = time.perf_counter() - started
+        self._logger.info(
+            "embedding build progress: read=%s written=%s failed=%s items_per_sec=%.2f",
+            counts["total_targets"],
+            written,
+            summary["failure_count"],
+            written / elapsed if elapsed > 0 else 0.0,
+        )
+
+
+def _per_minute_limiter(per_min: Optional[float], *, burst: float) -> Optional[TokenBucketRateLimiter]:
+    if not per_min:
+        return None
+    return TokenBucketRateLimiter(rate_per_sec=per_min / 60.0, burst=min(burst, per_min))
+
+
+def _counting(rows: Iterable[EmbeddingSourceRow], counts: Dict[str, int]) -> Iterable[EmbeddingSourceRow]:
+    for row in rows:
+        counts["total_targets"] += 1
+        yield row
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import Any, Iterable, Mapping, Protocol
 
 from core.hasher import compute_content_hash
@@ -11,6 +12,8 @@ from services.context import JobContext
 
 Target = str
 
+_DONE = object()
+
 
 class Fetcher(Protocol):
     def __call__(self, target: Target) -> Mapping[str, Any]: ...
@@ -42,11 +45,14 @@ class EtlService:
         raw_store: RawStore,
         s3_bucket: str,
         logger: logging.Logger | None = None,
+        max_workers: int = 1,
     ) -> None:
         self._staging_repo = staging_repo
         self._raw_store = raw_store
         self._s3_bucket = s3_bucket
         self._logger = logger or logging.getLogger(__name__)
+        # 2 以上で fetch / S3 put を並行実行する（1 は従来どおり逐次）
+        self._max_workers = max(1, max_workers)
 
     def run_entity_etl(
         self,
@@ -71,87 +77,48 @@ class EtlService:
             ctx.dry_run,
         )
 
-        for target in targets:
-            try:
-                self._logger.info("etl target start: target=%s", target)
-                raw = fetcher(target)
-                normalized = normalize(entity, raw)
-                content_hash = compute_content_hash(normalized)
-                self._logger.info(
-                    "etl normalized: target=%s hash=%s", target, content_hash
-                )
-                status = self._staging_repo.get_latest_status(
-                    source=source, entity=entity, source_id=str(target)
-                )
-                if status and status.content_hash == content_hash:
-                    if apply_version is not None and status.applied_version != apply_version:
-                        if ctx.dry_run:
-                            self._logger.info(
-                                "etl skip: target=%s reason=dry_run", target
-                            )
-                            success_count += 1
-                            continue
-                        self._logger.info(
-                            "etl reapply: target=%s reason=applied_version_mismatch", target
-                        )
-                        applier(normalized, ctx, target)
-                        self._staging_repo.mark_applied(
-                            source=source,
-                            entity=entity,
-                            source_id=str(target),
-                            content_hash=content_hash,
-                            applied_version=apply_version,
-                        )
-                    self._logger.info(
-                        "etl skip: target=%s reason=exists_hash", target
-                    )
-                    success_count += 1
-                    continue
-
-                if ctx.dry_run:
-                    self._logger.info("etl skip: target=%s reason=dry_run", target)
-                    success_count += 1
-                    continue
-
-                s3_key = self._raw_store.build_key(
-                    source=source,
-                    entity=entity,
-                    source_id=str(target),
-                    content_hash=content_hash,
-                )
-                self._logger.info("etl raw store: target=%s s3_key=%s", target, s3_key)
-                put_result = self._raw_store.put_json(
-                    bucket=self._s3_bucket, s3_key=s3_key, body=normalized
-                )
-                row = StagingRow(
-                    source=source,
-                    entity=entity,
-                    source_id=str(target),
-                    content_hash=content_hash,
-                    s3_key=put_result.s3_key,
-                    etag=put_result.etag,
-                    saved_at=put_result.saved_at,
-                )
-                upserted = self._staging_repo.batch_upsert(rows=[row])
-                self._logger.info(
-                    "etl staging upsert: target=%s rows=%s", target, upserted
-                )
-                applier(normalized, ctx, target)
-                if apply_version is not None:
-                    self._staging_repo.mark_applied(
+        if self._max_workers > 1 and total_targets > 1:
+            success_count, failure_count = self._run_concurrent(
+                ctx=ctx,
+                source=source,
+                entity=entity,
+                targets=targets,
+                fetcher=fetcher,
+                applier=applier,
+                apply_version=apply_version,
+            )
+        else:
+            for target in targets:
+                try:
+                    normalized, content_hash = self._prepare(entity, fetcher, target)
+                    if self._resolve_existing(
+                        ctx=ctx,
+                        source=source,
+                        entity=entity,
+                        target=target,
+                        normalized=normalized,
+                        content_hash=content_hash,
+                        applier=applier,
+                        apply_version=apply_version,
+                    ):
+                        success_count += 1
+                        continue
+                    put_result = self._put_raw(source, entity, target, normalized, content_hash)
+                    self._write(
+                        ctx=ctx,
                         source=source,
                         entity=entity,
-                        source_id=str(target),
+                        target=target,
+                        normalized=normalized,
                         content_hash=content_hash,
-                        applied_version=apply_version,
+                        put_result=put_result,
+                        applier=applier,
+                        apply_version=apply_version,
                     )
-                self._logger.info("etl applier done: target=%s", target)
-                success_count += 1
-            except Exception:
-                failure_count += 1
-                self._logger.exception(
-                    "ETL failed for target=%s source=%s entity=%s", target, source, entity
-                )
+                    success_count += 1
+                except Exception:
+                    failure_count += 1
+                    self._log_failure(target, source, entity)
 
         failure_rate = failure_count / total_targets if total_targets else 0
         self._logger.info(
@@ -168,3 +135,182 @@ class EtlService:
             "failure_count": failure_count,
             "failure_rate": failure_rate,
         }
+
+    def _run_concurrent(
+        self,
+        *,
+        ctx: JobContext,
+        source: str,
+        entity: str,
+        targets: list[Target],
+        fetcher: Fetcher,
+        applier: Applier,
+        apply_version: int | None,
+    ) -> tuple[int, int]:
+        """fetch / normalize / hash と S3 put をスレッドで並行実行する。
+
+        DB 操作（staging 参照・upsert、applier、mark_applied）は 1 接続を共有するため、
+        すべて呼び出し元スレッドで 1 件ずつ実行する。処理順は完了順になる。
+        """
+        success_count = 0
+        failure_count = 0
+        remaining = iter(targets)
+        # 取得済みで DB 処理待ちの結果を溜め込みすぎないよう、同時に投入する fetch 数を抑える
+        max_in_flight = self._max_workers * 2
+        pending: dict[Future, tuple[str, Target, Any]] = {}
+
+        with ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="etl") as pool:
+
+            def submit_fetches() -> None:
+                while len(pending) < max_in_flight:
+                    target = next(remaining, _DONE)
+                    if target is _DONE:
+                        return
+                    pending[pool.submit(self._prepare, entity, fetcher, target)] = ("fetch", target, None)
+
+            submit_fetches()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, target, prepared = pending.pop(future)
+                    try:
+                        if stage == "fetch":
+                            normalized, content_hash = future.result()
+                            if self._resolve_existing(
+                                ctx=ctx,
+                                source=source,
+                                entity=entity,
+                                target=target,
+                                normalized=normalized,
+                                content_hash=content_hash,
+                                applier=applier,
+                                apply_version=apply_version,
+                            ):
+                                success_count += 1
+                                continue
+                            put = pool.submit(self._put_raw, source, entity, target, normalized, content_hash)
+                            pending[put] = ("put", target, (normalized, content_hash))
+                            continue
+                        normalized, content_hash = prepared
+                        self._write(
+                            ctx=ctx,
+                            source=source,
+                            entity=entity,
+                            target=target,
+                            normalized=normalized,
+                            content_hash=content_hash,
+                            put_result=future.result(),
+                            applier=applier,
+                            apply_version=apply_version,
+                        )
+                        success_count += 1
+                    except Exception:
+                        failure_count += 1
+                        self._log_failure(target, source, entity)
+                submit_fetches()
+        return success_count, failure_count
+
+    def _prepare(self, entity: str, fetcher: Fetcher, target: Target) -> tuple[Mapping[str, Any], str]:
+        self._logger.info("etl target start: target=%s", target)
+        raw = fetcher(target)
+        normalized = normalize(entity, raw)
+        content_hash = compute_content_hash(normalized)
+        self._logger.info("etl normalized: target=%s hash=%s", target, content_hash)
+        return normalized, content_hash
+
+    def _resolve_existing(
+        self,
+        *,
+        ctx: JobContext,
+        source: str,
+        entity: str,
+        target: Target,
+        normalized: Mapping[str, Any],
+        content_hash: str,
+        applier: Applier,
+        apply_version: int | None,
+    ) -> bool:
+        """staging に同じ hash がある / dry_run の場合に処理を完結させ True を返す。"""
+        status = self._staging_repo.get_latest_status(
+            source=source, entity=entity, source_id=str(target)
+        )
+        if status and status.content_hash == content_hash:
+            if apply_version is not None and status.applied_version != apply_version:
+                if ctx.dry_run:
+                    self._logger.info("etl skip: target=%s reason=dry_run", target)
+                    return True
+                self._logger.info(
+                    "etl reapply: target=%s reason=applied_version_mismatch", target
+                )
+                applier(normalized, ctx, target)
+                self._staging_repo.mark_applied(
+                    source=source,
+                    entity=entity,
+                    source_id=str(target),
+                    content_hash=content_hash,
+                    applied_version=apply_version,
+                )
+            self._logger.info("etl skip: target=%s reason=exists_hash", target)
+            return True
+
+        if ctx.dry_run:
+            self._logger.info("etl skip: target=%s reason=dry_run", target)
+            return True
+        return False
+
+    def _put_raw(
+        self,
+        source: str,
+        entity: str,
+        target: Target,
+        normalized: Mapping[str, Any],
+        content_hash: str,
+    ) -> RawPutResult:
+        s3_key = self._raw_store.build_key(
+            source=source,
+            entity=entity,
+            source_id=str(target),
+            content_hash=content_hash,
+        )
+        self._logger.info("etl raw store: target=%s s3_key=%s", target, s3_key)
+        return self._raw_store.put_json(bucket=self._s3_bucket, s3_key=s3_key, body=normalized)
+
+    def _write(
+        self,
+        *,
+        ctx: JobContext,
+        source: str,
+        entity: str,
+        target: Target,
+        normalized: Mapping[str, Any],
+        content_hash: str,
+        put_result: RawPutResult,
+        applier: Applier,
+        apply_version: int | None,
+    ) -> None:
+        row = StagingRow(
+            source=source,
+            entity=entity,
+            source_id=str(target),
+            content_hash=content_hash,
+            s3_key=put_result.s3_key,
+            etag=put_result.etag,
+            saved_at=put_result.saved_at,
+        )
+        upserted = self._staging_repo.batch_upsert(rows=[row])
+        self._logger.info("etl staging upsert: target=%s rows=%s", target, upserted)
+        applier(normalized, ctx, target)
+        if apply_version is not None:
+            self._staging_repo.mark_applied(
+                source=source,
+                entity=entity,
+                source_id=str(target),
+                content_hash=content_hash,
+                applied_version=apply_version,
+            )
+        self._logger.info("etl applier done: target=%s", target)
+
+    def _log_failure(self, target: Target, source: str, entity: str) -> None:
+        self._logger.exception(
+            "ETL failed for target=%s source=%s entity=%s", target, source, entity
+        )
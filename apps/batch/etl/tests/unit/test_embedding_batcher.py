@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+from clients.openai_client import OpenAIClientAuthError, OpenAIClientError  # noqa: E402
+from repos.apl.item_embedding_repo import EmbeddingSourceRow  # noqa: E402
+from services.embedding_batcher import build_batches, embed_batch, estimate_tokens  # noqa: E402
+
+
+def _rows(*texts: str):
+    return [
+        EmbeddingSourceRow(item_id=f"item-{i}", source_text=text, source_hash=f"h{i}")
+        for i, text in enumerate(texts)
+    ]
+
+
+class FakeClient:
+    def __init__(self, *, bad_texts=(), error=None) -> None:
+        self.bad_texts = set(bad_texts)
+        self.error = error
+        self.calls = []
+
+    def embed_many(self, *, source_texts):
+        self.calls.append(list(source_texts))
+        if self.error is not None:
+            raise self.error
+        if self.bad_texts & set(source_texts):
+            raise OpenAIClientError("OpenAI API error: 400")
+        return [[float(len(text))] for text in source_texts]
+
+
+@pytest.mark.unit
+def test_estimate_tokens_overestimates_multibyte_text() -> None:
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("abcd") == 2
+    assert estimate_tokens("誕生日") == 4
+
+
+@pytest.mark.unit
+def test_build_batches_respects_item_and_token_limits() -> None:
+    rows = _rows("a" * 10, "b" * 10, "c" * 10, "d" * 40, "e" * 2)
+
+    by_items = [[r.item_id for r in b] for b in build_batches(rows, max_items=2, max_tokens=1000)]
+    by_tokens = [[r.item_id for r in b] for b in build_batches(rows, max_items=10, max_tokens=12)]
+
+    assert by_items == [["item-0", "item-1"], ["item-2", "item-3"], ["item-4"]]
+    # 1 行で上限を超える item-3 は単独のバッチになる
+    assert by_tokens == [["item-0", "item-1"], ["item-2"], ["item-3"], ["item-4"]]
+
+
+@pytest.mark.unit
+def test_embed_batch_splits_failed_batch_and_isolates_bad_row() -> None:
+    rows = _rows("aa", "bad", "cccc", "d")
+    client = FakeClient(bad_texts={"bad"})
+
+    result = embed_batch(client, rows)
+
+    assert [(row.item_id, emb) for row, emb in result.embedded] == [
+        ("item-0", [2.0]),
+        ("item-2", [4.0]),
+        ("item-3", [1.0]),
+    ]
+    assert [row.item_id for row, _ in result.failed] == ["item-1"]
+    # [4] -> [2] x2 -> 失敗側の [1] x2
+    assert result.requests == 5
+
+
+@pytest.mark.unit
+def test_embed_batch_does_not_split_on_auth_error() -> None:
+    client = FakeClient(error=OpenAIClientAuthError("OpenAI auth error: 401"))
+
+    result = embed_batch(client, _rows("a", "b", "c"))
+
+    assert len(client.calls) == 1
+    assert len(result.failed) == 3
+
+
+@pytest.mark.unit
+def test_embed_batch_acquires_for_every_request_including_splits() -> None:
+    rows = _rows("aa", "bad", "cccc", "d")
+    acquired = []
+
+    result = embed_batch(
+        FakeClient(bad_texts={"bad"}),
+        rows,
+        acquire=lambda batch: acquired.append([row.item_id for row in batch]),
+    )
+
+    assert len(acquired) == result.requests == 5
+    assert acquired[0] == ["item-0", "item-1", "item-2", "item-3"]
+    assert ["item-1"] in acquired
@@ -15,19 +15,23 @@ from repos.apl.item_embedding_repo import EmbeddingSourceRow  # noqa: E402
 
 class FakeEmbeddingRepo:
     last_instance = None
+    sources = [EmbeddingSourceRow(item_id="item-1", source_text="source", source_hash="hash-1")]
 
     def __init__(self, *, conn) -> None:
         self.conn = conn
         self.upsert_calls = []
+        self.bulk_calls = 0
         FakeEmbeddingRepo.last_instance = self
 
-    def fetch_diff_sources(self, *, model: str):
+    def iter_diff_sources(self, *, model: str):
         assert model == "text-embedding-3-small"
-        return [
-            EmbeddingSourceRow(
-                item_id="item-1", source_text="source", source_hash="hash-1"
-            )
-        ]
+        yield from self.sources
+
+    def upsert_embeddings(self, *, model, rows):
+        self.bulk_calls += 1
+        for item_id, embedding, source_hash in rows:
+            self.upsert_calls.append((item_id, model, embedding, source_hash))
+        return {"inserted": len(rows), "updated": 0, "skipped": 0}
 
     def upsert_embedding(self, *, item_id, model, embedding, source_hash):
         self.upsert_calls.append((item_id, model, embedding, source_hash))
@@ -39,9 +43,12 @@ class FakeOpenAIClient:
         self.config = config
         self.calls = []
 
-    def embed(self, *, source_text: str):
-        self.calls.append(source_text)
-        return [0.1, 0.2, 0.3]
+    def embed_many(self, *, source_texts):
+        self.calls.append(list(source_texts))
+        return [[0.1, 0.2, 0.3] for _ in source_texts]
+
+    def http_stats(self):
+        return {}
 
 
 @contextmanager
@@ -50,26 +57,32 @@ def fake_db_connection(*, database_url: str):
     yield object()
 
 
-@pytest.mark.unit
-def test_run_job_inserts_embeddings(monkeypatch) -> None:
-    monkeypatch.setattr(embedding_build_job, "ItemEmbeddingRepo", FakeEmbeddingRepo)
-    monkeypatch.setattr(embedding_build_job, "OpenAIClient", FakeOpenAIClient)
+def _run(monkeypatch, repo_cls=FakeEmbeddingRepo, client_cls=FakeOpenAIClient, **kwargs) -> dict:
+    monkeypatch.setattr(embedding_build_job, "ItemEmbeddingRepo", repo_cls)
+    monkeypatch.setattr(embedding_build_job, "OpenAIClient", client_cls)
     monkeypatch.setattr(embedding_build_job, "db_connection", fake_db_connection)
+    params = {
+        "env": "dev",
+        "database_url": "postgres://example",
+        "api_key": "test-key",
+        "model": "text-embedding-3-small",
+        "timeout_sec": 1.0,
+        "max_retries": 1,
+        "backoff_base_sec": 0.1,
+        "run_id": "run-1",
+        "dry_run": False,
+    }
+    params.update(kwargs)
+    return embedding_build_job.run_job(**params)
 
-    result = embedding_build_job.run_job(
-        env="dev",
-        database_url="postgres://example",
-        api_key="test-key",
-        model="text-embedding-3-small",
-        timeout_sec=1.0,
-        max_retries=1,
-        backoff_base_sec=0.1,
-        run_id="run-1",
-        dry_run=False,
-    )
+
+@pytest.mark.unit
+def test_run_job_inserts_embeddings(monkeypatch) -> None:
+    result = _run(monkeypatch)
 
     assert result["total_targets"] == 1
     assert result["upsert_inserted"] == 1
+    assert "items_per_sec" in result
     repo = FakeEmbeddingRepo.last_instance
     assert repo.upsert_calls[0][0] == "item-1"
     assert repo.upsert_calls[0][1] == "text-embedding-3-small"
@@ -77,21 +90,41 @@ def test_run_job_inserts_embeddings(monkeypatch) -> None:
 
 @pytest.mark.unit
 def test_run_job_skips_on_dry_run(monkeypatch) -> None:
-    monkeypatch.setattr(embedding_build_job, "ItemEmbeddingRepo", FakeEmbeddingRepo)
-    monkeypatch.setattr(embedding_build_job, "OpenAIClient", FakeOpenAIClient)
-    monkeypatch.setattr(embedding_build_job, "db_connection", fake_db_connection)
-
-    result = embedding_build_job.run_job(
-        env="dev",
-        database_url="postgres://example",
-        api_key="test-key",
-        model="text-embedding-3-small",
-        timeout_sec=1.0,
-        max_retries=1,
-        backoff_base_sec=0.1,
-        run_id="run-1",
-        dry_run=True,
-    )
+    result = _run(monkeypatch, dry_run=True)
 
     assert result["total_targets"] == 1
     assert result["skipped_no_diff"] == 1
+    assert FakeEmbeddingRepo.last_instance.upsert_calls == []
+
+
+@pytest.mark.unit
+def test_run_job_batches_requests_and_bulk_writes(monkeypatch) -> None:
+    class ManyRowsRepo(FakeEmbeddingRepo):
+        sources = [
+            EmbeddingSourceRow(item_id=f"item-{i}", source_text=f"text-{i}", source_hash=f"h{i}")
+            for i in range(5)
+        ]
+
+    clients = []
+
+    class RecordingClient(FakeOpenAIClient):
+        def __init__(self, *, config) -> None:
+            super().__init__(config=config)
+            clients.append(self)
+
+    result = _run(
+        monkeypatch,
+        repo_cls=ManyRowsRepo,
+        client_cls=RecordingClient,
+        batch_size=2,
+        workers=1,
+        write_batch_size=3,
+    )
+
+    assert result["upsert_inserted"] == 5
+    assert result["embed_requests"] == 3
+    assert clients[0].calls == [["text-0", "text-1"], ["text-2", "text-3"], ["text-4"]]
+    repo = ManyRowsRepo.last_instance
+    assert [call[0] for call in repo.upsert_calls] == [f"item-{i}" for i in range(5)]
+    # 3 件ずつまとめて書く（2 + 2 で 1 回目、残り 1 件で 2 回目）
+    assert repo.bulk_calls == 2
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+from repos.apl.item_embedding_repo import EmbeddingSourceRow  # noqa: E402
+from services.embedding_pipeline import EmbeddingPipeline, EmbeddingPipelineConfig  # noqa: E402
+
+
+def _rows(n: int):
+    return [
+        EmbeddingSourceRow(item_id=f"item-{i}", source_text=f"text-{i}", source_hash=f"h{i}")
+        for i in range(n)
+    ]
+
+
+class FakeClient:
+    def __init__(self, *, barrier=None, bad_texts=()) -> None:
+        self.barrier = barrier
+        self.bad_texts = set(bad_texts)
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def embed_many(self, *, source_texts):
+        with self.lock:
+            self.threads.add(threading.current_thread().name)
+        if self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        if self.bad_texts & set(source_texts):
+            raise RuntimeError("bad input")
+        return [[float(text.split("-")[1])] for text in source_texts]
+
+
+class FakeWriter:
+    def __init__(self, *, fail_bulk=False, bad_items=()) -> None:
+        self.fail_bulk = fail_bulk
+        self.bad_items = set(bad_items)
+        self.written = []
+        self.bulk_sizes = []
+        self.threads = set()
+
+    def write_many(self, embedded):
+        self.threads.add(threading.current_thread().name)
+        if self.fail_bulk:
+            raise RuntimeError("bulk failed")
+        self.bulk_sizes.append(len(embedded))
+        self.written.extend(row.item_id for row, _ in embedded)
+        return {"inserted": len(embedded), "updated": 0, "skipped": 0}
+
+    def write_one(self, embedded):
+        row, _ = embedded
+        if row.item_id in self.bad_items:
+            raise RuntimeError("row failed")
+        self.written.append(row.item_id)
+        return "updated"
+
+
+def _pipeline(client, writer, **config) -> EmbeddingPipeline:
+    return EmbeddingPipeline(
+        client=client,
+        write_many=writer.write_many,
+        write_one=writer.write_one,
+        config=EmbeddingPipelineConfig(**config),
+        logger=logging.getLogger("test"),
+    )
+
+
+@pytest.mark.unit
+def test_pipeline_runs_requests_concurrently_and_writes_from_caller_thread() -> None:
+    # 3 リクエストが同時に待ち合わせできなければ BrokenBarrierError で失敗する
+    client = FakeClient(barrier=threading.Barrier(3))
+    writer = FakeWriter()
+
+    result = _pipeline(client, writer, workers=3, batch_size=2, write_batch_size=4).run(_rows(6))
+
+    assert len(client.threads) == 3
+    assert writer.threads == {threading.current_thread().name}
+    assert sorted(writer.written) == sorted(f"item-{i}" for i in range(6))
+    assert all(size >= 4 for size in writer.bulk_sizes[:-1])
+    assert result["total_targets"] == 6
+    assert result["upsert_inserted"] == 6
+    assert result["embed_requests"] == 3
+    assert result["items_per_sec"] > 0
+
+
+@pytest.mark.unit
+def test_pipeline_isolates_failed_rows_and_falls_back_to_row_writes() -> None:
+    client = FakeClient(bad_texts={"text-1"})
+    writer = FakeWriter(fail_bulk=True, bad_items={"item-3"})
+
+    result = _pipeline(client, writer, workers=2, batch_size=4).run(_rows(4))
+
+    assert sorted(writer.written) == ["item-0", "item-2"]
+    assert result["upsert_updated"] == 2
+    # item-1 は embedding 取得で、item-3 は書き込みで失敗
+    assert result["failure_count"] == 2
+
+
+@pytest.mark.unit
+def test_pipeline_respects_requests_per_minute() -> None:
+    client = FakeClient()
+    writer = FakeWriter()
+
+    started = time.perf_counter()
+    result = _pipeline(client, writer, workers=3, batch_size=1, requests_per_min=1200).run(_rows(4))
+    elapsed = time.perf_counter() - started
+
+    assert result["embed_requests"] == 4
+    # 1200 RPM = 20 req/sec。最初の 1 件以外は 0.05 秒ずつ待たされる
+    assert elapsed >= 0.14
+
+
+@pytest.mark.unit
+def test_pipeline_raises_producer_error_after_writing_completed_rows() -> None:
+    def rows():
+        yield from _rows(2)
+        raise RuntimeError("cursor lost")
+
+    writer = FakeWriter()
+
+    with pytest.raises(RuntimeError, match="cursor lost"):
+        _pipeline(FakeClient(), writer, workers=1, batch_size=1).run(rows())
+
+    assert writer.written == ["item-0", "item-1"]
+
+
+@pytest.mark.unit
+def test_pipeline_charges_limiters_for_split_requests() -> None:
+    client = FakeClient(bad_texts={"text-1"})
+    pipeline = _pipeline(
+        client, FakeWriter(), workers=1, batch_size=4, requests_per_min=60000, tokens_per_min=6000000
+    )
+
+    result = pipeline.run(_rows(4))
+
+    # [4] -> [2] x2 -> 失敗側の [1] x2 の 5 リクエストすべてが RPM / TPM に数えられる
+    assert result["embed_requests"] == 5
+    assert pipeline._request_limiter.stats()["acquired"] == 5
+    assert pipeline._token_limiter.stats()["acquired"] == 5
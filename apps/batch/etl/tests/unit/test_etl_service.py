@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import sys
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -179,3 +180,99 @@ def test_run_entity_etl_records_failure() -> None:
 
     assert result["success_count"] == 0
     assert result["failure_count"] == 1
+
+
+class RecordingStagingRepo(FakeStagingRepo):
+    """DB 操作がどのスレッドから呼ばれたかを記録する。"""
+
+    def __init__(self, *, latest_status: StagingStatus | None) -> None:
+        super().__init__(latest_status=latest_status)
+        self.threads = set()
+
+    def get_latest_status(self, *, source: str, entity: str, source_id: str):
+        self.threads.add(threading.get_ident())
+        return super().get_latest_status(source=source, entity=entity, source_id=source_id)
+
+    def batch_upsert(self, *, rows) -> int:
+        self.threads.add(threading.get_ident())
+        return super().batch_upsert(rows=rows)
+
+
+@pytest.mark.unit
+def test_run_entity_etl_concurrent_overlaps_fetch_and_keeps_db_on_caller_thread() -> None:
+    staging = RecordingStagingRepo(latest_status=None)
+    raw_store = FakeRawStore()
+    ctx = build_context(job_id="JOB-X", env="dev", run_id="run-1")
+    service = EtlService(staging_repo=staging, raw_store=raw_store, s3_bucket="bucket", max_workers=4)
+    targets = [f"id-{i}" for i in range(8)]
+    # 4 件が同時に fetch されないと解除されない（逐次実行ならタイムアウトで失敗する）
+    barrier = threading.Barrier(4, timeout=5)
+    applier_calls = []
+
+    def target_provider(_ctx):
+        return targets
+
+    def fetcher(target):
+        barrier.wait()
+        return {"itemCode": target}
+
+    def applier(normalized, _ctx, target):
+        applier_calls.append((threading.get_ident(), target))
+
+    result = service.run_entity_etl(
+        ctx=ctx,
+        source="rakuten",
+        entity="item",
+        target_provider=target_provider,
+        fetcher=fetcher,
+        applier=applier,
+        apply_version=1,
+    )
+
+    assert result == {
+        "total_targets": 8,
+        "success_count": 8,
+        "failure_count": 0,
+        "failure_rate": 0,
+    }
+    assert len(raw_store.put_calls) == 8
+    assert sorted(row.source_id for row in staging.upsert_rows) == sorted(targets)
+    assert sorted(m[2] for m in staging.marked) == sorted(targets)
+    assert staging.threads == {threading.get_ident()}
+    assert {thread for thread, _ in applier_calls} == {threading.get_ident()}
+
+
+@pytest.mark.unit
+def test_run_entity_etl_concurrent_counts_failures() -> None:
+    staging = FakeStagingRepo(latest_status=None)
+    raw_store = FakeRawStore()
+    ctx = build_context(job_id="JOB-X", env="dev", run_id="run-1")
+    service = EtlService(staging_repo=staging, raw_store=raw_store, s3_bucket="bucket", max_workers=3)
+    applier_calls = []
+
+    def target_provider(_ctx):
+        return [f"id-{i}" for i in range(10)]
+
+    def fetcher(target):
+        if target in {"id-3", "id-7"}:
+            raise ValueError("boom")
+        return {"itemCode": target}
+
+    def applier(normalized, _ctx, target):
+        if target == "id-5":
+            raise RuntimeError("apply failed")
+        applier_calls.append(target)
+
+    result = service.run_entity_etl(
+        ctx=ctx,
+        source="rakuten",
+        entity="item",
+        target_provider=target_provider,
+        fetcher=fetcher,
+        applier=applier,
+    )
+
+    assert result["success_count"] == 7
+    assert result["failure_count"] == 3
+    assert result["failure_rate"] == 0.3
+    assert sorted(applier_calls) == sorted(f"id-{i}" for i in (0, 1, 2, 4, 6, 8, 9))
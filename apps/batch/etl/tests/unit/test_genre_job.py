@@ -51,6 +51,12 @@ class FakeRakutenClient:
     def fetch_genre(self, *, genre_id: int):
         return {"current": {"genreId": genre_id, "genreName": "Name", "genreLevel": 1}}
 
+    def rate_limit_stats(self):
+        return None
+
+    def http_stats(self):
+        return {}
+
 
 class FakeEtlService:
     last_instance = None
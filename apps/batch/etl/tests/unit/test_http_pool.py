@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import gzip
+import json
+import sys
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+from clients.http_pool import HttpConnectionPool, HttpPoolConfig  # noqa: E402
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_GET(self) -> None:
+        _Handler.connections.add(self.client_address)
+        if self.path.startswith("/limited"):
+            self._send(429, b"{}", {"Retry-After": "3"})
+            return
+        body = json.dumps({"path": self.path}).encode("utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            self._send(200, gzip.compress(body), {"Content-Encoding": "gzip"})
+        else:
+            self._send(200, body, {})
+
+    def do_POST(self) -> None:
+        _Handler.connections.add(self.client_address)
+        length = int(self.headers.get("Content-Length", "0"))
+        self._send(200, self.rfile.read(length), {})
+
+    def _send(self, status: int, body: bytes, headers: dict) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.connections = set()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.mark.unit
+def test_request_reuses_keep_alive_connection(server) -> None:
+    pool = HttpConnectionPool(HttpPoolConfig(gzip=False))
+
+    first = pool.request("GET", f"{server}/a?x=1", timeout=5)
+    second = pool.request("POST", f"{server}/b", body=b'{"k":1}', timeout=5)
+
+    assert json.loads(first.body) == {"path": "/a?x=1"}
+    assert json.loads(second.body) == {"k": 1}
+    assert first.timing.reused is False
+    assert second.timing.reused is True
+    assert second.timing.connect_sec == 0.0
+    assert pool.last_timing == second.timing
+    assert len(_Handler.connections) == 1
+    stats = pool.stats()
+    assert stats["requests"] == 2
+    assert stats["connections_opened"] == 1
+    assert stats["reused"] == 1
+    pool.close()
+
+
+@pytest.mark.unit
+def test_request_decodes_gzip(server) -> None:
+    pool = HttpConnectionPool(HttpPoolConfig(gzip=True))
+
+    res = pool.request("GET", f"{server}/gz", timeout=5)
+
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert json.loads(res.body) == {"path": "/gz"}
+
+
+@pytest.mark.unit
+def test_request_raises_http_error_and_keeps_connection(server) -> None:
+    pool = HttpConnectionPool()
+
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        pool.request("GET", f"{server}/limited", timeout=5)
+    pool.request("GET", f"{server}/ok", timeout=5)
+
+    assert excinfo.value.code == 429
+    assert excinfo.value.headers.get("Retry-After") == "3"
+    assert pool.stats()["connections_opened"] == 1
+
+
+@pytest.mark.unit
+def test_idle_timeout_discards_old_connections(server) -> None:
+    pool = HttpConnectionPool(HttpPoolConfig(idle_timeout_sec=0.0))
+
+    pool.request("GET", f"{server}/a", timeout=5)
+    res = pool.request("GET", f"{server}/b", timeout=5)
+
+    assert res.timing.reused is False
+    assert pool.stats()["connections_opened"] == 2
+
+
+@pytest.mark.unit
+def test_connection_failure_raises_url_error() -> None:
+    pool = HttpConnectionPool()
+
+    with pytest.raises(urllib.error.URLError):
+        # ポート 1 は通常 listen されていない
+        pool.request("GET", "http://127.0.0.1:1/", timeout=1)
+
+    # 失敗した接続はホストごとの使用数に残らない
+    assert pool._in_use[("http", "127.0.0.1", 1)] == 0
+
+
+@pytest.mark.unit
+def test_unexpected_error_releases_slot(server, monkeypatch) -> None:
+    pool = HttpConnectionPool(HttpPoolConfig(max_per_host=2))
+    original_send = pool._send
+
+    def broken_send(*args, **kwargs):
+        raise ValueError("Invalid header value")
+
+    monkeypatch.setattr(pool, "_send", broken_send)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            pool.request("GET", f"{server}/a", timeout=1)
+
+    # スロットが漏れていれば上限に達して待ち続ける（timeout で URLError になる）
+    monkeypatch.setattr(pool, "_send", original_send)
+    for _ in range(2):
+        assert pool.request("GET", f"{server}/b", timeout=1).status == 200
+    assert pool._in_use[("http", "127.0.0.1", int(server.rsplit(":", 1)[1]))] == 0
+
+
+@pytest.mark.unit
+def test_checkout_waits_until_request_timeout(server) -> None:
+    pool = HttpConnectionPool(HttpPoolConfig(max_per_host=1))
+    key = ("http", "127.0.0.1", int(server.rsplit(":", 1)[1]))
+    pool._checkout(key, 1)
+
+    with pytest.raises(urllib.error.URLError, match="connection pool timeout"):
+        pool.request("GET", f"{server}/a", timeout=0.1)
+
+    pool._checkin(key, None)
+    assert pool.request("GET", f"{server}/a", timeout=1).status == 200
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+from repos.apl.item_embedding_repo import ItemEmbeddingRepo  # noqa: E402
+
+
+class FakeCursor:
+    def __init__(self, *, fetchmany_values=None, fetchall_value=None, error=None) -> None:
+        self.fetchmany_values = list(fetchmany_values or [])
+        self.fetchall_value = fetchall_value or []
+        self.error = error
+        self.executed = []
+        self.closed = False
+
+    def execute(self, query: str, params=None) -> None:
+        if self.error is not None:
+            raise self.error
+        self.executed.append((query, params))
+
+    def fetchmany(self, size: int):
+        return self.fetchmany_values.pop(0) if self.fetchmany_values else []
+
+    def fetchall(self):
+        return self.fetchall_value
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, cursor: FakeCursor) -> None:
+        self._cursor = cursor
+        self.cursor_names = []
+        self.committed = False
+        self.rolled_back = False
+
+    def cursor(self, name=None):
+        self.cursor_names.append(name)
+        return self._cursor
+
+    def commit(self) -> None:
+        self.committed = True
+
+    def rollback(self) -> None:
+        self.rolled_back = True
+
+
+@pytest.mark.unit
+def test_iter_diff_sources_streams_with_named_cursor() -> None:
+    cursor = FakeCursor(
+        fetchmany_values=[
+            [("item-1", "text-1", "h1"), ("item-2", "text-2", "h2")],
+            [("item-3", "text-3", "h3")],
+        ]
+    )
+    conn = FakeConnection(cursor)
+
+    rows = list(ItemEmbeddingRepo(conn=conn).iter_diff_sources(model="m", fetch_size=2))
+
+    assert [row.item_id for row in rows] == ["item-1", "item-2", "item-3"]
+    assert conn.cursor_names == ["item_embedding_diff_sources"]
+    assert cursor.executed[0][1] == ("m",)
+    assert cursor.closed is True
+
+
+@pytest.mark.unit
+def test_upsert_embeddings_writes_rows_in_one_statement() -> None:
+    cursor = FakeCursor(fetchall_value=[(True,), (False,)])
+    conn = FakeConnection(cursor)
+
+    result = ItemEmbeddingRepo(conn=conn).upsert_embeddings(
+        model="m",
+        rows=[("item-1", [0.5], "h1"), ("item-2", [0.25], "h2"), ("item-3", [1.0], "h3")],
+    )
+
+    assert result == {"inserted": 1, "updated": 1, "skipped": 1, "deduplicated": 0}
+    assert len(cursor.executed) == 1
+    query, params = cursor.executed[0]
+    assert query.count("now())") == 3
+    assert params[:4] == ["item-1", "m", "[0.50000000]", "h1"]
+    assert conn.committed is True
+
+
+@pytest.mark.unit
+def test_upsert_embeddings_rolls_back_on_error() -> None:
+    conn = FakeConnection(FakeCursor(error=RuntimeError("boom")))
+
+    with pytest.raises(RuntimeError):
+        ItemEmbeddingRepo(conn=conn).upsert_embeddings(model="m", rows=[("item-1", [0.5], "h1")])
+
+    assert conn.rolled_back is True
+    assert conn.committed is False
+
+
+@pytest.mark.unit
+def test_upsert_embeddings_reports_deduplicated_rows_separately() -> None:
+    cursor = FakeCursor(fetchall_value=[(True,)])
+    conn = FakeConnection(cursor)
+
+    result = ItemEmbeddingRepo(conn=conn).upsert_embeddings(
+        model="m",
+        rows=[("item-1", [0.5], "h1"), ("item-1", [0.75], "h2"), ("item-2", [1.0], "h3")],
+    )
+
+    assert result == {"inserted": 1, "updated": 0, "skipped": 1, "deduplicated": 1}
+    query, params = cursor.executed[0]
+    assert query.count("now())") == 2
+    # 同じ item_id は後の値で書く
+    assert params[:4] == ["item-1", "m", "[0.75000000]", "h2"]
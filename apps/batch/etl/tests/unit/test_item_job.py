@@ -80,11 +80,18 @@ class FakeRakutenClient:
     def fetch_item(self, *, item_code: str):
         return {"items": [{"itemCode": item_code, "tagIds": [1, 2]}]}
 
+    def rate_limit_stats(self):
+        return None
+
+    def http_stats(self):
+        return {}
+
 
 class FakeEtlService:
     last_instance = None
 
-    def __init__(self, *, staging_repo, raw_store, s3_bucket, logger=None) -> None:
+    def __init__(self, *, staging_repo, raw_store, s3_bucket, logger=None, max_workers=1) -> None:
+        self.max_workers = max_workers
         self.run_args = None
         FakeEtlService.last_instance = self
 
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import io
+import json
+import sys
+import urllib.error
+from email.message import Message
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+from clients.http_pool import HttpResponse, HttpTiming  # noqa: E402
+from clients.openai_client import (  # noqa: E402
+    OpenAIClient,
+    OpenAIClientAuthError,
+    OpenAIClientConfig,
+    OpenAIClientError,
+)
+
+
+class FakePool:
+    def __init__(self, outcomes) -> None:
+        self.outcomes = list(outcomes)
+        self.bodies = []
+
+    def request(self, method, url, *, body=None, headers=None, timeout):
+        self.bodies.append(json.loads(body))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def _make_response(payload: dict) -> HttpResponse:
+    return HttpResponse(
+        status=200,
+        headers={},
+        body=json.dumps(payload).encode("utf-8"),
+        timing=HttpTiming(connect_sec=0.0, ttfb_sec=0.0, total_sec=0.0, reused=True),
+    )
+
+
+def _client(pool: FakePool) -> OpenAIClient:
+    return OpenAIClient(
+        config=OpenAIClientConfig(api_key="key", model="m", max_retries=2, backoff_base_sec=0.0),
+        pool=pool,
+    )
+
+
+@pytest.mark.unit
+def test_embed_many_maps_results_by_index() -> None:
+    pool = FakePool(
+        [
+            _make_response(
+                {
+                    "data": [
+                        {"index": 1, "embedding": [2.0]},
+                        {"index": 0, "embedding": [1.0]},
+                    ]
+                }
+            )
+        ]
+    )
+
+    result = _client(pool).embed_many(source_texts=["a", "b"])
+
+    assert result == [[1.0], [2.0]]
+    assert pool.bodies[0] == {"model": "m", "input": ["a", "b"]}
+
+
+@pytest.mark.unit
+def test_embed_many_rejects_incomplete_response() -> None:
+    pool = FakePool([_make_response({"data": [{"index": 0, "embedding": [1.0]}]})])
+
+    with pytest.raises(OpenAIClientError):
+        _client(pool).embed_many(source_texts=["a", "b"])
+
+
+@pytest.mark.unit
+def test_embed_raises_auth_error_without_retry() -> None:
+    error = urllib.error.HTTPError(
+        url="http://example", code=401, msg="Unauthorized", hdrs=Message(), fp=io.BytesIO()
+    )
+    pool = FakePool([error])
+
+    with pytest.raises(OpenAIClientAuthError):
+        _client(pool).embed(source_text="a")
+    assert len(pool.bodies) == 1
@@ -12,6 +12,7 @@ import pytest
 ROOT = Path(__file__).resolve().parents[2]
 sys.path.append(str(ROOT))
 
+from clients.http_pool import HttpResponse, HttpTiming  # noqa: E402
 from clients.rakuten_client import (  # noqa: E402
     RakutenClient,
     RakutenClientConfig,
@@ -19,32 +20,45 @@ from clients.rakuten_client import (  # noqa: E402
 )
 
 
-def _make_response(payload: str) -> mock.MagicMock:
-    response = mock.MagicMock()
-    response.read.return_value = payload.encode("utf-8")
-    response.__enter__.return_value = response
-    response.__exit__.return_value = False
-    return response
+class FakePool:
+    def __init__(self, outcomes) -> None:
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, *, body=None, headers=None, timeout):
+        self.calls.append((method, url, timeout))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def _make_response(payload: str) -> HttpResponse:
+    return HttpResponse(
+        status=200,
+        headers={},
+        body=payload.encode("utf-8"),
+        timing=HttpTiming(connect_sec=0.0, ttfb_sec=0.0, total_sec=0.0, reused=False),
+    )
 
 
 @pytest.mark.unit
 def test_fetch_item_success_returns_json() -> None:
+    pool = FakePool([_make_response('{"items":[{"itemCode":"shop:1"}]}')])
     client = RakutenClient(
-        config=RakutenClientConfig(application_id="app", affiliate_id=None)
+        config=RakutenClientConfig(application_id="app", affiliate_id=None), pool=pool
     )
-    response = _make_response('{"items":[{"itemCode":"shop:1"}]}')
 
-    with mock.patch("urllib.request.urlopen", return_value=response):
-        result = client.fetch_item(item_code="shop:1")
+    result = client.fetch_item(item_code="shop:1")
 
     assert result["items"][0]["itemCode"] == "shop:1"
+    method, url, _ = pool.calls[0]
+    assert method == "GET"
+    assert "itemCode=shop%3A1" in url
 
 
 @pytest.mark.unit
 def test_fetch_ranking_raises_on_auth_error() -> None:
-    client = RakutenClient(
-        config=RakutenClientConfig(application_id="app", affiliate_id=None)
-    )
     error = urllib.error.HTTPError(
         url="http://example",
         code=401,
@@ -52,24 +66,68 @@ def test_fetch_ranking_raises_on_auth_error() -> None:
         hdrs=Message(),
         fp=io.BytesIO(),
     )
+    client = RakutenClient(
+        config=RakutenClientConfig(application_id="app", affiliate_id=None),
+        pool=FakePool([error]),
+    )
 
-    with mock.patch("urllib.request.urlopen", side_effect=error):
-        with pytest.raises(RakutenClientError):
-            client.fetch_ranking(genre_id=1)
+    with pytest.raises(RakutenClientError):
+        client.fetch_ranking(genre_id=1)
 
 
 @pytest.mark.unit
 def test_fetch_tag_retries_on_429_then_succeeds() -> None:
+    headers = Message()
+    headers["Retry-After"] = "0"
+    error = urllib.error.HTTPError(
+        url="http://example",
+        code=429,
+        msg="Too Many Requests",
+        hdrs=headers,
+        fp=io.BytesIO(),
+    )
+    pool = FakePool([error, _make_response('{"items":[{"tagId":1}]}')])
     client = RakutenClient(
         config=RakutenClientConfig(
             application_id="app",
             affiliate_id=None,
             max_attempts=3,
             base_backoff_sec=0.0,
-        )
+        ),
+        pool=pool,
+    )
+
+    with mock.patch("time.sleep") as sleeper:
+        result = client.fetch_tag(tag_id=1)
+
+    assert result["items"][0]["tagId"] == 1
+    assert len(pool.calls) == 2
+    sleeper.assert_called()
+
+
+@pytest.mark.unit
+def test_fetch_genre_retries_then_exhausts() -> None:
+    error = urllib.error.URLError("timeout")
+    client = RakutenClient(
+        config=RakutenClientConfig(
+            application_id="app",
+            affiliate_id=None,
+            max_attempts=2,
+            base_backoff_sec=0.0,
+        ),
+        pool=FakePool([error, error]),
     )
+
+    with mock.patch("time.sleep"):
+        with pytest.raises(RakutenClientError):
+            client.fetch_genre(genre_id=1)
+
+
+@pytest.mark.unit
+def test_rate_limiter_is_shared_and_throttled_on_429() -> None:
+    limiter = mock.MagicMock()
     headers = Message()
-    headers["Retry-After"] = "0"
+    headers["Retry-After"] = "2"
     error = urllib.error.HTTPError(
         url="http://example",
         code=429,
@@ -77,30 +135,35 @@ def test_fetch_tag_retries_on_429_then_succeeds() -> None:
         hdrs=headers,
         fp=io.BytesIO(),
     )
-    response = _make_response('{"items":[{"tagId":1}]}')
+    client = RakutenClient(
+        config=RakutenClientConfig(application_id="app", affiliate_id=None, max_attempts=3),
+        rate_limiter=limiter,
+        pool=FakePool([error, _make_response('{"current":{}}'), _make_response('{"items":[]}')]),
+    )
 
-    with mock.patch("urllib.request.urlopen", side_effect=[error, response]) as mocked:
-        with mock.patch("time.sleep") as sleeper:
-            result = client.fetch_tag(tag_id=1)
+    with mock.patch("time.sleep") as sleeper:
+        client.fetch_genre(genre_id=1)
+        client.fetch_item(item_code="shop:1")
 
-    assert result["items"][0]["tagId"] == 1
-    assert mocked.call_count == 2
-    sleeper.assert_called()
+    assert limiter.acquire.call_count == 3
+    limiter.on_throttled.assert_called_once_with(2.0)
+    assert limiter.on_success.call_count == 2
+    # 429 の待機はバケット側に任せ、呼び出しスレッドでは sleep しない
+    sleeper.assert_not_called()
 
 
 @pytest.mark.unit
-def test_fetch_genre_retries_then_exhausts() -> None:
+def test_requests_per_sec_builds_rate_limiter() -> None:
     client = RakutenClient(
         config=RakutenClientConfig(
             application_id="app",
             affiliate_id=None,
-            max_attempts=2,
-            base_backoff_sec=0.0,
+            requests_per_sec=5.0,
+            max_requests_per_sec=10.0,
         )
     )
-    error = urllib.error.URLError("timeout")
 
-    with mock.patch("urllib.request.urlopen", side_effect=error):
-        with mock.patch("time.sleep"):
-            with pytest.raises(RakutenClientError):
-                client.fetch_genre(genre_id=1)
+    assert client.rate_limit_stats()["rate_per_sec"] == 5.0
+    assert RakutenClient(
+        config=RakutenClientConfig(application_id="app", affiliate_id=None)
+    ).rate_limit_stats() is None
@@ -58,6 +58,12 @@ class FakeRakutenClient:
             "items": [{"rank": 1, "itemCode": "shop:1"}],
         }
 
+    def rate_limit_stats(self):
+        return None
+
+    def http_stats(self):
+        return {}
+
 
 class FakeEtlService:
     last_instance = None
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT))
+
+from clients.rate_limiter import TokenBucketRateLimiter  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _limiter(clock: FakeClock, **kwargs) -> TokenBucketRateLimiter:
+    return TokenBucketRateLimiter(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+@pytest.mark.unit
+def test_acquire_paces_to_rate() -> None:
+    clock = FakeClock()
+    limiter = _limiter(clock, rate_per_sec=2.0)
+
+    for _ in range(5):
+        limiter.acquire()
+
+    # 初回はバースト分で即時、以降は 0.5 秒間隔
+    assert clock.now == pytest.approx(2.0)
+    assert limiter.stats()["acquired"] == 5
+    assert limiter.stats()["throttled_sec"] == pytest.approx(2.0)
+
+
+@pytest.mark.unit
+def test_on_throttled_halves_rate_and_pauses_for_retry_after() -> None:
+    clock = FakeClock()
+    limiter = _limiter(clock, rate_per_sec=4.0)
+    limiter.acquire()
+
+    limiter.on_throttled(3.0)
+    limiter.acquire()
+
+    assert limiter.rate_per_sec == pytest.approx(2.0)
+    # Retry-After の 3 秒 + 新レートでの 1 トークン分
+    assert clock.now == pytest.approx(3.5)
+    assert limiter.stats()["throttled_count"] == 1
+
+
+@pytest.mark.unit
+def test_on_success_recovers_rate_up_to_max() -> None:
+    clock = FakeClock()
+    limiter = _limiter(
+        clock,
+        rate_per_sec=1.0,
+        max_rate_per_sec=2.0,
+        increase_step=0.5,
+        success_window=2,
+    )
+
+    for _ in range(10):
+        limiter.on_success()
+
+    assert limiter.rate_per_sec == pytest.approx(2.0)
+
+    limiter.on_throttled()
+    limiter.on_throttled()
+    limiter.on_throttled()
+    assert limiter.rate_per_sec == pytest.approx(0.25)
+
+
+@pytest.mark.unit
+def test_acquire_is_shared_across_threads() -> None:
+    limiter = TokenBucketRateLimiter(rate_per_sec=200.0)
+    errors = []
+
+    def worker() -> None:
+        try:
+            for _ in range(5):
+                limiter.acquire()
+        except Exception as exc:  # pragma: no cover
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert limiter.stats()["acquired"] == 20
+    # 20 件 / 200 rps のうちバースト 1 件分を除いた時間は待たされる
+    assert limiter.stats()["throttled_sec"] >= 19 / 200.0 * 0.9
+
+
+@pytest.mark.unit
+def test_rejects_non_positive_rate() -> None:
+    with pytest.raises(ValueError):
+        TokenBucketRateLimiter(rate_per_sec=0)
@@ -55,6 +55,12 @@ class FakeRakutenClient:
     def fetch_tag(self, *, tag_id: int):
         return {"tagGroup": {"tagGroupId": 1000, "tagGroupName": "Group", "tags": []}}
 
+    def rate_limit_stats(self):
+        return None
+
+    def http_stats(self):
+        return {}
+
 
 class FakeEtlService:
     last_instance = None
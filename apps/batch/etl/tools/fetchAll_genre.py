@@ -13,8 +13,12 @@ from dotenv import load_dotenv
 # apps/batch/.env を読み込む（実行ディレクトリに依存しない）
 load_dotenv(Path(__file__).resolve().parent.parent.parent / ".env")
 
+# apps/batch/etl の clients を使う
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from clients.rate_limiter import TokenBucketRateLimiter  # noqa: E402
+
 
-import time
 import uuid
 from dataclasses import dataclass
 from datetime import datetime, timezone
@@ -37,6 +41,9 @@ class Config:
     start_genre_id: int
     batch_size: int
     sleep_sec: float
+    rate_per_sec: float
+    max_rate_per_sec: Optional[float]
+    max_attempts: int
     max_genres: Optional[int]
     lock_owner: str
     request_timeout_sec: int
@@ -194,15 +201,37 @@ def enqueue_candidates(conn, genre_ids: Iterable[int]):
 # API / Parsing
 # ==========
 
-def fetch_genre_from_api(cfg: Config, genre_id: int) -> Dict[str, Any]:
+def build_rate_limiter(cfg: Config) -> TokenBucketRateLimiter:
+    return TokenBucketRateLimiter(rate_per_sec=cfg.rate_per_sec, max_rate_per_sec=cfg.max_rate_per_sec)
+
+
+def fetch_genre_from_api(cfg: Config, genre_id: int, limiter: TokenBucketRateLimiter) -> Dict[str, Any]:
+    """
+    レートはトークンバケットで制御し、429 のときは Retry-After に従って全体を止めてから再試行する。
+    """
     params = {
         "applicationId": cfg.rakuten_app_id,
         "genreId": genre_id,
         "format": "json",
     }
-    r = requests.get(cfg.api_base_url, params=params, timeout=cfg.request_timeout_sec)
-    r.raise_for_status()
-    return r.json()
+    attempt = 1
+    while True:
+        limiter.acquire()
+        r = requests.get(cfg.api_base_url, params=params, timeout=cfg.request_timeout_sec)
+        if r.status_code == 429 and attempt < cfg.max_attempts:
+            limiter.on_throttled(_retry_after_sec(r.headers.get("Retry-After"), attempt))
+            attempt += 1
+            continue
+        r.raise_for_status()
+        limiter.on_success()
+        return r.json()
+
+
+def _retry_after_sec(value: Optional[str], attempt: int) -> float:
+    try:
+        return float(value) if value else float(2 ** (attempt - 1))
+    except ValueError:
+        return float(2 ** (attempt - 1))
 
 
 def _unwrap_list_items(lst: Any) -> List[Dict[str, Any]]:
@@ -315,6 +344,7 @@ def build_genre_row(payload: Dict[str, Any]) -> Dict[str, Any]:
 
 def run(cfg: Config) -> int:
     conn = get_conn(cfg.database_url)
+    limiter = build_rate_limiter(cfg)
     try:
         seed_start_genre(conn, cfg.start_genre_id)
 
@@ -336,7 +366,7 @@ def run(cfg: Config) -> int:
                     return 0
 
                 try:
-                    payload = fetch_genre_from_api(cfg, genre_id)
+                    payload = fetch_genre_from_api(cfg, genre_id, limiter)
                     row = build_genre_row(payload)
                     upsert_genre(conn, row)
 
@@ -349,14 +379,12 @@ def run(cfg: Config) -> int:
 
                     print(f"[OK] genre_id={genre_id} name={row['genre_name']} candidates={len(candidates)} total={fetched_count}")
 
-                    if cfg.sleep_sec > 0:
-                        time.sleep(cfg.sleep_sec)
-
                 except Exception as e:
                     mark_error(conn, genre_id, repr(e))
                     print(f"[ERR] genre_id={genre_id} {e}", file=sys.stderr)
 
     finally:
+        print(f"[RATE] {limiter.stats()}")
         conn.close()
 
 
@@ -367,7 +395,13 @@ def parse_args(argv: List[str]) -> Config:
     p.add_argument("--api-base-url", default=DEFAULT_API_BASE_URL)
     p.add_argument("--start-genre-id", type=int, default=int(os.getenv("START_GENRE_ID", "0")))
     p.add_argument("--batch-size", type=int, default=int(os.getenv("BATCH_SIZE", "20")))
-    p.add_argument("--sleep-sec", type=float, default=float(os.getenv("SLEEP_SEC", "0.2")))
+    p.add_argument("--sleep-sec", type=float, default=float(os.getenv("SLEEP_SEC", "0.2")),
+                   help="--rate-per-sec 未指定時の初期間隔（1/sleep_sec req/sec）")
+    p.add_argument("--rate-per-sec", type=float, default=float(os.getenv("RATE_PER_SEC") or 0),
+                   help="初期レート（req/sec）。429 で自動的に下げる")
+    p.add_argument("--max-rate-per-sec", type=float, default=float(os.getenv("MAX_RATE_PER_SEC") or 0),
+                   help="429 が出ない間に引き上げる上限（未指定時は初期レートのまま）")
+    p.add_argument("--max-attempts", type=int, default=int(os.getenv("MAX_ATTEMPTS", "5")))
     p.add_argument("--max-genres", type=int, default=None, help="テスト用：取得件数上限（例: 10）")
     p.add_argument("--timeout-sec", type=int, default=int(os.getenv("REQUEST_TIMEOUT_SEC", "20")))
 
@@ -377,6 +411,13 @@ def parse_args(argv: List[str]) -> Config:
         raise SystemExit("NEON_DATABASE_URL is required (arg or env)")
     if not args.rakuten_app_id:
         raise SystemExit("RAKUTEN_APP_ID is required (arg or env)")
+    if args.max_attempts < 1:
+        raise SystemExit("--max-attempts must be >= 1")
+
+    rate_per_sec = args.rate_per_sec
+    if rate_per_sec <= 0:
+        # 従来の固定間隔をそのまま初期レートとして扱う（0 以下なら実質無制限）
+        rate_per_sec = 1.0 / args.sleep_sec if args.sleep_sec > 0 else 1000.0
 
     lock_owner = os.getenv("LOCK_OWNER") or f"{platform.node()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
 
@@ -387,6 +428,9 @@ def parse_args(argv: List[str]) -> Config:
         start_genre_id=args.start_genre_id,
         batch_size=args.batch_size,
         sleep_sec=args.sleep_sec,
+        rate_per_sec=rate_per_sec,
+        max_rate_per_sec=args.max_rate_per_sec or None,
+        max_attempts=args.max_attempts,
         max_genres=args.max_genres,
         lock_owner=lock_owner,
         request_timeout_sec=args.timeout_sec,
@@ -1,20 +1,65 @@
+import asyncio
+import base64
 from datetime import datetime, timezone
 import json
 import logging
+import os
 import uuid
 
 from fastapi import HTTPException
 
 logger = logging.getLogger(__name__)
 import math
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
-from reco.api.schemas import RecommendationRequest, RecommendationResponse, RecommendedItem, ResolvedAlgorithm
+import numpy as np
+
+from reco.api.schemas import (
+    ContextVectorFormat,
+    RecommendationBatchRequest,
+    RecommendationBatchResponse,
+    RecommendationRequest,
+    RecommendationResponse,
+    RecommendedItem,
+    ResolvedAlgorithm,
+)
+from reco.core.ann import ExactIndex
 from reco.core.mmr import mmr_select
 from reco.core.mode_resolver import resolve_mode
-from reco.core.scoring import score_candidates
-from reco.infra.embedding_client import DEFAULT_EMBEDDING_MODEL, embed_text
-from reco.infra.supabase_client import get_supabase_admin
+from reco.core.scoring import ScoredColumns, score_columns
+from reco.domain.models import ResolvedParams
+from reco.infra.catalog import CatalogSnapshot, EmbeddingMatrix, get_catalog, normalize_vector
+from reco.infra.embedding_client import DEFAULT_EMBEDDING_MODEL, embed_text, embed_text_async
+from reco.infra.metrics import stage
+from reco.infra.response_cache import (
+    RESPONSE_CACHE_SIZE,
+    RESPONSE_CACHE_TTL_SEC,
+    ResponseCache,
+    request_key,
+)
+from reco.infra.supabase_client import get_apl_db
+from reco.infra.supabase_repo import fetch_reco_candidates, search_item_vectors
+
+# catalog: 常駐カタログ（未ロード時は postgrest にフォールバック）
+# postgrest: リクエストごとに features + embedding（100 件ずつ）を取得
+# rpc: apl.reco_candidates で features + embedding を 1 往復で取得
+# pgvector: apl.reco_vector_search で類似度検索まで DB 側で行い、上位 k 件のみ受け取る
+RETRIEVAL_MODES = {"catalog", "postgrest", "rpc", "pgvector"}
+RETRIEVAL_MODE = os.getenv("RECO_RETRIEVAL_MODE", "catalog")
+if RETRIEVAL_MODE not in RETRIEVAL_MODES:
+    raise ValueError(f"invalid retrieval mode: {RETRIEVAL_MODE}")
+
+_response_cache: ResponseCache[RecommendationResponse] = ResponseCache(
+    RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_SEC
+)
+
+
+def get_response_cache() -> ResponseCache[RecommendationResponse]:
+    return _response_cache
+
+
+def _current_snapshot() -> Optional[CatalogSnapshot]:
+    return get_catalog() if RETRIEVAL_MODE == "catalog" else None
 
 
 def _build_context_text(req: RecommendationRequest) -> str:
@@ -69,39 +114,41 @@ def _cosine_similarity(a: List[float], b: List[float]) -> float | None:
     return dot / (norm_a * norm_b)
 
 
-def recommend(req: RecommendationRequest) -> RecommendationResponse:
-    request_id = str(uuid.uuid4())
-    embedding_version = 1
-
-    logger.info(
-        "recommendation start request_id=%s mode=%s",
-        request_id,
-        req.mode,
-    )
-
-    try:
-        resolved = resolve_mode(req.mode, req.algorithmOverride)
-    except ValueError as e:
-        logger.warning("recommendation mode resolve failed request_id=%s error=%s", request_id, e)
-        raise HTTPException(status_code=400, detail=str(e))
-
-    context_text = _build_context_text(req)
+def _fetch_embeddings(db: Any, item_ids: List[str], request_id: str) -> Dict[str, List[float]]:
+    # PostgREST の URL 長制限を回避するため、バッチ分割で取得（1バッチ最大100件）
+    EMBEDDING_BATCH_SIZE = 100
+    embeddings: Dict[str, List[float]] = {}
     try:
-        context_vector = embed_text(context_text)
+        with stage("fetch_embeddings") as s:
+            for i in range(0, len(item_ids), EMBEDDING_BATCH_SIZE):
+                batch = item_ids[i : i + EMBEDDING_BATCH_SIZE]
+                embedding_resp = (
+                    db.table("item_embedding")
+                    .select("item_id, embedding")
+                    .eq("model", DEFAULT_EMBEDDING_MODEL)
+                    .in_("item_id", batch)
+                    .execute()
+                )
+                for r in embedding_resp.data or []:
+                    emb = _parse_embedding(r.get("embedding"))
+                    if emb is not None:
+                        embeddings[r.get("item_id")] = emb
+            s.rows = len(embeddings)
     except Exception as e:
         logger.exception(
-            "recommendation embedding failed request_id=%s context_text_len=%s error=%s",
+            "recommendation item_embedding query failed request_id=%s item_ids_count=%s error=%s",
             request_id,
-            len(context_text),
+            len(item_ids),
             e,
         )
-        raise HTTPException(status_code=500, detail=f"embedding failed: {e}")
+        raise HTTPException(status_code=500, detail=f"item_embedding query failed: {e}")
+    return embeddings
+
 
-    sb = get_supabase_admin()
+def _fetch_feature_rows(db: Any, req: RecommendationRequest, request_id: str) -> List[Dict[str, Any]]:
     try:
         feature_query = (
-            sb.schema("apl")
-            .table("item_features")
+            db.table("item_features")
             .select(
                 "item_id, price_yen, rank, popularity_score, review_average, "
                 "review_count, tag_ids, item: item_id (id, item_name, item_url, affiliate_url, is_active)"
@@ -121,17 +168,16 @@ def recommend(req: RecommendationRequest) -> RecommendationResponse:
             e,
         )
         raise HTTPException(status_code=500, detail=f"supabase query failed: {e}")
+    return feature_resp.data or []
 
-    rows = feature_resp.data or []
-    if not rows:
-        logger.error(
-            "recommendation no item_features rows request_id=%s budget_min=%s budget_max=%s",
-            request_id,
-            req.budgetMin,
-            req.budgetMax,
-        )
-        raise HTTPException(status_code=500, detail="apl.item_features has no rows")
 
+def _rank_rows_by_vector(
+    db: Any,
+    rows: List[Dict[str, Any]],
+    context_vector: List[float],
+    k: int,
+    request_id: str,
+) -> List[Dict[str, Any]]:
     item_ids = [r.get("item_id") for r in rows if r.get("item_id")]
     if not item_ids:
         logger.error(
@@ -141,34 +187,89 @@ def recommend(req: RecommendationRequest) -> RecommendationResponse:
         )
         raise HTTPException(status_code=500, detail="no item_id in features result")
 
-    # PostgREST の URL 長制限を回避するため、バッチ分割で取得（1バッチ最大100件）
-    EMBEDDING_BATCH_SIZE = 100
-    embeddings: Dict[str, List[float]] = {}
+    embeddings = _fetch_embeddings(db, item_ids, request_id)
+    rows_with_vector: List[Dict[str, Any]] = []
+    for r in rows:
+        emb = embeddings.get(r.get("item_id"))
+        if not emb:
+            continue
+        sim = _cosine_similarity(context_vector, emb)
+        if sim is None:
+            continue
+        row = dict(r)
+        row["vector_score"] = sim
+        row["embedding"] = emb
+        rows_with_vector.append(row)
+
+    rows_with_vector.sort(key=lambda x: x["vector_score"], reverse=True)
+    return rows_with_vector[:k]
+
+
+def _fetch_candidate_rows(db: Any, req: RecommendationRequest, request_id: str) -> List[Dict[str, Any]]:
     try:
-        for i in range(0, len(item_ids), EMBEDDING_BATCH_SIZE):
-            batch = item_ids[i : i + EMBEDDING_BATCH_SIZE]
-            embedding_resp = (
-                sb.schema("apl")
-                .table("item_embedding")
-                .select("item_id, embedding")
-                .eq("model", DEFAULT_EMBEDDING_MODEL)
-                .in_("item_id", batch)
-                .execute()
-            )
-            for r in embedding_resp.data or []:
-                emb = _parse_embedding(r.get("embedding"))
-                if emb is not None:
-                    embeddings[r.get("item_id")] = emb
+        return fetch_reco_candidates(db, DEFAULT_EMBEDDING_MODEL, req.budgetMin, req.budgetMax)
     except Exception as e:
         logger.exception(
-            "recommendation item_embedding query failed request_id=%s item_ids_count=%s error=%s",
+            "recommendation reco_candidates rpc failed request_id=%s error=%s",
             request_id,
-            len(item_ids),
             e,
         )
-        raise HTTPException(status_code=500, detail=f"item_embedding query failed: {e}")
+        raise HTTPException(status_code=500, detail=f"reco_candidates rpc failed: {e}")
 
-    # item_id -> 商品詳細のマップ（最終レスポンス用）
+
+def _rank_candidate_rows(
+    rows: List[Dict[str, Any]],
+    context_vector: List[float],
+    k: int,
+) -> List[Dict[str, Any]]:
+    """embedding 付きの候補行を正規化済み行列にまとめ、内積 1 回で上位 k 件を求める。"""
+    by_id = {r["item_id"]: r for r in rows if r.get("item_id") and r.get("embedding") is not None}
+    embeddings = EmbeddingMatrix.from_vectors({item_id: r["embedding"] for item_id, r in by_id.items()})
+    query = normalize_vector(context_vector)
+    if query is None or len(embeddings) == 0 or query.shape[0] != embeddings.dim:
+        return []
+    top_rows, top_scores = ExactIndex(embeddings.matrix).search(query, k)
+    result: List[Dict[str, Any]] = []
+    for row, score in zip(top_rows.tolist(), top_scores.tolist()):
+        item = dict(by_id[embeddings.item_ids[row]])
+        item["vector_score"] = score
+        item["embedding"] = embeddings.matrix[row]
+        result.append(item)
+    return result
+
+
+def _search_vector_rows(
+    db: Any,
+    req: RecommendationRequest,
+    context_vector: List[float],
+    k: int,
+    request_id: str,
+) -> List[Dict[str, Any]]:
+    try:
+        return search_item_vectors(
+            db, DEFAULT_EMBEDDING_MODEL, context_vector, k, req.budgetMin, req.budgetMax
+        )
+    except Exception as e:
+        logger.exception(
+            "recommendation reco_vector_search rpc failed request_id=%s error=%s",
+            request_id,
+            e,
+        )
+        raise HTTPException(status_code=500, detail=f"reco_vector_search rpc failed: {e}")
+
+
+def _mmr_vectors(scored: ScoredColumns, indices: Sequence[int]) -> Optional[np.ndarray]:
+    """MMR 入力行の embedding を行列にする。1 件でも欠けていれば None。"""
+    vectors = [scored.rows[i].get("embedding") for i in indices]
+    if not vectors or any(v is None for v in vectors):
+        return None
+    try:
+        return np.vstack([np.asarray(v, dtype=np.float32) for v in vectors])
+    except ValueError:
+        return None
+
+
+def _build_item_details(rows: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
     item_details: Dict[str, Dict[str, Any]] = {}
     for r in rows:
         item_id = r.get("item_id")
@@ -189,42 +290,139 @@ def recommend(req: RecommendationRequest) -> RecommendationResponse:
                 "affiliateUrl": "",
                 "priceYen": r.get("price_yen"),
             }
+    return item_details
 
-    rows_with_vector: List[Dict[str, Any]] = []
-    for r in rows:
-        emb = embeddings.get(r.get("item_id"))
-        if not emb:
-            continue
-        sim = _cosine_similarity(context_vector, emb)
-        if sim is None:
-            continue
-        row = dict(r)
-        row["vector_score"] = sim
-        rows_with_vector.append(row)
 
-    if not rows_with_vector:
+def _resolve_params(req: RecommendationRequest, request_id: str) -> ResolvedParams:
+    try:
+        with stage("resolve"):
+            return resolve_mode(req.mode, req.algorithmOverride)
+    except ValueError as e:
+        logger.warning("recommendation mode resolve failed request_id=%s error=%s", request_id, e)
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _embedding_failed(context_text: str, request_id: str, e: Exception) -> HTTPException:
+    logger.exception(
+        "recommendation embedding failed request_id=%s context_text_len=%s error=%s",
+        request_id,
+        len(context_text),
+        e,
+    )
+    return HTTPException(status_code=500, detail=f"embedding failed: {e}")
+
+
+def _load_candidates(
+    req: RecommendationRequest,
+    snapshot: Optional[CatalogSnapshot],
+    request_id: str,
+) -> Tuple[Any, List[Dict[str, Any]], int]:
+    """予算内の候補を用意する。常駐カタログがあれば DB への問い合わせは行わない。"""
+    with stage("load_candidates") as s:
+        db, rows, rows_count = _load_candidate_rows(req, snapshot, request_id)
+        s.rows = rows_count
+
+    if not rows_count and not (snapshot is None and RETRIEVAL_MODE == "pgvector"):
         logger.error(
-            "recommendation no items with embeddings request_id=%s rows_count=%s embeddings_count=%s",
+            "recommendation no item_features rows request_id=%s budget_min=%s budget_max=%s",
             request_id,
-            len(rows),
-            len(embeddings),
+            req.budgetMin,
+            req.budgetMax,
+        )
+        raise HTTPException(status_code=500, detail="apl.item_features has no rows")
+    return db, rows, rows_count
+
+
+def _load_candidate_rows(
+    req: RecommendationRequest,
+    snapshot: Optional[CatalogSnapshot],
+    request_id: str,
+) -> Tuple[Any, List[Dict[str, Any]], int]:
+    db = None
+    rows: List[Dict[str, Any]] = []
+    if snapshot is None and RETRIEVAL_MODE == "pgvector":
+        # 予算の絞り込みも類似度検索と同じ RPC で行うため、ここでは取得しない
+        return get_apl_db(), rows, 0
+    if snapshot is not None:
+        # 常駐カタログは price_yen 順のため、予算内の件数は二分探索で求まる
+        rows_count = snapshot.count_in_budget(req.budgetMin, req.budgetMax)
+    else:
+        db = get_apl_db()
+        if RETRIEVAL_MODE == "rpc":
+            rows = _fetch_candidate_rows(db, req, request_id)
+        else:
+            rows = _fetch_feature_rows(db, req, request_id)
+        rows_count = len(rows)
+    return db, rows, rows_count
+
+
+def _retrieve_topk(
+    req: RecommendationRequest,
+    snapshot: Optional[CatalogSnapshot],
+    db: Any,
+    rows: List[Dict[str, Any]],
+    rows_count: int,
+    context_vector: List[float],
+    k: int,
+    request_id: str,
+) -> List[Dict[str, Any]]:
+    with stage("vector_search") as s:
+        if snapshot is not None:
+            # 予算に対応する行範囲だけをベクトルインデックスで探索し上位 k 件を取得
+            rows_topk = snapshot.search(context_vector, req.budgetMin, req.budgetMax, k)
+        elif RETRIEVAL_MODE == "rpc":
+            rows_topk = _rank_candidate_rows(rows, context_vector, k)
+        elif RETRIEVAL_MODE == "pgvector":
+            rows_topk = _search_vector_rows(db, req, context_vector, k, request_id)
+        else:
+            rows_topk = _rank_rows_by_vector(db, rows, context_vector, k, request_id)
+        s.rows = len(rows_topk)
+
+    if not rows_topk:
+        logger.error(
+            "recommendation no items with embeddings request_id=%s rows_count=%s",
+            request_id,
+            rows_count,
         )
         raise HTTPException(status_code=500, detail="no items with embeddings")
+    return rows_topk
 
-    rows_with_vector.sort(key=lambda x: x["vector_score"], reverse=True)
-    rows_topk = rows_with_vector[: resolved.k]
 
-    scored = score_candidates(rows_topk, resolved)
+def _build_response(
+    request_id: str,
+    resolved: ResolvedParams,
+    context_text: str,
+    context_vector: List[float],
+    rows_topk: List[Dict[str, Any]],
+) -> RecommendationResponse:
+    embedding_version = 1
+
+    # item_id -> 商品詳細のマップ（最終レスポンス用）
+    item_details = _build_item_details(rows_topk)
+
+    # スコアは列（配列）のまま計算し、dict にするのはレスポンス / MMR に渡す行だけ
+    with stage("score") as s:
+        scored = score_columns(rows_topk, resolved)
+        s.rows = len(scored)
     if resolved.algorithm == "vector_only":
-        ranked = sorted(scored, key=lambda x: x["vector_score"], reverse=True)
-        final = ranked[:resolved.n_out]
+        final = scored.materialize(scored.order_by("vector_score")[: resolved.n_out])
     elif resolved.algorithm == "vector_ranked":
-        ranked = sorted(scored, key=lambda x: x["score"], reverse=True)
-        final = ranked[:resolved.n_out]
+        final = scored.materialize(scored.order_by("score")[: resolved.n_out])
     else:
-        ranked = sorted(scored, key=lambda x: x["score"], reverse=True)
-        mmr_input = ranked[: resolved.n_in]
-        final = mmr_select(mmr_input, resolved.n_out, resolved.mmr_lambda)
+        mmr_rows = scored.order_by("score")[: resolved.n_in]
+        mmr_input = scored.materialize(mmr_rows)
+        vectors = None
+        if resolved.mmr_similarity == "embedding":
+            vectors = _mmr_vectors(scored, mmr_rows)
+            if vectors is None:
+                # pgvector モードなど embedding を持たない場合は tag_ids の Jaccard で代替
+                logger.warning(
+                    "recommendation mmr embeddings unavailable, fallback to jaccard request_id=%s",
+                    request_id,
+                )
+        with stage("mmr") as s:
+            final = mmr_select(mmr_input, resolved.n_out, resolved.mmr_lambda, vectors=vectors)
+            s.rows = len(mmr_input)
 
     items = []
     for idx, item in enumerate(final):
@@ -268,3 +466,219 @@ def recommend(req: RecommendationRequest) -> RecommendationResponse:
         items=items,
         generatedAt=datetime.now(timezone.utc).isoformat(),
     )
+
+
+def shape_response(
+    response: RecommendationResponse,
+    vector_format: ContextVectorFormat = "full",
+) -> RecommendationResponse:
+    """context.contextVector の形式を変えたコピーを返す（キャッシュ上の元オブジェクトは変更しない）。"""
+    if vector_format == "full":
+        return response
+    context = dict(response.context)
+    vector = context.pop("contextVector", None)
+    if vector_format == "base64" and vector is not None:
+        # 1536 次元で約 8KB（JSON の float リストの 1/4 程度）
+        context["contextVectorB64"] = base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode("ascii")
+        context["contextVectorEncoding"] = "float32-le"
+    return response.model_copy(update={"context": context})
+
+
+def recommend(req: RecommendationRequest) -> RecommendationResponse:
+    request_id = str(uuid.uuid4())
+
+    logger.info(
+        "recommendation start request_id=%s mode=%s",
+        request_id,
+        req.mode,
+    )
+
+    resolved = _resolve_params(req, request_id)
+
+    context_text = _build_context_text(req)
+    try:
+        with stage("embed"):
+            context_vector = embed_text(context_text)
+    except Exception as e:
+        raise _embedding_failed(context_text, request_id, e)
+
+    snapshot = _current_snapshot()
+    db, rows, rows_count = _load_candidates(req, snapshot, request_id)
+    rows_topk = _retrieve_topk(req, snapshot, db, rows, rows_count, context_vector, resolved.k, request_id)
+    return _build_response(request_id, resolved, context_text, context_vector, rows_topk)
+
+
+async def recommend_async(
+    req: RecommendationRequest,
+    snapshot: Optional[CatalogSnapshot] = None,
+) -> RecommendationResponse:
+    """recommend の非同期版。embedding 呼び出しと候補取得を並行に実行する。
+
+    snapshot を省略した場合は現在のカタログを使う。
+    """
+    request_id = str(uuid.uuid4())
+
+    logger.info(
+        "recommendation start request_id=%s mode=%s",
+        request_id,
+        req.mode,
+    )
+
+    resolved = _resolve_params(req, request_id)
+    context_text = _build_context_text(req)
+
+    async def embed() -> List[float]:
+        try:
+            with stage("embed"):
+                return await embed_text_async(context_text)
+        except Exception as e:
+            raise _embedding_failed(context_text, request_id, e)
+
+    if snapshot is None:
+        snapshot = _current_snapshot()
+    if snapshot is not None:
+        context_vector = await embed()
+        db, rows, rows_count = _load_candidates(req, snapshot, request_id)
+        rows_topk = _retrieve_topk(req, snapshot, db, rows, rows_count, context_vector, resolved.k, request_id)
+    else:
+        # カタログ未ロード時は DB 取得（同期クライアント）をスレッドに逃がし、embedding と並行させる
+        context_vector, (db, rows, rows_count) = await asyncio.gather(
+            embed(),
+            asyncio.to_thread(_load_candidates, req, None, request_id),
+        )
+        rows_topk = await asyncio.to_thread(
+            _retrieve_topk, req, None, db, rows, rows_count, context_vector, resolved.k, request_id
+        )
+    return _build_response(request_id, resolved, context_text, context_vector, rows_topk)
+
+
+async def recommend_cached_async(req: RecommendationRequest) -> Tuple[RecommendationResponse, str]:
+    """レスポンスキャッシュ付きの recommend_async。2 つ目の戻り値は HIT / MISS / BYPASS。
+
+    キーは正規化したリクエスト + カタログのバージョン。ヒット時も requestId は新しく払い出す。
+    """
+    if not _response_cache.enabled:
+        return await recommend_async(req), "BYPASS"
+
+    # 計算に使うスナップショットとキャッシュのバージョンを揃える
+    snapshot = _current_snapshot()
+    version = snapshot.version if snapshot is not None else None
+    key = request_key(req, DEFAULT_EMBEDDING_MODEL)
+    cached = _response_cache.get(key, version)
+    if cached is not None:
+        request_id = str(uuid.uuid4())
+        logger.info(
+            "recommendation cache hit request_id=%s mode=%s origin_request_id=%s",
+            request_id,
+            req.mode,
+            cached.requestId,
+        )
+        return cached.model_copy(update={"requestId": request_id}), "HIT"
+
+    response = await recommend_async(req, snapshot)
+    _response_cache.put(key, version, response)
+    return response, "MISS"
+
+
+# (contextText, budgetMin, budgetMax, k)。k は上位 k 件を共有できない検索方式のときだけ入れる
+_GroupKey = Tuple[str, Optional[int], Optional[int], Optional[int]]
+
+
+def _topk_prefix_is_exact(snapshot: Optional[CatalogSnapshot]) -> bool:
+    """k を大きくした検索結果の先頭 k 件が、k 件で検索した結果と必ず一致するか。
+
+    全件を元の行列で採点する場合だけ一致する（スコア降順・同点は行順）。
+    IVF は k に応じて走査するクラスタ数が、量子化は再スコアする候補数が変わり、
+    pgvector は DB 側のインデックス次第のため一致を保証できない。
+    """
+    if snapshot is not None:
+        return snapshot.index.kind == "exact" and getattr(snapshot.index, "quantized", None) is None
+    return RETRIEVAL_MODE != "pgvector"
+
+
+async def recommend_batch_async(batch: RecommendationBatchRequest) -> RecommendationBatchResponse:
+    """複数の推薦リクエストをまとめて処理する。
+
+    embedding は同じ contextText ごとに 1 回、候補取得とベクトル検索は同じ
+    （contextText, 予算）ごとに最大の k で 1 回だけ行い、各リクエストは上位 k 件を切り出して使う。
+    近似検索（IVF・量子化・pgvector）では k によって結果が変わりうるため、k ごとに別々に検索し
+    単体の /recommendations と同じ結果を返す。
+    """
+    entries = []
+    for req in batch.requests:
+        request_id = str(uuid.uuid4())
+        logger.info(
+            "recommendation start request_id=%s mode=%s batch_size=%s",
+            request_id,
+            req.mode,
+            len(batch.requests),
+        )
+        resolved = _resolve_params(req, request_id)
+        entries.append((req, request_id, resolved, _build_context_text(req)))
+
+    snapshot = _current_snapshot()
+    share_topk = _topk_prefix_is_exact(snapshot)
+
+    def group_key(req: RecommendationRequest, resolved: ResolvedParams, context_text: str) -> _GroupKey:
+        return (context_text, req.budgetMin, req.budgetMax, None if share_topk else resolved.k)
+
+    # contextText -> 代表 request_id / 検索キー -> 代表エントリと最大 k
+    texts: Dict[str, str] = {}
+    groups: Dict[_GroupKey, Dict[str, Any]] = {}
+    for req, request_id, resolved, context_text in entries:
+        texts.setdefault(context_text, request_id)
+        group = groups.setdefault(
+            group_key(req, resolved, context_text),
+            {"req": req, "request_id": request_id, "k": 0},
+        )
+        group["k"] = max(group["k"], resolved.k)
+
+    async def embed(context_text: str, request_id: str) -> List[float]:
+        try:
+            with stage("embed"):
+                return await embed_text_async(context_text)
+        except Exception as e:
+            raise _embedding_failed(context_text, request_id, e)
+
+    async def load(group: Dict[str, Any]) -> Tuple[Any, List[Dict[str, Any]], int]:
+        if snapshot is not None:
+            return _load_candidates(group["req"], snapshot, group["request_id"])
+        return await asyncio.to_thread(_load_candidates, group["req"], None, group["request_id"])
+
+    # embedding と候補取得は互いに独立なので、すべて並行に実行する
+    vectors, loaded = await asyncio.gather(
+        asyncio.gather(*(embed(text, request_id) for text, request_id in texts.items())),
+        asyncio.gather(*(load(group) for group in groups.values())),
+    )
+    context_vectors = dict(zip(texts.keys(), vectors))
+
+    async def retrieve(
+        key: _GroupKey,
+        candidates: Tuple[Any, List[Dict[str, Any]], int],
+    ) -> List[Dict[str, Any]]:
+        group = groups[key]
+        db, rows, rows_count = candidates
+        args = (
+            group["req"],
+            snapshot,
+            db,
+            rows,
+            rows_count,
+            context_vectors[key[0]],
+            group["k"],
+            group["request_id"],
+        )
+        if snapshot is not None:
+            return _retrieve_topk(*args)
+        return await asyncio.to_thread(_retrieve_topk, *args)
+
+    topk = await asyncio.gather(*(retrieve(key, c) for key, c in zip(groups.keys(), loaded)))
+    topk_by_group = dict(zip(groups.keys(), topk))
+
+    results = []
+    for req, request_id, resolved, context_text in entries:
+        rows_topk = topk_by_group[group_key(req, resolved, context_text)][: resolved.k]
+        results.append(
+            _build_response(request_id, resolved, context_text, context_vectors[context_text], rows_topk)
+        )
+    return RecommendationBatchResponse(results=results)
@@ -3,7 +3,16 @@ from typing import List, Literal, Optional, Dict, Any
 from pydantic import BaseModel, Field
 
 Mode = Literal["popular", "balanced", "diverse"]
-AlgorithmOverride = Literal["vector_only", "vector_ranked", "vector_ranked_mmr"]
+AlgorithmOverride = Literal[
+    "vector_only", "vector_ranked", "vector_ranked_mmr", "vector_ranked_mmr_embedding"
+]
+
+# レスポンスの context.contextVector の形式
+# full: float のリスト / omit: 省略 / base64: float32（リトルエンディアン）の base64 を contextVectorB64 に格納
+ContextVectorFormat = Literal["full", "omit", "base64"]
+
+# /recommendations:batch の 1 リクエストあたりの最大件数
+BATCH_MAX_REQUESTS = 12
 
 
 class RecommendationRequest(BaseModel):
@@ -49,3 +58,13 @@ class RecommendationResponse(BaseModel):
     resolved: ResolvedAlgorithm
     items: List[RecommendedItem]
     generatedAt: str
+
+
+class RecommendationBatchRequest(BaseModel):
+    """同じ（または複数の）コンテキストに対する複数 mode / override をまとめて処理する。"""
+
+    requests: List[RecommendationRequest] = Field(..., min_length=1, max_length=BATCH_MAX_REQUESTS)
+
+
+class RecommendationBatchResponse(BaseModel):
+    results: List[RecommendationResponse]
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from reco.api.handlers import RETRIEVAL_MODE, recommend_async
+from reco.api.schemas import RecommendationRequest
+from reco.infra.catalog import CatalogRefresher, get_catalog
+from reco.infra.metrics import metrics_suppressed
+from reco.infra.supabase_client import check_health
+
+logger = logging.getLogger(__name__)
+
+WARMUP_CATALOG_TIMEOUT_SEC = float(os.getenv("RECO_WARMUP_CATALOG_TIMEOUT_SEC", "180"))
+# よく使われるリクエストの JSON 配列（RecommendationRequest 形式）。未設定時は DEFAULT_WARMUP_REQUESTS
+WARMUP_REQUESTS_PATH = os.getenv("RECO_WARMUP_REQUESTS_PATH", "")
+# 0 で embedding キャッシュのプライミングを行わない
+WARMUP_MAX_REQUESTS = int(os.getenv("RECO_WARMUP_MAX_REQUESTS", "20"))
+
+DEFAULT_WARMUP_REQUESTS: List[Dict[str, Any]] = [
+    {"mode": "balanced", "eventName": "誕生日"},
+    {"mode": "balanced", "eventName": "父の日", "recipientDescription": "父"},
+    {"mode": "balanced", "eventName": "母の日", "recipientDescription": "母"},
+    {"mode": "popular", "eventName": "誕生日", "recipientDescription": "友人"},
+    {"mode": "diverse", "eventName": "お礼", "recipientDescription": "上司"},
+    {"mode": "balanced", "eventName": "クリスマス"},
+]
+
+
+class WarmupState:
+    """起動時ウォームアップの進捗（/ready で返す）。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.status = "pending"
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._steps: Dict[str, Dict[str, Any]] = {}
+
+    def begin(self) -> None:
+        with self._lock:
+            self.status = "warming"
+            self.started_at = datetime.now(timezone.utc)
+
+    def record(self, name: str, started: float, ok: bool, **extra: Any) -> None:
+        with self._lock:
+            self._steps[name] = {"ok": ok, "ms": round((time.perf_counter() - started) * 1000.0, 3), **extra}
+
+    def finish(self) -> None:
+        with self._lock:
+            self.status = "done"
+            self.finished_at = datetime.now(timezone.utc)
+
+    @property
+    def done(self) -> bool:
+        return self.status == "done"
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "status": self.status,
+                "startedAt": self.started_at.isoformat() if self.started_at else None,
+                "finishedAt": self.finished_at.isoformat() if self.finished_at else None,
+                "steps": {name: dict(step) for name, step in self._steps.items()},
+            }
+
+
+_state = WarmupState()
+
+
+def get_warmup_state() -> WarmupState:
+    return _state
+
+
+def load_warmup_requests(path: str = WARMUP_REQUESTS_PATH) -> List[RecommendationRequest]:
+    bodies: List[Dict[str, Any]] = DEFAULT_WARMUP_REQUESTS
+    if path:
+        try:
+            with open(path, encoding="utf-8") as f:
+                bodies = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("warmup requests load failed path=%s error=%s", path, e)
+    requests: List[RecommendationRequest] = []
+    for body in bodies[:WARMUP_MAX_REQUESTS]:
+        try:
+            requests.append(RecommendationRequest.model_validate(body))
+        except ValueError as e:
+            logger.warning("warmup request skipped body=%s error=%s", body, e)
+    return requests
+
+
+async def run_warmup(refresher: Optional[CatalogRefresher], state: WarmupState = _state) -> None:
+    """Supabase への接続確立・カタログ読込・よく使われるリクエストの事前実行を順に行う。
+
+    各ステップの失敗は記録して次へ進む（カタログ以外は ready 判定に影響しない）。
+    """
+    state.begin()
+
+    started = time.perf_counter()
+    health = await asyncio.to_thread(check_health)
+    state.record("supabase", started, health["ok"], error=health.get("error"))
+
+    if refresher is not None:
+        started = time.perf_counter()
+        loaded = await asyncio.to_thread(refresher.wait_loaded, WARMUP_CATALOG_TIMEOUT_SEC)
+        snapshot = get_catalog()
+        state.record(
+            "catalog",
+            started,
+            loaded,
+            version=snapshot.version if snapshot else None,
+            items=len(snapshot) if snapshot else 0,
+            loadSec=refresher.initial_load_sec,
+        )
+
+    # 推薦パイプライン全体を一度通し、embedding キャッシュ（SQLite 設定時は永続化）を埋める
+    # コールドスタートの所要時間は本番のステージ別ヒストグラムに混ぜない
+    started = time.perf_counter()
+    primed = failed = 0
+    for req in load_warmup_requests():
+        try:
+            with metrics_suppressed():
+                await recommend_async(req)
+            primed += 1
+        except Exception as e:
+            failed += 1
+            logger.warning("warmup request failed mode=%s error=%s", req.mode, e)
+    state.record("embeddings", started, failed == 0, primed=primed, failed=failed)
+
+    state.finish()
+    logger.info("warmup finished retrieval_mode=%s %s", RETRIEVAL_MODE, state.snapshot()["steps"])
+
+
+def is_ready(refresher: Optional[CatalogRefresher], state: WarmupState = _state) -> bool:
+    # catalog モードはカタログ読込済みであることが前提（ウォームアップ後に読込が完了した場合も ready）
+    if not state.done:
+        return False
+    return refresher is None or get_catalog() is not None
@@ -0,0 +1,306 @@
+import logging
+from typing import Any, Callable, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ANN_CHOICES = {"exact", "ivf"}
+QUANTIZATION_CHOICES = {"none", "float16", "int8"}
+# 量子化表現から float32 に戻して内積を取る単位（変換先のバッファを CPU キャッシュに収める）
+QUANTIZED_SCAN_CHUNK = 128
+
+
+class VectorIndex(Protocol):
+    kind: str
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        lo: int = 0,
+        hi: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]: ...
+
+
+def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    if k <= 0 or scores.size == 0:
+        return rows[:0], scores[:0]
+    if k < scores.size:
+        part = np.argpartition(-scores, k - 1)[:k]
+        # 同点は行番号の昇順（= 入力順）で安定させる
+        order = part[np.lexsort((rows[part], -scores[part]))]
+    else:
+        order = np.lexsort((rows, -scores))
+    return rows[order], scores[order]
+
+
+class QuantizedMatrix:
+    """走査用に量子化した embedding 行列（float16、または行ごとのスケール付き int8）。
+
+    int8 は各行を max(|x|) / 127 で割って丸める（復元値 = code * scale）。
+    """
+
+    def __init__(self, codes: np.ndarray, scales: Optional[np.ndarray] = None) -> None:
+        self.codes = codes
+        self.scales = scales
+
+    @property
+    def kind(self) -> str:
+        return "float16" if self.scales is None else "int8"
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    @classmethod
+    def quantize(cls, matrix: np.ndarray, kind: str) -> "QuantizedMatrix":
+        if kind == "float16":
+            return cls(matrix.astype(np.float16))
+        if kind != "int8":
+            raise ValueError(f"invalid quantization: {kind}")
+        # 1M 行でも全体の一時配列を作らないよう、チャンクごとに量子化する
+        codes = np.empty(matrix.shape, dtype=np.int8)
+        scales = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], QUANTIZED_SCAN_CHUNK):
+            block = np.asarray(matrix[start : start + QUANTIZED_SCAN_CHUNK], dtype=np.float32)
+            scale = np.abs(block).max(axis=1) / 127.0
+            scale[scale == 0.0] = 1.0
+            codes[start : start + block.shape[0]] = np.clip(np.rint(block / scale[:, None]), -127, 127)
+            scales[start : start + block.shape[0]] = scale
+        return cls(codes, scales)
+
+    def _scan(self, count: int, block: Callable[[int, int], Any], query: np.ndarray) -> np.ndarray:
+        # チャンクごとに 1 つのバッファへ float32 で展開して内積を取る（行列全体の float32 コピーを作らない）
+        query = np.asarray(query, dtype=np.float32)
+        out = np.empty(count, dtype=np.float32)
+        buf = np.empty((min(count, QUANTIZED_SCAN_CHUNK), self.codes.shape[1]), dtype=np.float32)
+        for start in range(0, count, QUANTIZED_SCAN_CHUNK):
+            end = min(count, start + QUANTIZED_SCAN_CHUNK)
+            chunk = buf[: end - start]
+            np.copyto(chunk, block(start, end), casting="unsafe")
+            np.dot(chunk, query, out=out[start:end])
+        return out
+
+    def scores(self, lo: int, hi: int, query: np.ndarray) -> np.ndarray:
+        """行範囲 [lo, hi) と query の近似内積。"""
+        out = self._scan(max(0, hi - lo), lambda s, e: self.codes[lo + s : lo + e], query)
+        if self.scales is not None:
+            out *= self.scales[lo:hi]
+        return out
+
+    def scores_at(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        out = self._scan(rows.size, lambda s, e: self.codes[rows[s:e]], query)
+        if self.scales is not None:
+            out *= self.scales[rows]
+        return out
+
+
+def _rescored_top_k(
+    matrix: np.ndarray,
+    rows: np.ndarray,
+    approx: np.ndarray,
+    query: np.ndarray,
+    k: int,
+    rescore: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """近似スコアで k * rescore 件に絞り、full precision の行列で再計算して上位 k 件を返す。"""
+    candidates, _ = _top_k(rows, approx, k * max(1, rescore))
+    # 行番号順に読むことで mmap された行列でもアクセスが連続する
+    candidates = np.sort(candidates)
+    return _top_k(candidates, matrix[candidates] @ query, k)
+
+
+class ExactIndex:
+    """正規化済み行列に対する全件内積（brute force）。
+
+    quantized を渡すと量子化表現で全件を走査し、上位候補だけ元の行列で再スコアする。
+    """
+
+    kind = "exact"
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        quantized: Optional[QuantizedMatrix] = None,
+        rescore: int = 4,
+    ) -> None:
+        self.matrix = matrix
+        self.quantized = quantized
+        self.rescore = rescore
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        lo: int = 0,
+        hi: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """行範囲 [lo, hi) のうち query との内積が大きい上位 k 行を返す。"""
+        hi = self.matrix.shape[0] if hi is None else hi
+        rows = np.arange(lo, max(lo, hi))
+        if self.quantized is not None:
+            return _rescored_top_k(self.matrix, rows, self.quantized.scores(lo, hi, query), query, k, self.rescore)
+        # スライスはコピーを伴わないため、範囲外の行には一切触れない
+        scores = self.matrix[lo:hi] @ query
+        return _top_k(rows, scores, k)
+
+
+class IvfIndex:
+    """球面 k-means による IVF（inverted file）インデックス。
+
+    クエリに近い centroid のリストを nprobe 個だけ走査するため、走査行数は
+    おおよそ n * nprobe / nlist になる。絞り込み後に k 件に満たない場合は
+    近い順にリストを追加で走査する。
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        centroids: np.ndarray,
+        assignments: np.ndarray,
+        nprobe: int,
+        quantized: Optional[QuantizedMatrix] = None,
+        rescore: int = 4,
+    ) -> None:
+        self.matrix = matrix
+        self.quantized = quantized
+        self.rescore = rescore
+        self.centroids = centroids
+        self.nprobe = max(1, min(nprobe, centroids.shape[0]))
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(centroids.shape[0] + 1))
+        self.lists: List[np.ndarray] = [
+            order[bounds[c] : bounds[c + 1]] for c in range(centroids.shape[0])
+        ]
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        nlist: int = 0,
+        nprobe: int = 8,
+        n_iter: int = 10,
+        sample_size: int = 0,
+        seed: int = 0,
+        centroids: Optional[np.ndarray] = None,
+        quantized: Optional[QuantizedMatrix] = None,
+        rescore: int = 4,
+    ) -> "IvfIndex":
+        n = matrix.shape[0]
+        if centroids is None or centroids.shape[1] != matrix.shape[1]:
+            if nlist <= 0:
+                nlist = int(np.sqrt(n)) or 1
+            centroids = train_centroids(matrix, min(nlist, n), n_iter, sample_size, seed)
+        assignments = assign_centroids(matrix, centroids)
+        return cls(matrix, centroids, assignments, nprobe, quantized, rescore)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        lo: int = 0,
+        hi: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        n = self.matrix.shape[0]
+        hi = n if hi is None else hi
+        if n == 0 or hi <= lo:
+            return _top_k(np.arange(0), np.zeros(0, dtype=np.float32), k)
+        restricted = lo > 0 or hi < n
+
+        probe_order = np.argsort(-(self.centroids @ query))
+        gathered: List[np.ndarray] = []
+        found = 0
+        probed = 0
+        for c in probe_order:
+            rows = self.lists[c]
+            if restricted:
+                # 各リストは行番号の昇順なので、範囲 [lo, hi) は連続した部分列になる
+                rows = rows[np.searchsorted(rows, lo) : np.searchsorted(rows, hi)]
+            gathered.append(rows)
+            found += rows.size
+            probed += 1
+            if probed >= self.nprobe and found >= k:
+                break
+
+        rows = np.sort(np.concatenate(gathered)) if gathered else np.arange(0)
+        if self.quantized is not None:
+            return _rescored_top_k(self.matrix, rows, self.quantized.scores_at(rows, query), query, k, self.rescore)
+        scores = self.matrix[rows] @ query
+        return _top_k(rows, scores, k)
+
+
+def train_centroids(
+    matrix: np.ndarray,
+    nlist: int,
+    n_iter: int = 10,
+    sample_size: int = 0,
+    seed: int = 0,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n = matrix.shape[0]
+    if sample_size <= 0:
+        sample_size = max(nlist * 64, 1)
+    sample = matrix[rng.choice(n, size=min(n, sample_size), replace=False)]
+    centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = assign_centroids(sample, centroids)
+        for c in range(nlist):
+            members = sample[labels == c]
+            if members.shape[0] == 0:
+                # 空クラスタはランダムな点で再初期化
+                centroids[c] = sample[rng.integers(sample.shape[0])]
+                continue
+            centroid = members.sum(axis=0)
+            norm = float(np.linalg.norm(centroid))
+            if norm > 0.0:
+                centroids[c] = centroid / norm
+    return centroids.astype(np.float32, copy=False)
+
+
+def assign_centroids(matrix: np.ndarray, centroids: np.ndarray, chunk: int = 16384) -> np.ndarray:
+    labels = np.empty(matrix.shape[0], dtype=np.int64)
+    for start in range(0, matrix.shape[0], chunk):
+        block = matrix[start : start + chunk]
+        labels[start : start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def build_index(
+    matrix: np.ndarray,
+    kind: str = "exact",
+    nlist: int = 0,
+    nprobe: int = 8,
+    previous: Optional[VectorIndex] = None,
+    quantization: str = "none",
+    rescore: int = 4,
+) -> VectorIndex:
+    if kind not in ANN_CHOICES:
+        raise ValueError(f"invalid ann index: {kind}")
+    if quantization not in QUANTIZATION_CHOICES:
+        raise ValueError(f"invalid quantization: {quantization}")
+    quantized = None
+    if quantization == "float16":
+        # NumPy には float16 の高速な内積・変換が無く、float32 全件内積より遅い（メモリ削減のみ）
+        logger.warning("float16 quantization scans slower than float32; prefer int8")
+    if quantization != "none" and matrix.shape[0] > 0:
+        quantized = QuantizedMatrix.quantize(matrix, quantization)
+    if kind == "ivf" and matrix.shape[0] > 0:
+        # 差分更新時は学習済み centroid を再利用し、割り当てのみやり直す
+        centroids = previous.centroids if isinstance(previous, IvfIndex) else None
+        return IvfIndex.build(
+            matrix, nlist=nlist, nprobe=nprobe, centroids=centroids, quantized=quantized, rescore=rescore
+        )
+    return ExactIndex(matrix, quantized, rescore)
+
+
+def recall_at_k(exact_rows: Sequence[int], approx_rows: Sequence[int]) -> float:
+    if len(exact_rows) == 0:
+        return 1.0
+    return len(set(exact_rows) & set(approx_rows)) / len(exact_rows)
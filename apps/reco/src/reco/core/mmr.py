@@ -1,48 +1,86 @@
-from typing import Any, Dict, List, Sequence, Set
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 
-def _jaccard(a: Sequence[int], b: Sequence[int]) -> float:
-    set_a: Set[int] = set(a)
-    set_b: Set[int] = set(b)
-    if not set_a and not set_b:
-        return 0.0
-    if not set_a or not set_b:
-        return 0.0
-    inter = len(set_a & set_b)
-    union = len(set_a | set_b)
-    return inter / union if union else 0.0
+
+def _tag_incidence(candidates: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """候補 × タグの 0/1 行列と、各候補のタグ数（重複除去後）を返す。"""
+    index: Dict[Any, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    for i, cand in enumerate(candidates):
+        for tag in set(cand.get("tag_ids") or []):
+            rows.append(i)
+            cols.append(index.setdefault(tag, len(index)))
+    incidence = np.zeros((len(candidates), len(index)), dtype=np.float64)
+    incidence[rows, cols] = 1.0
+    return incidence, incidence.sum(axis=1)
+
+
+def _jaccard_to(incidence: np.ndarray, sizes: np.ndarray, j: int) -> np.ndarray:
+    """全候補と候補 j の Jaccard 係数。どちらかのタグが空なら 0。"""
+    inter = incidence @ incidence[j]
+    sim = np.zeros(incidence.shape[0], dtype=np.float64)
+    if sizes[j] > 0:
+        union = sizes + sizes[j] - inter
+        np.divide(inter, union, out=sim, where=sizes > 0)
+    return sim
+
+
+def _cosine_matrix(vectors: np.ndarray) -> np.ndarray:
+    """候補間の cosine 類似度行列（n × n）。ゼロベクトルとの類似度は 0。"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+    return (normalized @ normalized.T).astype(np.float64)
 
 
 def mmr_select(
     candidates: List[Dict[str, Any]],
     top_n: int,
     lam: float,
+    vectors: Optional[np.ndarray] = None,
 ) -> List[Dict[str, Any]]:
+    """MMR で top_n 件を選ぶ。
+
+    vectors（candidates と同じ順の embedding 行列）を渡すと多様性を embedding の
+    cosine 類似度で測り、省略時は tag_ids の Jaccard 係数で測る。
+    """
     if not candidates:
         return []
 
-    ranked = sorted(candidates, key=lambda x: x["score"], reverse=True)
+    order = sorted(range(len(candidates)), key=lambda i: candidates[i]["score"], reverse=True)
+    ranked = [candidates[i] for i in order]
     if top_n >= len(ranked):
         return ranked
 
-    selected: List[Dict[str, Any]] = []
-    remaining = ranked[:]
-
-    selected.append(remaining.pop(0))
-
-    while len(selected) < top_n and remaining:
-        best_idx = 0
-        best_score = float("-inf")
-        for idx, cand in enumerate(remaining):
-            max_sim = 0.0
-            for s in selected:
-                sim = _jaccard(cand.get("tag_ids", []), s.get("tag_ids", []))
-                if sim > max_sim:
-                    max_sim = sim
-            mmr = lam * cand["score"] - (1.0 - lam) * max_sim
-            if mmr > best_score:
-                best_score = mmr
-                best_idx = idx
-        selected.append(remaining.pop(best_idx))
-
-    return selected
+    if vectors is not None:
+        # 類似度は 1 回の行列積でまとめて求め、各ステップでは行を参照するだけ
+        sim_matrix = _cosine_matrix(np.asarray(vectors)[order])
+
+        def similarity_to(j: int) -> np.ndarray:
+            return sim_matrix[j]
+    else:
+        incidence, sizes = _tag_incidence(ranked)
+
+        def similarity_to(j: int) -> np.ndarray:
+            return _jaccard_to(incidence, sizes, j)
+
+    scores = np.array([c["score"] for c in ranked], dtype=np.float64)
+    chosen = np.zeros(len(ranked), dtype=bool)
+
+    # 選択済みとの最大類似度は、選ぶたびに新しい 1 件との類似度で更新する
+    selected = [0]
+    chosen[0] = True
+    max_sim = np.maximum(0.0, similarity_to(0))
+
+    while len(selected) < top_n:
+        remaining = np.flatnonzero(~chosen)
+        mmr = lam * scores[remaining] - (1.0 - lam) * max_sim[remaining]
+        # 同点は ranked 順で先頭を採用（argmax は最初の最大値を返す）
+        best = int(remaining[np.argmax(np.where(np.isnan(mmr), -np.inf, mmr))])
+        selected.append(best)
+        chosen[best] = True
+        max_sim = np.maximum(max_sim, similarity_to(best))
+
+    return [ranked[i] for i in selected]
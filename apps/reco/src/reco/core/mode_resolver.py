@@ -6,8 +6,12 @@ ALGORITHM_CHOICES = {
     "vector_only",
     "vector_ranked",
     "vector_ranked_mmr",
+    "vector_ranked_mmr_embedding",
 }
 
+# MMR の多様性を embedding の cosine 類似度で測るアルゴリズム（ADMIN 検証用）
+EMBEDDING_MMR_ALGORITHMS = {"vector_ranked_mmr_embedding"}
+
 MODE_PARAMS = {
     "balanced": {
         "algorithm": "vector_ranked_mmr",
@@ -56,4 +60,5 @@ def resolve_mode(mode: str, algorithm_override: Optional[str]) -> ResolvedParams
         w_rev=base["w_rev"],
         mmr_lambda=base["mmr_lambda"],
         resolved_by=resolved_by,
+        mmr_similarity="embedding" if algorithm in EMBEDDING_MMR_ALGORITHMS else "jaccard",
     )
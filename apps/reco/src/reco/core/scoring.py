@@ -1,5 +1,8 @@
-from typing import Any, Dict, List, Optional
 import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 
 def _normalize_0_1(values: List[float]) -> List[float]:
@@ -21,74 +24,132 @@ def _safe_float(value: Any) -> Optional[float]:
         return None
 
 
-def score_candidates(rows: List[Dict[str, Any]], params: Any) -> List[Dict[str, Any]]:
-    vec_raw = []
-    pop_raw = []
-    rev_raw = []
-
-    filtered_rows = [
-        r for r in rows
-        if _safe_float(r.get("vector_score")) is not None
-    ]
-    if not filtered_rows:
-        return []
+def _column(rows: Sequence[Dict[str, Any]], key: str) -> Tuple[np.ndarray, np.ndarray]:
+    """rows[key] を float64 配列にする。戻り値は (値, 欠損マスク)。欠損は NaN で埋める。"""
+    raw = [r.get(key) for r in rows]
+    try:
+        values = np.array(raw, dtype=np.float64)
+    except (TypeError, ValueError):
+        values = None
+    if values is None or values.ndim != 1:
+        # 数値に変換できない値が混ざる場合のみ 1 件ずつ変換する
+        parsed = [_safe_float(v) for v in raw]
+        values = np.array([math.nan if v is None else v for v in parsed], dtype=np.float64)
+        return values, np.fromiter((v is None for v in parsed), dtype=bool, count=len(parsed))
+    missing = np.isnan(values)
+    if missing.any():
+        # None と値としての NaN を区別する
+        missing = np.fromiter((v is None for v in raw), dtype=bool, count=len(raw))
+    return values, missing
+
+
+def _normalize_column(values: np.ndarray) -> np.ndarray:
+    if values.size == 0:
+        return values
+    if np.isnan(values).any():
+        # NaN を含む場合の min / max は Python の比較順に依存するため、従来の実装に任せる
+        return np.array(_normalize_0_1(values.tolist()), dtype=np.float64)
+    v_min = values.min()
+    v_max = values.max()
+    if v_max == v_min:
+        return np.zeros_like(values)
+    return (values - v_min) / (v_max - v_min)
+
+
+def _log1p_exact(values: np.ndarray) -> np.ndarray:
+    # np.log は実装によって math.log と最下位ビットが異なりうるため、
+    # 重複の多い値（レビュー件数）をまとめて math.log で計算する
+    uniq, inverse = np.unique(values, return_inverse=True)
+    logs = np.array([math.log(1.0 + v) for v in uniq.tolist()], dtype=np.float64)
+    return logs[inverse.reshape(-1)]
+
+
+@dataclass(frozen=True)
+class ScoredColumns:
+    """スコアリング結果の列表現。dict への変換は必要な行だけ materialize で行う。"""
 
-    review_counts = [
-        _safe_float(r.get("review_count")) or 0.0
-        for r in filtered_rows
-    ]
-    max_review_count = max(review_counts) if review_counts else 0.0
-
-    for r in filtered_rows:
-        vector_score = _safe_float(r.get("vector_score"))
-        vec_raw.append(vector_score)
-
-        popularity_score = _safe_float(r.get("popularity_score"))
-        if popularity_score is None:
-            rank = _safe_float(r.get("rank"))
-            popularity_score = 1.0 / (rank + 1.0) if rank is not None else 0.0
-        pop_raw.append(popularity_score)
-
-        review_avg = _safe_float(r.get("review_average")) or 0.0
-        review_count = _safe_float(r.get("review_count")) or 0.0
-        quality = max(0.0, min(review_avg / 5.0, 1.0))
-        if max_review_count > 0:
-            confidence = math.log(1.0 + review_count) / math.log(1.0 + max_review_count)
-        else:
-            confidence = 0.0
-        rev_raw.append(quality * confidence)
-
-    vec_norm = _normalize_0_1(vec_raw)
-    pop_norm = _normalize_0_1(pop_raw)
-    rev_norm = _normalize_0_1(rev_raw)
-
-    scored = []
-    for i, r in enumerate(filtered_rows):
-        s_vec = vec_norm[i] if vec_norm else 0.0
-        s_pop = pop_norm[i] if pop_norm else 0.0
-        s_rev = rev_norm[i] if rev_norm else 0.0
-        s_final = (
-            params.w_vec * s_vec
-            + params.w_pop * s_pop
-            + params.w_rev * s_rev
-        )
-
-        scored.append(
-            {
-                "item_id": r.get("item_id"),
-                "score": s_final,
-                "vector_score": s_vec,
-                "rerank_score": s_final,
-                "tag_ids": r.get("tag_ids") or [],
-                "reason": {
-                    "type": "scoring",
-                    "scores": {
-                        "s_vec": s_vec,
-                        "s_pop": s_pop,
-                        "s_rev": s_rev,
+    rows: List[Dict[str, Any]]
+    s_vec: np.ndarray
+    s_pop: np.ndarray
+    s_rev: np.ndarray
+    score: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def order_by(self, column: str) -> np.ndarray:
+        """column の降順（同点は入力順）に並べた行番号を返す。sorted(..., reverse=True) と同じ順序。"""
+        values = self.s_vec if column == "vector_score" else self.score
+        return np.argsort(-values, kind="stable")
+
+    def materialize(self, indices: Sequence[int]) -> List[Dict[str, Any]]:
+        idx = np.asarray(indices, dtype=np.int64)
+        s_vec = self.s_vec[idx].tolist()
+        s_pop = self.s_pop[idx].tolist()
+        s_rev = self.s_rev[idx].tolist()
+        score = self.score[idx].tolist()
+        scored = []
+        for j, i in enumerate(idx.tolist()):
+            r = self.rows[i]
+            scored.append(
+                {
+                    "item_id": r.get("item_id"),
+                    "score": score[j],
+                    "vector_score": s_vec[j],
+                    "rerank_score": score[j],
+                    "tag_ids": r.get("tag_ids") or [],
+                    "reason": {
+                        "type": "scoring",
+                        "scores": {
+                            "s_vec": s_vec[j],
+                            "s_pop": s_pop[j],
+                            "s_rev": s_rev[j],
+                        },
                     },
-                },
-            }
-        )
+                }
+            )
+        return scored
+
+
+def score_columns(rows: List[Dict[str, Any]], params: Any) -> ScoredColumns:
+    vec_raw, vec_missing = _column(rows, "vector_score")
+    if vec_missing.any():
+        keep = np.flatnonzero(~vec_missing)
+        rows = [rows[i] for i in keep.tolist()]
+        vec_raw = vec_raw[keep]
+    if not rows:
+        empty = np.zeros(0, dtype=np.float64)
+        return ScoredColumns([], empty, empty, empty, empty)
+
+    popularity, pop_missing = _column(rows, "popularity_score")
+    if pop_missing.any():
+        rank, rank_missing = _column(rows, "rank")
+        fallback = np.where(rank_missing, 0.0, 1.0 / (rank + 1.0))
+        popularity = np.where(pop_missing, fallback, popularity)
 
-    return scored
+    # `_safe_float(x) or 0.0` と同じく、欠損と 0 は 0.0 として扱う
+    review_avg, avg_missing = _column(rows, "review_average")
+    review_avg = np.where(avg_missing, 0.0, review_avg)
+    review_count, count_missing = _column(rows, "review_count")
+    review_count = np.where(count_missing, 0.0, review_count)
+
+    # max(0.0, min(x, 1.0)) を NaN の扱いまで含めて再現する
+    quality = review_avg / 5.0
+    quality = np.where(1.0 < quality, 1.0, quality)
+    quality = np.where(quality > 0.0, quality, 0.0)
+    max_review_count = float(review_count.max())
+    if max_review_count > 0:
+        confidence = _log1p_exact(review_count) / math.log(1.0 + max_review_count)
+    else:
+        confidence = np.zeros_like(review_count)
+
+    s_vec = _normalize_column(vec_raw)
+    s_pop = _normalize_column(popularity)
+    s_rev = _normalize_column(quality * confidence)
+    score = params.w_vec * s_vec + params.w_pop * s_pop + params.w_rev * s_rev
+    return ScoredColumns(rows, s_vec, s_pop, s_rev, score)
+
+
+def score_candidates(rows: List[Dict[str, Any]], params: Any) -> List[Dict[str, Any]]:
+    scored = score_columns(rows, params)
+    return scored.materialize(range(len(scored)))
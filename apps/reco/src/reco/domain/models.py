@@ -14,6 +14,8 @@ class ResolvedParams:
     n_in: int = 50
     n_out: int = 20
     resolved_by: str = "mode"
+    # MMR の多様性指標: "jaccard"（tag_ids）| "embedding"（embedding の cosine）
+    mmr_similarity: str = "jaccard"
 
     def to_response_params(self) -> Dict[str, float | int]:
         return {
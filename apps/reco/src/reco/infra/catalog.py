@@ -0,0 +1,576 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from postgrest import SyncPostgrestClient
+
+from reco.core.ann import VectorIndex, build_index
+from reco.infra.supabase_client import get_apl_db
+from reco.infra.supabase_repo import (
+    PAGE_SIZE,
+    fetch_item_embeddings_by_ids,
+    fetch_item_embeddings_page,
+    fetch_item_features_by_ids,
+    fetch_item_features_page,
+    fetch_items_updated_page,
+)
+
+logger = logging.getLogger(__name__)
+
+ANN_INDEX = os.getenv("RECO_ANN_INDEX", "exact")
+IVF_NLIST = int(os.getenv("RECO_IVF_NLIST", "0"))
+IVF_NPROBE = int(os.getenv("RECO_IVF_NPROBE", "8"))
+# none / float16 / int8。量子化表現で走査し、上位 k * RESCORE 件を float32 で再スコアする
+# 量子化時の float32 行列はファイルに書き出して mmap で参照し（RECO_EMBEDDING_SPILL_DIR）、
+# 常駐するのは量子化表現と再スコアで触れた行だけにする
+# int8 は float32 と同程度のレイテンシで常駐メモリが約 1/4。float16 は NumPy の変換が遅く float32 より遅い
+EMBEDDING_QUANTIZATION = os.getenv("RECO_EMBEDDING_QUANTIZATION", "none")
+QUANTIZED_RESCORE = int(os.getenv("RECO_QUANTIZED_RESCORE", "4"))
+# 空の場合は OS の一時ディレクトリ。tmpfs（メモリ上）ではなくディスク上のディレクトリを指定する
+EMBEDDING_SPILL_DIR = os.getenv("RECO_EMBEDDING_SPILL_DIR", "")
+CATALOG_REFRESH_SEC = float(os.getenv("RECO_CATALOG_REFRESH_SEC", "300"))
+# updated_at は書き込みトランザクション開始時刻のため、コミットが遅れた行を取りこぼさないよう重ねて取得する
+CATALOG_REFRESH_OVERLAP_SEC = float(os.getenv("RECO_CATALOG_REFRESH_OVERLAP_SEC", "300"))
+
+WATERMARK_TABLES = ("item", "item_features", "item_embedding")
+
+
+def parse_embedding(value: Any) -> Optional[np.ndarray]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            return None
+    if not isinstance(value, list) or not value:
+        return None
+    try:
+        return np.asarray(value, dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_vector(vector: Sequence[float]) -> Optional[np.ndarray]:
+    arr = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    if arr.ndim != 1 or norm == 0.0:
+        return None
+    return arr / norm
+
+
+class EmbeddingMatrix:
+    """item_id 順に並んだ L2 正規化済み float32 行列（行 = アイテム）。
+
+    cosine 類似度は正規化済み行列とクエリの内積 1 回で求まる。
+    """
+
+    def __init__(self, item_ids: List[str], matrix: np.ndarray) -> None:
+        self.item_ids = item_ids
+        self.matrix = matrix
+        self.row_of: Dict[str, int] = {item_id: i for i, item_id in enumerate(item_ids)}
+
+    @classmethod
+    def from_vectors(cls, vectors: Dict[str, np.ndarray]) -> "EmbeddingMatrix":
+        item_ids: List[str] = []
+        rows: List[np.ndarray] = []
+        dim: Optional[int] = None
+        for item_id, vec in vectors.items():
+            normalized = normalize_vector(vec)
+            if normalized is None:
+                continue
+            if dim is None:
+                dim = normalized.shape[0]
+            elif normalized.shape[0] != dim:
+                logger.warning(
+                    "embedding dimension mismatch item_id=%s dim=%s expected=%s",
+                    item_id,
+                    normalized.shape[0],
+                    dim,
+                )
+                continue
+            item_ids.append(item_id)
+            rows.append(normalized)
+        if not rows:
+            return cls([], np.zeros((0, 0), dtype=np.float32))
+        return cls(item_ids, np.vstack(rows).astype(np.float32, copy=False))
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    @property
+    def dim(self) -> int:
+        return int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.matrix.nbytes)
+
+    def reordered(self, order: Sequence[int]) -> "EmbeddingMatrix":
+        if list(order) == list(range(len(self))):
+            return self
+        return EmbeddingMatrix([self.item_ids[i] for i in order], self.matrix[list(order)])
+
+    def updated(self, upserts: Dict[str, np.ndarray], removals: Set[str]) -> "EmbeddingMatrix":
+        """差分（追加・更新・削除）を反映した新しい行列を返す。自身は変更しない。"""
+        if not upserts and not removals:
+            return self
+        keep = [
+            i for i, item_id in enumerate(self.item_ids)
+            if item_id not in removals and item_id not in upserts
+        ]
+        added = EmbeddingMatrix.from_vectors(
+            {k: v for k, v in upserts.items() if k not in removals}
+        )
+        if len(self) > 0 and len(added) > 0 and added.dim != self.dim:
+            logger.warning("embedding dimension changed dim=%s expected=%s", added.dim, self.dim)
+            added = EmbeddingMatrix([], np.zeros((0, 0), dtype=np.float32))
+        item_ids = [self.item_ids[i] for i in keep] + added.item_ids
+        if not item_ids:
+            return EmbeddingMatrix([], np.zeros((0, 0), dtype=np.float32))
+        parts = []
+        if keep:
+            parts.append(self.matrix[keep])
+        if len(added) > 0:
+            parts.append(added.matrix)
+        return EmbeddingMatrix(item_ids, np.vstack(parts))
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def _max_timestamp(current: Optional[datetime], value: Any) -> Optional[datetime]:
+    ts = _parse_timestamp(value)
+    if ts is None:
+        return current
+    return ts if current is None or ts > current else current
+
+
+def _fetch_all(fetch_page: Callable[[int], List[Dict[str, Any]]]) -> Iterable[Dict[str, Any]]:
+    offset = 0
+    while True:
+        page = fetch_page(offset)
+        yield from page
+        if len(page) < PAGE_SIZE:
+            return
+        offset += PAGE_SIZE
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """推薦に使うアイテムカタログのスナップショット（読み取り専用）。
+
+    更新時は新しいスナップショットを組み立ててから参照を差し替えるため、
+    リクエストは途中まで更新されたデータを見ることがない。
+    """
+
+    version: int
+    model: str
+    # item_id -> item_features 行（item: {...} を含む PostgREST と同じ形）。共有カタログでは mmap 上の MappedFeatures
+    features: Mapping[str, Dict[str, Any]]
+    # embedding 行列は price_yen 昇順（null は末尾）に並べ、予算条件を連続した行範囲に対応させる
+    embeddings: EmbeddingMatrix
+    index: VectorIndex
+    # embeddings の先頭 len(row_prices) 行の price_yen（昇順）
+    row_prices: np.ndarray
+    # features 全体の price_yen（null を除き昇順）
+    feature_prices: np.ndarray
+    watermarks: Dict[str, Optional[datetime]]
+    loaded_at: datetime
+    refreshed_at: datetime
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+    def age_seconds(self, now: Optional[datetime] = None) -> float:
+        now = now or datetime.now(timezone.utc)
+        return max(0.0, (now - self.refreshed_at).total_seconds())
+
+    def budget_range(self, budget_min: Optional[int], budget_max: Optional[int]) -> Tuple[int, int]:
+        """予算条件を満たす embedding 行の範囲 [lo, hi) を返す。"""
+        # SQL の gte/lte と同じく、予算指定時は price_yen が null の行を除外する
+        if budget_min is None and budget_max is None:
+            return 0, len(self.embeddings)
+        lo = 0 if budget_min is None else int(np.searchsorted(self.row_prices, budget_min, side="left"))
+        hi = len(self.row_prices) if budget_max is None else int(np.searchsorted(self.row_prices, budget_max, side="right"))
+        return lo, max(lo, hi)
+
+    def count_in_budget(self, budget_min: Optional[int], budget_max: Optional[int]) -> int:
+        if budget_min is None and budget_max is None:
+            return len(self.features)
+        prices = self.feature_prices
+        lo = 0 if budget_min is None else int(np.searchsorted(prices, budget_min, side="left"))
+        hi = len(prices) if budget_max is None else int(np.searchsorted(prices, budget_max, side="right"))
+        return max(0, hi - lo)
+
+    def search(
+        self,
+        context_vector: Sequence[float],
+        budget_min: Optional[int],
+        budget_max: Optional[int],
+        k: int,
+    ) -> List[Dict[str, Any]]:
+        """予算内のアイテムから context_vector に近い上位 k 件を vector_score 付きで返す。"""
+        query = normalize_vector(context_vector)
+        if query is None or query.shape[0] != self.embeddings.dim:
+            return []
+        lo, hi = self.budget_range(budget_min, budget_max)
+        if hi <= lo:
+            return []
+        top_rows, top_scores = self.index.search(query, k, lo, hi)
+        result: List[Dict[str, Any]] = []
+        for row, score in zip(top_rows.tolist(), top_scores.tolist()):
+            item = dict(self.features[self.embeddings.item_ids[row]])
+            item["vector_score"] = score
+            # MMR（embedding 多様性）用。行列の行ビューなのでコピーは発生しない
+            item["embedding"] = self.embeddings.matrix[row]
+            result.append(item)
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        quantized = getattr(self.index, "quantized", None)
+        return {
+            "version": self.version,
+            "items": len(self.features),
+            "embeddings": len(self.embeddings),
+            "index": self.index.kind,
+            "quantization": quantized.kind if quantized is not None else "none",
+            "embeddingBytes": self.embeddings.nbytes,
+            "quantizedBytes": quantized.nbytes if quantized is not None else 0,
+            "loadedAt": self.loaded_at.isoformat(),
+            "refreshedAt": self.refreshed_at.isoformat(),
+            "ageSec": round(self.age_seconds(), 3),
+        }
+
+
+def _spill_matrix(matrix: np.ndarray) -> np.ndarray:
+    """行列をファイルに書き出して読み取り専用 mmap で開き直す（ヒープ上のコピーは呼び出し側の参照が消えると解放される）。
+
+    ファイルは開いた直後に削除するため、mmap を閉じるとディスクからも消える。
+    """
+    if isinstance(matrix, np.memmap) or matrix.size == 0:
+        return matrix
+    with tempfile.NamedTemporaryFile(
+        dir=EMBEDDING_SPILL_DIR or None, prefix="reco-embeddings-", suffix=".npy"
+    ) as f:
+        np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        f.flush()
+        return np.load(f.name, mmap_mode="r")
+
+
+def _price_key(row: Dict[str, Any]) -> Optional[int]:
+    price = row.get("price_yen")
+    if price is None:
+        return None
+    try:
+        return int(price)
+    except (TypeError, ValueError):
+        return None
+
+
+def _build_snapshot(
+    *,
+    version: int,
+    model: str,
+    features: Dict[str, Dict[str, Any]],
+    embeddings: EmbeddingMatrix,
+    watermarks: Dict[str, Optional[datetime]],
+    loaded_at: datetime,
+    refreshed_at: datetime,
+    previous: Optional["CatalogSnapshot"] = None,
+) -> "CatalogSnapshot":
+    prices = [_price_key(features[item_id]) for item_id in embeddings.item_ids]
+    order = sorted(
+        range(len(embeddings)),
+        key=lambda i: (prices[i] is None, prices[i] or 0, embeddings.item_ids[i]),
+    )
+    embeddings = embeddings.reordered(order)
+    row_prices = np.asarray([prices[i] for i in order if prices[i] is not None], dtype=np.int64)
+    feature_prices = np.sort(
+        np.asarray([p for p in (_price_key(r) for r in features.values()) if p is not None], dtype=np.int64)
+    )
+
+    if previous is not None and embeddings.item_ids == previous.embeddings.item_ids and (
+        embeddings.matrix is previous.embeddings.matrix
+    ):
+        index = previous.index
+    else:
+        if EMBEDDING_QUANTIZATION != "none":
+            # 再スコア用の float32 はファイルから読み、量子化表現と二重に常駐させない
+            embeddings = EmbeddingMatrix(embeddings.item_ids, _spill_matrix(embeddings.matrix))
+        index = build_index(
+            embeddings.matrix,
+            ANN_INDEX,
+            IVF_NLIST,
+            IVF_NPROBE,
+            previous=previous.index if previous is not None else None,
+            quantization=EMBEDDING_QUANTIZATION,
+            rescore=QUANTIZED_RESCORE,
+        )
+    return CatalogSnapshot(
+        version=version,
+        model=model,
+        features=features,
+        embeddings=embeddings,
+        index=index,
+        row_prices=row_prices,
+        feature_prices=feature_prices,
+        watermarks=watermarks,
+        loaded_at=loaded_at,
+        refreshed_at=refreshed_at,
+    )
+
+
+def load_catalog(db: SyncPostgrestClient, model: str, version: int = 1) -> CatalogSnapshot:
+    started = time.perf_counter()
+    watermarks: Dict[str, Optional[datetime]] = {t: None for t in WATERMARK_TABLES}
+
+    features: Dict[str, Dict[str, Any]] = {}
+    for r in _fetch_all(lambda offset: fetch_item_features_page(db, offset)):
+        if not r.get("item_id"):
+            continue
+        features[str(r["item_id"])] = r
+        watermarks["item_features"] = _max_timestamp(watermarks["item_features"], r.get("updated_at"))
+        watermarks["item"] = _max_timestamp(watermarks["item"], (r.get("item") or {}).get("updated_at"))
+
+    vectors: Dict[str, np.ndarray] = {}
+    for r in _fetch_all(lambda offset: fetch_item_embeddings_page(db, model, offset)):
+        watermarks["item_embedding"] = _max_timestamp(watermarks["item_embedding"], r.get("updated_at"))
+        item_id = str(r.get("item_id"))
+        if item_id not in features:
+            continue
+        emb = parse_embedding(r.get("embedding"))
+        if emb is not None:
+            vectors[item_id] = emb
+
+    now = datetime.now(timezone.utc)
+    snapshot = _build_snapshot(
+        version=version,
+        model=model,
+        features=features,
+        embeddings=EmbeddingMatrix.from_vectors(vectors),
+        watermarks=watermarks,
+        loaded_at=now,
+        refreshed_at=now,
+    )
+    logger.info(
+        "catalog loaded version=%s model=%s items=%s embeddings=%s index=%s dim=%s bytes=%s elapsed_ms=%.1f",
+        version,
+        model,
+        len(features),
+        len(snapshot.embeddings),
+        snapshot.index.kind,
+        snapshot.embeddings.dim,
+        snapshot.embeddings.nbytes,
+        (time.perf_counter() - started) * 1000.0,
+    )
+    return snapshot
+
+
+def refresh_catalog(
+    db: SyncPostgrestClient,
+    prev: CatalogSnapshot,
+    overlap_sec: float = CATALOG_REFRESH_OVERLAP_SEC,
+) -> CatalogSnapshot:
+    """watermark 以降に更新された行だけを取得して新しいスナップショットを返す。"""
+    if any(prev.watermarks.get(t) is None for t in WATERMARK_TABLES):
+        # 基準時刻が無いテーブルがある場合は差分を判定できないため全件再読込
+        return load_catalog(db, prev.model, version=prev.version + 1)
+
+    started = time.perf_counter()
+    watermarks = dict(prev.watermarks)
+    since = {
+        t: (wm - timedelta(seconds=overlap_sec)).isoformat()
+        for t, wm in prev.watermarks.items()
+        if wm is not None
+    }
+    features = dict(prev.features)
+    upserts: Dict[str, np.ndarray] = {}
+    removals: Set[str] = set()
+    activated: Set[str] = set()
+    changed = False
+
+    # 1) apl.item: is_active の切り替え（JOB-A-01）と商品詳細の更新
+    for it in _fetch_all(lambda offset: fetch_items_updated_page(db, since["item"], offset)):
+        watermarks["item"] = _max_timestamp(watermarks["item"], it.get("updated_at"))
+        item_id = str(it.get("id"))
+        current = features.get(item_id)
+        if not it.get("is_active"):
+            if current is not None:
+                del features[item_id]
+                removals.add(item_id)
+                changed = True
+        elif current is None:
+            activated.add(item_id)
+        elif current.get("item") != it:
+            features[item_id] = {**current, "item": it}
+            changed = True
+
+    # 2) apl.item_features の更新
+    for r in _fetch_all(lambda offset: fetch_item_features_page(db, offset, since["item_features"])):
+        watermarks["item_features"] = _max_timestamp(watermarks["item_features"], r.get("updated_at"))
+        item_id = str(r.get("item_id"))
+        if (r.get("item") or {}).get("is_active"):
+            if item_id not in features:
+                activated.add(item_id)
+            if features.get(item_id) != r:
+                features[item_id] = r
+                changed = True
+        elif item_id in features:
+            del features[item_id]
+            removals.add(item_id)
+            changed = True
+
+    # 3) 新たに有効化されたアイテムは features / embedding をまとめて取得
+    activated |= removals & features.keys()
+    missing = [i for i in activated if i not in features]
+    for r in fetch_item_features_by_ids(db, missing):
+        if (r.get("item") or {}).get("is_active"):
+            features[str(r["item_id"])] = r
+            changed = True
+    embedding_rows = fetch_item_embeddings_by_ids(db, prev.model, sorted(activated))
+
+    # 4) apl.item_embedding の更新
+    embedding_rows.extend(
+        _fetch_all(lambda offset: fetch_item_embeddings_page(db, prev.model, offset, since["item_embedding"]))
+    )
+    for r in embedding_rows:
+        watermarks["item_embedding"] = _max_timestamp(watermarks["item_embedding"], r.get("updated_at"))
+        item_id = str(r.get("item_id"))
+        if item_id not in features:
+            continue
+        emb = parse_embedding(r.get("embedding"))
+        if emb is None:
+            continue
+        row = prev.embeddings.row_of.get(item_id)
+        if row is not None and item_id not in removals:
+            normalized = normalize_vector(emb)
+            if normalized is not None and np.array_equal(prev.embeddings.matrix[row], normalized):
+                continue
+        upserts[item_id] = emb
+        removals.discard(item_id)
+        changed = True
+
+    now = datetime.now(timezone.utc)
+    if not changed:
+        return replace(prev, watermarks=watermarks, refreshed_at=now)
+
+    # price_yen の変更でも並び順が変わるため、差分があれば並べ直す
+    snapshot = _build_snapshot(
+        version=prev.version + 1,
+        model=prev.model,
+        features=features,
+        embeddings=prev.embeddings.updated(upserts, removals),
+        watermarks=watermarks,
+        loaded_at=prev.loaded_at,
+        refreshed_at=now,
+        previous=prev,
+    )
+    logger.info(
+        "catalog refreshed version=%s items=%s embeddings=%s upserts=%s removals=%s elapsed_ms=%.1f",
+        snapshot.version,
+        len(features),
+        len(snapshot.embeddings),
+        len(upserts),
+        len(removals),
+        (time.perf_counter() - started) * 1000.0,
+    )
+    return snapshot
+
+
+_lock = threading.Lock()
+_catalog: Optional[CatalogSnapshot] = None
+
+
+def get_catalog() -> Optional[CatalogSnapshot]:
+    return _catalog
+
+
+def set_catalog(snapshot: Optional[CatalogSnapshot]) -> None:
+    global _catalog
+    with _lock:
+        _catalog = snapshot
+
+
+class CatalogRefresher:
+    """バックグラウンドスレッドでカタログを初回全件読込し、以降は差分更新する。"""
+
+    def __init__(
+        self,
+        model: str,
+        interval_sec: float = CATALOG_REFRESH_SEC,
+        overlap_sec: float = CATALOG_REFRESH_OVERLAP_SEC,
+    ) -> None:
+        self._model = model
+        self._interval_sec = interval_sec
+        self._overlap_sec = overlap_sec
+        self._stop = threading.Event()
+        self._loaded = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 初回全件読込にかかった秒数（/ready で返す）
+        self.initial_load_sec: Optional[float] = None
+
+    def refresh_once(self) -> CatalogSnapshot:
+        db = get_apl_db()
+        prev = get_catalog()
+        if prev is None or prev.model != self._model:
+            started = time.perf_counter()
+            snapshot = load_catalog(db, self._model)
+            self.initial_load_sec = round(time.perf_counter() - started, 3)
+        else:
+            snapshot = refresh_catalog(db, prev, self._overlap_sec)
+        set_catalog(snapshot)
+        self._loaded.set()
+        return snapshot
+
+    def wait_loaded(self, timeout: Optional[float] = None) -> bool:
+        """初回読込の完了を待つ。タイムアウト・stop 時は False を返す。"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # stop されたら待機を打ち切れるよう、短い間隔で確認する
+        while not self._loaded.is_set() and not self._stop.is_set():
+            remaining = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+            if remaining <= 0:
+                break
+            self._loaded.wait(remaining)
+        return self._loaded.is_set()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="catalog-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh_once()
+            except Exception as e:
+                snapshot = get_catalog()
+                logger.exception(
+                    "catalog refresh failed model=%s version=%s age_sec=%s error=%s",
+                    self._model,
+                    snapshot.version if snapshot else None,
+                    round(snapshot.age_seconds(), 1) if snapshot else None,
+                    e,
+                )
+            self._stop.wait(self._interval_sec)
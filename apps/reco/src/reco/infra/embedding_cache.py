@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from reco.infra.cache import TtlLruCache
+
+logger = logging.getLogger(__name__)
+
+EMBED_CACHE_SIZE = int(os.getenv("RECO_EMBED_CACHE_SIZE", "1024"))
+EMBED_CACHE_TTL_SEC = float(os.getenv("RECO_EMBED_CACHE_TTL_SEC", "86400"))
+# 空の場合はディスク永続化を行わない（例: /data/embedding_cache.sqlite3）
+EMBED_CACHE_PATH = os.getenv("RECO_EMBED_CACHE_PATH", "")
+
+
+def _digest(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+class SqliteEmbeddingStore:
+    """再起動後もキャッシュを引き継ぐための SQLite 永続化層。"""
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("pragma journal_mode=wal")
+            self._conn.execute(
+                "create table if not exists context_embedding ("
+                "key text primary key, model text not null, vector blob not null, created_at real not null)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str, ttl_sec: float) -> Optional[Tuple[array, float]]:
+        """(ベクトル, created_at) を返す。期限切れの場合は None。"""
+        with self._lock:
+            row = self._conn.execute(
+                "select vector, created_at from context_embedding where key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        blob, created_at = row
+        if ttl_sec > 0 and created_at + ttl_sec <= time.time():
+            return None
+        vector = array("d")
+        vector.frombytes(blob)
+        return vector, created_at
+
+    def put(self, key: str, model: str, vector: array) -> None:
+        with self._lock:
+            self._conn.execute(
+                "insert or replace into context_embedding (key, model, vector, created_at) values (?, ?, ?, ?)",
+                (key, model, vector.tobytes(), time.time()),
+            )
+            self._conn.commit()
+
+    def purge_expired(self, ttl_sec: float) -> int:
+        if ttl_sec <= 0:
+            return 0
+        with self._lock:
+            cur = self._conn.execute(
+                "delete from context_embedding where created_at <= ?", (time.time() - ttl_sec,)
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+
+class EmbeddingCache:
+    """(model, context_text) をキーにした ContextVector のキャッシュ。
+
+    メモリ（LRU + TTL）を優先し、ミス時は SQLite（設定時のみ）を参照する。
+    ベクトルは float64 の array で保持し、OpenAI から得た値をそのまま返す。
+    SQLite への書き込みは専用スレッドで順に行い（write-behind）、put を呼んだスレッドを待たせない。
+    """
+
+    def __init__(
+        self,
+        max_size: int = EMBED_CACHE_SIZE,
+        ttl_sec: float = EMBED_CACHE_TTL_SEC,
+        path: str = EMBED_CACHE_PATH,
+    ) -> None:
+        self._memory: TtlLruCache[array] = TtlLruCache(max_size, ttl_sec)
+        self._ttl_sec = ttl_sec
+        self._store: Optional[SqliteEmbeddingStore] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self.disk_hits = 0
+        if path:
+            try:
+                self._store = SqliteEmbeddingStore(path)
+                purged = self._store.purge_expired(ttl_sec)
+                logger.info("embedding cache store opened path=%s purged=%s", path, purged)
+            except sqlite3.Error as e:
+                logger.warning("embedding cache store disabled path=%s error=%s", path, e)
+        if self._store is not None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-cache-writer")
+
+    @property
+    def persistent(self) -> bool:
+        return self._store is not None
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        cached = self.get_memory(model, text)
+        if cached is None and self._store is not None:
+            cached = self.get_stored(model, text)
+        return cached
+
+    def get_memory(self, model: str, text: str) -> Optional[List[float]]:
+        """メモリだけを参照する（ディスク I/O を行わないため、イベントループ上で呼んでよい）。"""
+        vector = self._memory.get(_digest(model, text))
+        return vector.tolist() if vector is not None else None
+
+    def get_stored(self, model: str, text: str) -> Optional[List[float]]:
+        """SQLite を参照し、ヒットした場合はメモリに載せる（ブロッキング I/O）。"""
+        if self._store is None:
+            return None
+        key = _digest(model, text)
+        try:
+            stored = self._store.get(key, self._ttl_sec)
+        except sqlite3.Error as e:
+            logger.warning("embedding cache store read failed error=%s", e)
+            return None
+        if stored is None:
+            return None
+        vector, created_at = stored
+        self.disk_hits += 1
+        self._promote(key, vector, created_at)
+        return vector.tolist()
+
+    def _promote(self, key: str, vector: array, created_at: float) -> None:
+        # メモリ上の期限はディスクに書いた時刻から数える（読み出し時刻から TTL を数え直さない）
+        if self._ttl_sec <= 0:
+            self._memory.put(key, vector)
+            return
+        remaining = created_at + self._ttl_sec - time.time()
+        if remaining > 0:
+            self._memory.put(key, vector, ttl_sec=remaining)
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        key = _digest(model, text)
+        packed = array("d", vector)
+        self._memory.put(key, packed)
+        if self._writer is not None and self._store is not None:
+            self._writer.submit(self._write, self._store, key, model, packed)
+
+    @staticmethod
+    def _write(store: SqliteEmbeddingStore, key: str, model: str, vector: array) -> None:
+        try:
+            store.put(key, model, vector)
+        except sqlite3.Error as e:
+            logger.warning("embedding cache store write failed error=%s", e)
+
+    def flush(self) -> None:
+        """書き込み待ちの SQLite 書き込みが終わるまで待つ（終了時・テスト用）。"""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+
+    def clear(self) -> None:
+        self._memory.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._memory.stats()
+        # メモリミスのうちディスクで解決したものはヒットとして数える
+        hits = stats["hits"] + self.disk_hits
+        misses = stats["misses"] - self.disk_hits
+        stats["hits"] = hits
+        stats["misses"] = misses
+        stats["hitRate"] = round(hits / (hits + misses), 4) if hits + misses else 0.0
+        stats["diskHits"] = self.disk_hits
+        stats["persistent"] = self._store is not None
+        return stats
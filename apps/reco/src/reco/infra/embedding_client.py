@@ -1,36 +1,111 @@
+import asyncio
 import json
 import os
 import urllib.request
-from typing import List
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from reco.infra.embedding_cache import EmbeddingCache
 
 DEFAULT_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+OPENAI_EMBEDDINGS_URL = "https://api.openai.com/v1/embeddings"
+OPENAI_TIMEOUT_SEC = float(os.getenv("OPENAI_TIMEOUT_SEC", "30"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_KEEPALIVE_EXPIRY_SEC = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SEC", "60"))
+
+_cache = EmbeddingCache()
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    return _cache
 
 
 def embed_text(text: str, model: str | None = None) -> List[float]:
+    # 同一の context_text は同一ベクトルになるため、キャッシュ済みなら API を呼ばない
+    model = model or DEFAULT_EMBEDDING_MODEL
+    cached = _cache.get(model, text)
+    if cached is not None:
+        return cached
+    embedding = _request_embedding(text, model)
+    _cache.put(model, text, embedding)
+    return embedding
+
+
+def _headers() -> Dict[str, str]:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("OPENAI_API_KEY is not set")
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+
+
+def _extract_embedding(data: Dict[str, Any]) -> List[float]:
+    embedding = data["data"][0]["embedding"]
+    return [float(v) for v in embedding]
 
+
+def _request_embedding(text: str, model: str) -> List[float]:
     payload = json.dumps(
         {
-            "model": model or DEFAULT_EMBEDDING_MODEL,
+            "model": model,
             "input": text,
         }
     ).encode("utf-8")
 
     request = urllib.request.Request(
-        "https://api.openai.com/v1/embeddings",
+        OPENAI_EMBEDDINGS_URL,
         data=payload,
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
+        headers=_headers(),
         method="POST",
     )
 
-    with urllib.request.urlopen(request, timeout=30) as response:
+    with urllib.request.urlopen(request, timeout=OPENAI_TIMEOUT_SEC) as response:
         body = response.read().decode("utf-8")
         data = json.loads(body)
 
-    embedding = data["data"][0]["embedding"]
-    return [float(v) for v in embedding]
+    return _extract_embedding(data)
+
+
+def _get_async_client() -> httpx.AsyncClient:
+    # 接続を使い回して TLS ハンドシェイクをリクエストごとに行わない
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(
+            timeout=OPENAI_TIMEOUT_SEC,
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY_SEC,
+            ),
+        )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def embed_text_async(text: str, model: str | None = None) -> List[float]:
+    model = model or DEFAULT_EMBEDDING_MODEL
+    # イベントループ上ではメモリだけを見る。SQLite の読み出しはスレッドで行い、書き込みは write-behind
+    cached = _cache.get_memory(model, text)
+    if cached is None and _cache.persistent:
+        cached = await asyncio.to_thread(_cache.get_stored, model, text)
+    if cached is not None:
+        return cached
+    response = await _get_async_client().post(
+        OPENAI_EMBEDDINGS_URL,
+        json={"model": model, "input": text},
+        headers=_headers(),
+    )
+    response.raise_for_status()
+    embedding = _extract_embedding(response.json())
+    _cache.put(model, text, embedding)
+    return embedding
@@ -0,0 +1,159 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 秒単位（Prometheus の慣例）
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000)
+
+
+class Histogram:
+    """ラベル付きヒストグラム（Prometheus text format で出力する）。"""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: Sequence[float]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label 値 -> (バケットごとの件数, 合計, 件数)
+        self._series: Dict[str, Tuple[List[int], float, int]] = {}
+
+    def observe(self, label_value: str, value: float) -> None:
+        with self._lock:
+            counts, total, n = self._series.get(label_value) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._series[label_value] = (counts, total + value, n + 1)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: (list(c), t, n) for k, (c, t, n) in self._series.items()}
+        for label_value in sorted(series):
+            counts, total, n = series[label_value]
+            label = f'{self.label}="{label_value}"'
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{label},le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {n}')
+            lines.append(f"{self.name}_sum{{{label}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{label}}} {n}")
+        return lines
+
+
+STAGE_DURATION = Histogram(
+    "reco_stage_duration_seconds", "Duration of each recommendation stage.", "stage", DURATION_BUCKETS
+)
+STAGE_ROWS = Histogram(
+    "reco_stage_rows", "Rows processed by each recommendation stage.", "stage", ROW_BUCKETS
+)
+REQUEST_DURATION = Histogram(
+    "reco_request_duration_seconds", "End-to-end duration per endpoint.", "endpoint", DURATION_BUCKETS
+)
+
+
+class StageTimer:
+    """1 リクエスト分のステージごとの所要時間・行数。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._stages: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, stage: str, seconds: float, rows: Optional[int] = None) -> None:
+        with self._lock:
+            entry = self._stages.setdefault(stage, {"ms": 0.0, "calls": 0})
+            entry["ms"] += seconds * 1000.0
+            entry["calls"] += 1
+            if rows is not None:
+                entry["rows"] = entry.get("rows", 0) + rows
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                name: {k: round(v, 3) if isinstance(v, float) else v for k, v in entry.items()}
+                for name, entry in self._stages.items()
+            }
+        return {"totalMs": round(self.elapsed() * 1000.0, 3), "stages": stages}
+
+    def summary(self) -> str:
+        """ログ出力用（stage=ms[/rows] を空白区切り）。"""
+        with self._lock:
+            parts = []
+            for name, entry in self._stages.items():
+                part = f"{name}={entry['ms']:.1f}ms"
+                if "rows" in entry:
+                    part += f"/{entry['rows']}"
+                parts.append(part)
+        return " ".join(parts)
+
+
+# asyncio のタスク・to_thread にも引き継がれるため、関数の引数で受け渡す必要がない
+_current_timer: ContextVar[Optional[StageTimer]] = ContextVar("reco_stage_timer", default=None)
+# False の間はヒストグラムに記録しない（ウォームアップなど本番トラフィック以外の実行用）
+_recording: ContextVar[bool] = ContextVar("reco_metrics_recording", default=True)
+
+
+class _StageHandle:
+    def __init__(self) -> None:
+        self.rows: Optional[int] = None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[_StageHandle]:
+    """with stage("embed") as s: ... s.rows = n で所要時間（と行数）を記録する。"""
+    handle = _StageHandle()
+    started = time.perf_counter()
+    try:
+        yield handle
+    finally:
+        seconds = time.perf_counter() - started
+        if _recording.get():
+            STAGE_DURATION.observe(name, seconds)
+            if handle.rows is not None:
+                STAGE_ROWS.observe(name, handle.rows)
+        timer = _current_timer.get()
+        if timer is not None:
+            timer.record(name, seconds, handle.rows)
+
+
+@contextmanager
+def request_timer(endpoint: str) -> Iterator[StageTimer]:
+    timer = StageTimer()
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+        if _recording.get():
+            REQUEST_DURATION.observe(endpoint, timer.elapsed())
+
+
+@contextmanager
+def metrics_suppressed() -> Iterator[None]:
+    """この中で実行したステージ・リクエストを /metrics のヒストグラムに記録しない。"""
+    token = _recording.set(False)
+    try:
+        yield
+    finally:
+        _recording.reset(token)
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _current_timer.get()
+
+
+def render_prometheus(gauges: Optional[Dict[str, float]] = None) -> str:
+    lines: List[str] = []
+    for histogram in (REQUEST_DURATION, STAGE_DURATION, STAGE_ROWS):
+        lines.extend(histogram.render())
+    for name, value in sorted((gauges or {}).items()):
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {float(value):g}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Generic, Hashable, Optional, TypeVar
+
+from pydantic import BaseModel
+
+from reco.infra.cache import TtlLruCache
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RECO_RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_TTL_SEC = float(os.getenv("RECO_RESPONSE_CACHE_TTL_SEC", "300"))
+
+# 推薦結果に影響しないフィールド（deprecated）はキーに含めない
+_IGNORED_FIELDS = {"eventId", "recipientId"}
+
+V = TypeVar("V")
+
+
+def request_key(req: BaseModel, model: str) -> str:
+    """リクエストの正規化 JSON（キー順固定）と embedding モデルの sha256。
+
+    featuresLike などのリストは contextText に順序どおり埋め込まれるため、並べ替えない。
+    """
+    payload = req.model_dump(exclude=_IGNORED_FIELDS)
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{model}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache(Generic[V]):
+    """カタログのバージョンに紐づく推薦レスポンスのキャッシュ。
+
+    カタログが更新されて version が変わった時点で全エントリを破棄する。
+    バージョン更新前に計算された結果が後から put されても保存しない。
+    """
+
+    def __init__(self, max_size: int, ttl_sec: float) -> None:
+        self._cache: TtlLruCache[V] = TtlLruCache(max_size=max_size, ttl_sec=ttl_sec)
+        self._lock = threading.Lock()
+        self._version: Optional[Hashable] = None
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.max_size > 0
+
+    def _sync_version(self, version: Optional[Hashable]) -> None:
+        with self._lock:
+            if version == self._version:
+                return
+            if len(self._cache):
+                self._cache.clear()
+                self.invalidations += 1
+            self._version = version
+
+    def get(self, key: str, version: Optional[Hashable]) -> Optional[V]:
+        self._sync_version(version)
+        return self._cache.get(key)
+
+    def put(self, key: str, version: Optional[Hashable], value: V) -> None:
+        with self._lock:
+            if version != self._version:
+                return
+            self._cache.put(key, value)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        stats["version"] = self._version
+        stats["invalidations"] = self.invalidations
+        return stats
@@ -0,0 +1,347 @@
+import fcntl
+import logging
+import os
+import shutil
+import time
+import uuid
+from dataclasses import replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+import numpy as np
+import orjson
+
+from reco.core.ann import ExactIndex, IvfIndex, QuantizedMatrix, VectorIndex
+from reco.infra.catalog import (
+    CATALOG_REFRESH_OVERLAP_SEC,
+    CATALOG_REFRESH_SEC,
+    QUANTIZED_RESCORE,
+    CatalogRefresher,
+    CatalogSnapshot,
+    EmbeddingMatrix,
+    _parse_timestamp,
+    get_catalog,
+    load_catalog,
+    refresh_catalog,
+    set_catalog,
+)
+from reco.infra.supabase_client import get_apl_db
+
+logger = logging.getLogger(__name__)
+
+# 空の場合は共有しない（ワーカーごとに DB から読み込む）。tmpfs（/dev/shm 配下など）を推奨
+SHARED_CATALOG_DIR = os.getenv("RECO_CATALOG_SHARED_DIR", "")
+# フォロワーが CURRENT を確認する間隔
+SHARED_CATALOG_POLL_SEC = float(os.getenv("RECO_CATALOG_SHARED_POLL_SEC", "5"))
+
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = "leader.lock"
+# 切り替え直後に旧版を開こうとしているワーカーのため、直前の版は残す
+KEEP_VERSIONS = 2
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _timestamps(values: Dict[str, Optional[datetime]]) -> Dict[str, Optional[str]]:
+    return {k: v.isoformat() if v else None for k, v in values.items()}
+
+
+def _ivf_assignments(index: IvfIndex, n: int) -> np.ndarray:
+    assignments = np.empty(n, dtype=np.int64)
+    for c, rows in enumerate(index.lists):
+        assignments[rows] = c
+    return assignments
+
+
+class MappedFeatures(Mapping[str, Dict[str, Any]]):
+    """publish_snapshot が書き出した features を mmap のまま引く読み取り専用の Mapping。
+
+    行ごとの JSON を item_id 順に連結した features.npy と、その境界 features_offsets.npy、
+    item_id の配列 features_ids.npy からなる。参照された行だけをその都度デコードするため、
+    ワーカーのヒープに全アイテム分の dict を持たない。
+    """
+
+    def __init__(self, item_ids: np.ndarray, offsets: np.ndarray, blob: np.ndarray) -> None:
+        self._item_ids = item_ids
+        self._offsets = offsets
+        self._blob = blob
+
+    @classmethod
+    def save(cls, directory: Path, features: Mapping[str, Dict[str, Any]]) -> None:
+        item_ids = sorted(features)
+        rows = [orjson.dumps(features[item_id]) for item_id in item_ids]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in rows], out=offsets[1:])
+        np.save(directory / "features_ids.npy", np.asarray(item_ids, dtype=str))
+        np.save(directory / "features_offsets.npy", offsets)
+        np.save(directory / "features.npy", np.frombuffer(b"".join(rows), dtype=np.uint8))
+
+    @classmethod
+    def open(cls, directory: Path) -> "MappedFeatures":
+        return cls(
+            np.load(directory / "features_ids.npy", mmap_mode="r"),
+            np.load(directory / "features_offsets.npy", mmap_mode="r"),
+            np.load(directory / "features.npy", mmap_mode="r"),
+        )
+
+    def _position(self, item_id: str) -> int:
+        pos = int(np.searchsorted(self._item_ids, item_id))
+        if pos < len(self._item_ids) and self._item_ids[pos] == item_id:
+            return pos
+        return -1
+
+    def __getitem__(self, item_id: str) -> Dict[str, Any]:
+        pos = self._position(item_id)
+        if pos < 0:
+            raise KeyError(item_id)
+        return orjson.loads(self._blob[self._offsets[pos] : self._offsets[pos + 1]].tobytes())
+
+    def __contains__(self, item_id: object) -> bool:
+        return isinstance(item_id, str) and self._position(item_id) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(item_id) for item_id in self._item_ids)
+
+    def __len__(self) -> int:
+        return len(self._item_ids)
+
+
+def read_current(directory: str) -> Optional[Dict[str, Any]]:
+    """公開中の版（tag / refreshedAt / watermarks）。未公開なら None。"""
+    try:
+        return orjson.loads((Path(directory) / CURRENT_FILE).read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def publish_snapshot(directory: str, snapshot: CatalogSnapshot) -> str:
+    """スナップショットを版ごとのディレクトリに書き出し、CURRENT を差し替えて tag を返す。
+
+    行列類と features は .npy（ワーカーは mmap で読み取り専用に開く）、それ以外のメタ情報は JSON で保存する。
+    一時ディレクトリに書いてから rename するため、ワーカーが書きかけの版を見ることはない。
+    """
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    tag = f"{snapshot.version:08d}-{uuid.uuid4().hex[:8]}"
+    tmp = root / f".tmp-{tag}"
+    tmp.mkdir()
+
+    np.save(tmp / "embeddings.npy", np.ascontiguousarray(snapshot.embeddings.matrix, dtype=np.float32))
+    np.save(tmp / "row_prices.npy", snapshot.row_prices)
+    np.save(tmp / "feature_prices.npy", snapshot.feature_prices)
+    index: Dict[str, Any] = {"kind": snapshot.index.kind}
+    if isinstance(snapshot.index, IvfIndex):
+        np.save(tmp / "ivf_centroids.npy", snapshot.index.centroids)
+        np.save(tmp / "ivf_assignments.npy", _ivf_assignments(snapshot.index, len(snapshot.embeddings)))
+        index["nprobe"] = snapshot.index.nprobe
+    # 量子化表現も書き出し、ワーカーが全行を読んで作り直さない（再スコアで触れる行だけがページインされる）
+    quantized = getattr(snapshot.index, "quantized", None)
+    if quantized is not None:
+        np.save(tmp / "quantized_codes.npy", quantized.codes)
+        if quantized.scales is not None:
+            np.save(tmp / "quantized_scales.npy", quantized.scales)
+        index["rescore"] = snapshot.index.rescore
+    MappedFeatures.save(tmp, snapshot.features)
+    meta = {
+        "version": snapshot.version,
+        "model": snapshot.model,
+        "itemIds": snapshot.embeddings.item_ids,
+        "index": index,
+        "loadedAt": snapshot.loaded_at.isoformat(),
+    }
+    (tmp / "meta.json").write_bytes(orjson.dumps(meta))
+    os.rename(tmp, root / tag)
+
+    touch_current(directory, tag, snapshot)
+    _cleanup(root, tag)
+    return tag
+
+
+def touch_current(directory: str, tag: str, snapshot: CatalogSnapshot) -> None:
+    """CURRENT を書き換える（差分なしの更新では refreshedAt / watermarks のみ進める）。"""
+    pointer = {
+        "tag": tag,
+        "version": snapshot.version,
+        "refreshedAt": snapshot.refreshed_at.isoformat(),
+        "watermarks": _timestamps(snapshot.watermarks),
+    }
+    _write_atomic(Path(directory) / CURRENT_FILE, orjson.dumps(pointer))
+
+
+def _cleanup(root: Path, current: str) -> None:
+    # mmap 済みのファイルは削除しても、開いているワーカーからは引き続き読める
+    versions = sorted(p for p in root.iterdir() if p.is_dir() and not p.name.startswith("."))
+    for path in versions[:-KEEP_VERSIONS]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def open_snapshot(directory: str, pointer: Dict[str, Any]) -> CatalogSnapshot:
+    """公開された版を読み取り専用 mmap で開く（embedding 行列と features はワーカー間で物理メモリを共有する）。"""
+    path = Path(directory) / pointer["tag"]
+    meta = orjson.loads((path / "meta.json").read_bytes())
+    matrix = np.load(path / "embeddings.npy", mmap_mode="r")
+    quantized = None
+    if (path / "quantized_codes.npy").exists():
+        scales_path = path / "quantized_scales.npy"
+        quantized = QuantizedMatrix(
+            np.load(path / "quantized_codes.npy", mmap_mode="r"),
+            np.load(scales_path, mmap_mode="r") if scales_path.exists() else None,
+        )
+    rescore = meta["index"].get("rescore", QUANTIZED_RESCORE)
+    index: VectorIndex
+    if meta["index"]["kind"] == "ivf":
+        index = IvfIndex(
+            matrix,
+            np.load(path / "ivf_centroids.npy", mmap_mode="r"),
+            np.load(path / "ivf_assignments.npy", mmap_mode="r"),
+            meta["index"]["nprobe"],
+            quantized,
+            rescore,
+        )
+    else:
+        index = ExactIndex(matrix, quantized, rescore)
+    return CatalogSnapshot(
+        version=meta["version"],
+        model=meta["model"],
+        features=MappedFeatures.open(path),
+        embeddings=EmbeddingMatrix(meta["itemIds"], matrix),
+        index=index,
+        row_prices=np.load(path / "row_prices.npy", mmap_mode="r"),
+        feature_prices=np.load(path / "feature_prices.npy", mmap_mode="r"),
+        watermarks={k: _parse_timestamp(v) for k, v in pointer["watermarks"].items()},
+        loaded_at=_parse_timestamp(meta["loadedAt"]) or datetime.now(timezone.utc),
+        refreshed_at=_parse_timestamp(pointer["refreshedAt"]) or datetime.now(timezone.utc),
+    )
+
+
+class LeaderLock:
+    """共有ディレクトリの排他ロック（flock）。プロセス終了時は OS が解放する。"""
+
+    def __init__(self, directory: str) -> None:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        self._path = Path(directory) / LOCK_FILE
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class SharedCatalogRefresher(CatalogRefresher):
+    """uvicorn の複数ワーカーで 1 つのカタログを共有する CatalogRefresher。
+
+    ロックを取れたワーカー（リーダー）だけが DB から読込・差分更新して版を公開し、
+    他のワーカー（フォロワー）は CURRENT の変化を検知して新しい版を mmap で開き直す。
+    リーダーが終了するとロックが解放され、次に確認したワーカーが公開済みの版を引き継ぐ。
+    """
+
+    def __init__(
+        self,
+        model: str,
+        directory: str = SHARED_CATALOG_DIR,
+        interval_sec: float = CATALOG_REFRESH_SEC,
+        overlap_sec: float = CATALOG_REFRESH_OVERLAP_SEC,
+        poll_sec: float = SHARED_CATALOG_POLL_SEC,
+    ) -> None:
+        # スレッドは poll_sec ごとに起き、リーダーは interval_sec ごとに DB を参照する
+        super().__init__(model, interval_sec=poll_sec, overlap_sec=overlap_sec)
+        self._directory = directory
+        self._refresh_sec = interval_sec
+        self._lock_file = LeaderLock(directory)
+        self._tag: Optional[str] = None
+        self._refreshed_at: Optional[str] = None
+        self._next_refresh = 0.0
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_file.held
+
+    def refresh_once(self) -> Optional[CatalogSnapshot]:
+        if self._lock_file.try_acquire():
+            return self._refresh_as_leader()
+        return self._follow()
+
+    def _adopt(self, pointer: Optional[Dict[str, Any]]) -> Optional[CatalogSnapshot]:
+        if pointer is None:
+            return None
+        if pointer["tag"] != self._tag:
+            started = time.perf_counter()
+            snapshot = open_snapshot(self._directory, pointer)
+            if self.initial_load_sec is None:
+                self.initial_load_sec = round(time.perf_counter() - started, 3)
+            logger.info(
+                "shared catalog mapped tag=%s version=%s items=%s leader=%s",
+                pointer["tag"],
+                snapshot.version,
+                len(snapshot),
+                self.is_leader,
+            )
+        elif pointer["refreshedAt"] != self._refreshed_at and get_catalog() is not None:
+            snapshot = replace(
+                get_catalog(),
+                watermarks={k: _parse_timestamp(v) for k, v in pointer["watermarks"].items()},
+                refreshed_at=_parse_timestamp(pointer["refreshedAt"]) or datetime.now(timezone.utc),
+            )
+        else:
+            return get_catalog()
+        self._tag = pointer["tag"]
+        self._refreshed_at = pointer["refreshedAt"]
+        set_catalog(snapshot)
+        # リーダー引き継ぎ直後の DB 更新に失敗しても、公開済みの版で応答できる
+        self._loaded.set()
+        return snapshot
+
+    def _follow(self) -> Optional[CatalogSnapshot]:
+        return self._adopt(read_current(self._directory))
+
+    def _refresh_as_leader(self) -> Optional[CatalogSnapshot]:
+        prev = get_catalog()
+        if prev is None or self._tag is None:
+            # 引き継ぎ時は公開済みの版から差分更新を続ける（version も連番のまま）
+            prev = self._follow()
+        if prev is not None and time.monotonic() < self._next_refresh:
+            return prev
+        self._next_refresh = time.monotonic() + self._refresh_sec
+
+        db = get_apl_db()
+        if prev is None or prev.model != self._model:
+            started = time.perf_counter()
+            snapshot = load_catalog(db, self._model, version=prev.version + 1 if prev else 1)
+            self.initial_load_sec = round(time.perf_counter() - started, 3)
+        else:
+            snapshot = refresh_catalog(db, prev, self._overlap_sec)
+
+        if prev is not None and snapshot.version == prev.version and self._tag is not None:
+            touch_current(self._directory, self._tag, snapshot)
+        else:
+            publish_snapshot(self._directory, snapshot)
+        # 自分も公開した版を mmap で開き直し、ヒープ上の行列は解放する
+        return self._follow()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        super().stop(timeout)
+        self._lock_file.release()
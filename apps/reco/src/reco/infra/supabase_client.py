@@ -1,10 +1,147 @@
 import os
-from supabase import create_client, Client
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
 from dotenv import load_dotenv
+from postgrest import SyncPostgrestClient
+from supabase import Client, ClientOptions, create_client
 
 load_dotenv()
 
-def get_supabase_admin() -> Client:
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "10"))
+SUPABASE_KEEPALIVE_EXPIRY_SEC = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY_SEC", "60"))
+SUPABASE_TIMEOUT_SEC = float(os.getenv("SUPABASE_TIMEOUT_SEC", "30"))
+
+
+class PoolMetrics:
+    """プール済み HTTP クライアント経由のリクエスト数・エラー数・レイテンシ。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def on_request(self, request: httpx.Request) -> None:
+        request.extensions["reco_started_at"] = time.perf_counter()
+
+    def on_response(self, response: httpx.Response) -> None:
+        started = response.request.extensions.get("reco_started_at")
+        elapsed_ms = (time.perf_counter() - started) * 1000.0 if started else 0.0
+        with self._lock:
+            self.requests += 1
+            if response.status_code >= 400:
+                self.errors += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "avgMs": round(self.total_ms / self.requests, 3) if self.requests else 0.0,
+                "maxMs": round(self.max_ms, 3),
+            }
+
+
+_lock = threading.Lock()
+_metrics = PoolMetrics()
+_http_client: Optional[httpx.Client] = None
+_admin_client: Optional[Client] = None
+_apl_client: Optional[SyncPostgrestClient] = None
+
+
+def _credentials() -> tuple[str, str]:
     url = os.getenv("SUPABASE_URL")
     key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-    return create_client(url, key)
+    if not url or not key:
+        raise ValueError("SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY is not set")
+    return url, key
+
+
+def _get_http_client() -> httpx.Client:
+    # プロセス内で 1 つの接続プールを共有し、TLS 接続をリクエスト間で使い回す
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.Client(
+            timeout=SUPABASE_TIMEOUT_SEC,
+            http2=True,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=SUPABASE_POOL_SIZE,
+                max_keepalive_connections=SUPABASE_POOL_SIZE,
+                keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY_SEC,
+            ),
+            event_hooks={
+                "request": [_metrics.on_request],
+                "response": [_metrics.on_response],
+            },
+        )
+    return _http_client
+
+
+def get_supabase_admin() -> Client:
+    global _admin_client
+    with _lock:
+        if _admin_client is None:
+            url, key = _credentials()
+            _admin_client = create_client(
+                url, key, options=ClientOptions(httpx_client=_get_http_client())
+            )
+        return _admin_client
+
+
+def get_apl_db() -> SyncPostgrestClient:
+    """apl スキーマ用の PostgREST クライアント（共有接続プール）。
+
+    Client.schema() は呼び出しごとに新しい HTTP セッションを作るため、
+    スキーマを固定したクライアントを使い回す。
+    """
+    global _apl_client
+    with _lock:
+        if _apl_client is None:
+            url, key = _credentials()
+            _apl_client = SyncPostgrestClient(
+                f"{url.rstrip('/')}/rest/v1",
+                schema="apl",
+                headers={"apiKey": key, "Authorization": f"Bearer {key}"},
+                http_client=_get_http_client(),
+            )
+        return _apl_client
+
+
+def pool_stats() -> Dict[str, Any]:
+    stats = _metrics.snapshot()
+    stats["poolSize"] = SUPABASE_POOL_SIZE
+    client = _http_client
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    stats["openConnections"] = len(connections) if connections is not None else 0
+    return stats
+
+
+def check_health() -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        get_apl_db().table("item_features").select("item_id").limit(1).execute()
+    except Exception as e:
+        return {
+            "ok": False,
+            "latencyMs": round((time.perf_counter() - started) * 1000.0, 3),
+            "error": str(e),
+        }
+    return {"ok": True, "latencyMs": round((time.perf_counter() - started) * 1000.0, 3)}
+
+
+def close_clients() -> None:
+    global _http_client, _admin_client, _apl_client
+    with _lock:
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = None
+        _admin_client = None
+        _apl_client = None
@@ -0,0 +1,166 @@
+import base64
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from postgrest import SyncPostgrestClient
+
+# PostgREST の max-rows（Supabase 既定 1000）以下に揃える
+PAGE_SIZE = 1000
+# PostgREST の URL 長制限を回避するため、in_ フィルタは 100 件ずつ
+ID_BATCH_SIZE = 100
+
+ITEM_COLUMNS = "id, item_name, item_url, affiliate_url, is_active, updated_at"
+FEATURE_COLUMNS = (
+    "item_id, price_yen, rank, popularity_score, review_average, "
+    "review_count, tag_ids, updated_at"
+)
+
+
+def fetch_item_features_page(
+    db: SyncPostgrestClient,
+    offset: int,
+    updated_since: Optional[str] = None,
+    limit: int = PAGE_SIZE,
+) -> List[Dict[str, Any]]:
+    query = (
+        db.table("item_features")
+        .select(f"{FEATURE_COLUMNS}, item: item_id!inner ({ITEM_COLUMNS})")
+    )
+    if updated_since is None:
+        query = query.eq("item.is_active", True)
+    else:
+        query = query.gte("updated_at", updated_since)
+    resp = query.order("item_id").range(offset, offset + limit - 1).execute()
+    return resp.data or []
+
+
+def fetch_item_features_by_ids(db: SyncPostgrestClient, item_ids: Sequence[str]) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for i in range(0, len(item_ids), ID_BATCH_SIZE):
+        batch = list(item_ids[i : i + ID_BATCH_SIZE])
+        resp = (
+            db.table("item_features")
+            .select(f"{FEATURE_COLUMNS}, item: item_id!inner ({ITEM_COLUMNS})")
+            .in_("item_id", batch)
+            .execute()
+        )
+        rows.extend(resp.data or [])
+    return rows
+
+
+def fetch_items_updated_page(
+    db: SyncPostgrestClient,
+    updated_since: str,
+    offset: int,
+    limit: int = PAGE_SIZE,
+) -> List[Dict[str, Any]]:
+    resp = (
+        db.table("item")
+        .select(ITEM_COLUMNS)
+        .gte("updated_at", updated_since)
+        .order("id")
+        .range(offset, offset + limit - 1)
+        .execute()
+    )
+    return resp.data or []
+
+
+def fetch_item_embeddings_page(
+    db: SyncPostgrestClient,
+    model: str,
+    offset: int,
+    updated_since: Optional[str] = None,
+    limit: int = PAGE_SIZE,
+) -> List[Dict[str, Any]]:
+    query = (
+        db.table("item_embedding")
+        .select("item_id, embedding, updated_at, item: item_id!inner (is_active)")
+        .eq("model", model)
+    )
+    if updated_since is None:
+        query = query.eq("item.is_active", True)
+    else:
+        query = query.gte("updated_at", updated_since)
+    resp = query.order("item_id").range(offset, offset + limit - 1).execute()
+    return resp.data or []
+
+
+def fetch_item_embeddings_by_ids(
+    db: SyncPostgrestClient,
+    model: str,
+    item_ids: Sequence[str],
+) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for i in range(0, len(item_ids), ID_BATCH_SIZE):
+        batch = list(item_ids[i : i + ID_BATCH_SIZE])
+        resp = (
+            db.table("item_embedding")
+            .select("item_id, embedding, updated_at")
+            .eq("model", model)
+            .in_("item_id", batch)
+            .execute()
+        )
+        rows.extend(resp.data or [])
+    return rows
+
+
+def decode_embedding_b64(value: Optional[str]) -> Optional[np.ndarray]:
+    """float4send を連結した base64（ビッグエンディアン float32）を復元する。"""
+    if not value:
+        return None
+    raw = base64.b64decode(value)
+    if not raw or len(raw) % 4:
+        return None
+    return np.frombuffer(raw, dtype=">f4").astype(np.float32)
+
+
+def fetch_reco_candidates(
+    db: SyncPostgrestClient,
+    model: str,
+    budget_min: Optional[int],
+    budget_max: Optional[int],
+) -> List[Dict[str, Any]]:
+    """apl.reco_candidates RPC で予算内の features / 商品詳細 / embedding を 1 往復で取得する。
+
+    関数は jsonb 配列 1 値を返すため、PostgREST の max-rows による切り詰めは受けない。
+    embedding は float32 の base64 で受け取り、行の "embedding" に ndarray で格納する。
+    """
+    resp = db.rpc(
+        "reco_candidates",
+        {"p_model": model, "p_budget_min": budget_min, "p_budget_max": budget_max},
+    ).execute()
+    rows: List[Dict[str, Any]] = []
+    for row in resp.data or []:
+        row["embedding"] = decode_embedding_b64(row.pop("embedding_b64", None))
+        rows.append(row)
+    return rows
+
+
+def format_vector(values: Sequence[float]) -> str:
+    """pgvector の入力形式（'[x,y,...]'）に変換する。"""
+    return "[" + ",".join(f"{float(value):.8f}" for value in values) + "]"
+
+
+def search_item_vectors(
+    db: SyncPostgrestClient,
+    model: str,
+    query: Sequence[float],
+    k: int,
+    budget_min: Optional[int],
+    budget_max: Optional[int],
+) -> List[Dict[str, Any]]:
+    """apl.reco_vector_search RPC で DB 側の pgvector 検索を行い、上位 k 件を返す。
+
+    行は features + 商品詳細 + vector_score（1 - cosine 距離）で、embedding は含まない。
+    """
+    resp = db.rpc(
+        "reco_vector_search",
+        {
+            "p_model": model,
+            "p_query": format_vector(query),
+            "p_k": k,
+            "p_budget_min": budget_min,
+            "p_budget_max": budget_max,
+        },
+    ).execute()
+    return resp.data or []
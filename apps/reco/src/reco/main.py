@@ -1,14 +1,35 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Dict, Optional
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 
-from reco.api.handlers import recommend
-from reco.api.schemas import RecommendationRequest, RecommendationResponse
+from reco.api.handlers import (
+    RETRIEVAL_MODE,
+    get_response_cache,
+    recommend_batch_async,
+    recommend_cached_async,
+    shape_response,
+)
+from reco.api.schemas import (
+    ContextVectorFormat,
+    RecommendationBatchRequest,
+    RecommendationBatchResponse,
+    RecommendationRequest,
+    RecommendationResponse,
+)
+from reco.api.warmup import get_warmup_state, is_ready, run_warmup
+from reco.infra.catalog import CatalogRefresher, get_catalog
+from reco.infra.embedding_client import DEFAULT_EMBEDDING_MODEL, close_async_client, get_embedding_cache
+from reco.infra.metrics import StageTimer, render_prometheus, request_timer, stage
+from reco.infra.shared_catalog import SHARED_CATALOG_DIR, SharedCatalogRefresher
+from reco.infra.supabase_client import check_health, close_clients, pool_stats
 
 # apps/reco/.env を読み込む（実行ディレクトリに依存しない）
 _env_path = Path(__file__).resolve().parents[2] / ".env"
@@ -22,7 +43,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Reco Service", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # カタログ（features / 商品詳細 / embedding）をバックグラウンドで読み込み、以降は差分更新する
+    # 読み込み完了までは、リクエストごとの DB 取得にフォールバックする
+    # RECO_CATALOG_SHARED_DIR 設定時は 1 ワーカーだけが読み込み、他のワーカーは mmap で共有する
+    refresher: Optional[CatalogRefresher] = None
+    if RETRIEVAL_MODE == "catalog":
+        if SHARED_CATALOG_DIR:
+            refresher = SharedCatalogRefresher(DEFAULT_EMBEDDING_MODEL, SHARED_CATALOG_DIR)
+        else:
+            refresher = CatalogRefresher(DEFAULT_EMBEDDING_MODEL)
+    if refresher is not None:
+        refresher.start()
+    app.state.refresher = refresher
+    # ウォームアップは起動をブロックしない（完了までは /ready が 503 を返す）
+    warmup_task = asyncio.create_task(run_warmup(refresher))
+    yield
+    warmup_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await warmup_task
+    if refresher is not None:
+        refresher.stop(timeout=5.0)
+    await close_async_client()
+    # write-behind 中の embedding キャッシュを SQLite に書き終えてから終了する
+    await asyncio.to_thread(get_embedding_cache().flush)
+    close_clients()
+
+
+app = FastAPI(title="Reco Service", version="0.1.0", lifespan=lifespan)
 
 
 @app.exception_handler(Exception)
@@ -46,19 +96,128 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Reco-Cache"],
 )
 
 # ------------------------------------------------------------
 # Endpoints
 # ------------------------------------------------------------
 @app.get("/health")
-def health():
-    return {
+def health(deep: bool = False):
+    snapshot = get_catalog()
+    body = {
         "status": "ok",
         "service": "reco",
         "timestamp": datetime.now(timezone.utc).isoformat(),
+        "retrievalMode": RETRIEVAL_MODE,
+        "catalog": snapshot.summary() if snapshot else None,
+        "embeddingCache": get_embedding_cache().stats(),
+        "responseCache": get_response_cache().stats(),
+        "supabasePool": pool_stats(),
+    }
+    if deep:
+        # DB への疎通確認（ロードバランサの定期チェックでは使わない）
+        body["supabase"] = check_health()
+    return body
+
+
+@app.get("/ready")
+def ready():
+    """ウォームアップ完了（catalog モードではカタログ読込済み）なら 200、それ以外は 503。
+
+    ロードバランサはこちらをチェックし、起動直後のインスタンスにトラフィックを流さない。
+    """
+    refresher = app.state.refresher
+    snapshot = get_catalog()
+    ok = is_ready(refresher)
+    body = {
+        "status": "ready" if ok else "warming",
+        "service": "reco",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "retrievalMode": RETRIEVAL_MODE,
+        "catalog": {
+            "version": snapshot.version,
+            "items": len(snapshot),
+            "loadSec": refresher.initial_load_sec if refresher else None,
+        }
+        if snapshot
+        else None,
+        "warmup": get_warmup_state().snapshot(),
     }
+    return JSONResponse(status_code=200 if ok else 503, content=body)
 
+
+@app.get("/metrics")
+def metrics():
+    """ステージ別レイテンシ・行数のヒストグラムとキャッシュ / カタログの状態（Prometheus text format）。"""
+    snapshot = get_catalog()
+    embedding_cache = get_embedding_cache().stats()
+    response_cache = get_response_cache().stats()
+    pool = pool_stats()
+    gauges = {
+        "reco_catalog_version": snapshot.version if snapshot else 0,
+        "reco_catalog_items": len(snapshot) if snapshot else 0,
+        "reco_catalog_age_seconds": snapshot.age_seconds() if snapshot else 0,
+        "reco_embedding_cache_hits": embedding_cache["hits"],
+        "reco_embedding_cache_misses": embedding_cache["misses"],
+        "reco_response_cache_hits": response_cache["hits"],
+        "reco_response_cache_misses": response_cache["misses"],
+        "reco_supabase_requests": pool["requests"],
+        "reco_supabase_errors": pool["errors"],
+        "reco_supabase_open_connections": pool["openConnections"],
+    }
+    return PlainTextResponse(render_prometheus(gauges), media_type="text/plain; version=0.0.4")
+
+
+def _render(body: Dict[str, Any], timer: StageTimer, timings: bool, headers: Optional[Dict[str, str]] = None):
+    with stage("serialize"):
+        if timings:
+            body["timings"] = timer.snapshot()
+        return ORJSONResponse(body, headers=headers)
+
+
+# レスポンスは組み立て済みのモデルなので、response_model による再検証と jsonable_encoder を通さず
+# model_dump + orjson で直接シリアライズする（response_model は OpenAPI 定義用）
+# timings=true でステージ別の所要時間をレスポンスに含める（調査用）
 @app.post("/recommendations", response_model=RecommendationResponse)
-def recommendations(req: RecommendationRequest):
-    return recommend(req)
+async def recommendations(
+    req: RecommendationRequest,
+    contextVector: ContextVectorFormat = "full",
+    timings: bool = False,
+):
+    with request_timer("recommendations") as timer:
+        result, cache_status = await recommend_cached_async(req)
+        response = _render(
+            shape_response(result, contextVector).model_dump(),
+            timer,
+            timings,
+            headers={"X-Reco-Cache": cache_status},
+        )
+    logger.info(
+        "recommendation timings request_id=%s cache=%s total=%.1fms %s",
+        result.requestId,
+        cache_status,
+        timer.elapsed() * 1000.0,
+        timer.summary(),
+    )
+    return response
+
+
+@app.post("/recommendations:batch", response_model=RecommendationBatchResponse)
+async def recommendations_batch(
+    req: RecommendationBatchRequest,
+    contextVector: ContextVectorFormat = "full",
+    timings: bool = False,
+):
+    # 同じコンテキストの複数 mode をまとめて処理し、embedding と候補検索を共有する
+    with request_timer("recommendations_batch") as timer:
+        result = await recommend_batch_async(req)
+        results = [shape_response(r, contextVector) for r in result.results]
+        response = _render(RecommendationBatchResponse(results=results).model_dump(), timer, timings)
+    logger.info(
+        "recommendation batch timings request_ids=%s total=%.1fms %s",
+        ",".join(r.requestId for r in results),
+        timer.elapsed() * 1000.0,
+        timer.summary(),
+    )
+    return response
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "src"))
+
+from reco.infra import catalog  # noqa: E402
+
+MODEL = "text-embedding-3-small"
+DIM = 8
+
+
+class FakeCatalogDb:
+    """apl.item / item_features / item_embedding を保持し、supabase_repo の取得関数を置き換える。
+
+    書き込むたびに updated_at を 1 秒ずつ進める（差分取得の watermark 判定に使う）。
+    """
+
+    def __init__(self, n: int = 40, seed: int = 0) -> None:
+        self._rng = np.random.default_rng(seed)
+        self._now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.features: Dict[str, Dict[str, Any]] = {}
+        self.embeddings: Dict[str, Dict[str, Any]] = {}
+        for i in range(n):
+            self.add_item(f"item-{i:04d}", price_yen=None if i % 9 == 0 else 500 + 250 * i)
+
+    def _tick(self) -> str:
+        self._now += timedelta(seconds=1)
+        return self._now.isoformat()
+
+    def add_item(self, item_id: str, *, price_yen: Optional[int] = 1000, active: bool = True) -> None:
+        self.items[item_id] = {
+            "id": item_id,
+            "item_name": f"name-{item_id}",
+            "item_url": f"https://example.com/{item_id}",
+            "affiliate_url": None,
+            "is_active": active,
+            "updated_at": self._tick(),
+        }
+        self.features[item_id] = {
+            "item_id": item_id,
+            "price_yen": price_yen,
+            "rank": int(self._rng.integers(1, 100)),
+            "popularity_score": float(self._rng.random()),
+            "review_average": float(self._rng.random() * 5),
+            "review_count": int(self._rng.integers(0, 500)),
+            "tag_ids": [int(t) for t in self._rng.integers(1000, 1010, size=3)],
+            "updated_at": self._tick(),
+        }
+        self.set_embedding(item_id, self._rng.normal(size=DIM).tolist())
+
+    def set_embedding(self, item_id: str, vector: List[float]) -> None:
+        self.embeddings[item_id] = {"item_id": item_id, "embedding": vector, "updated_at": self._tick()}
+
+    def update_features(self, item_id: str, **values: Any) -> None:
+        self.features[item_id].update(values, updated_at=self._tick())
+
+    def set_active(self, item_id: str, active: bool) -> None:
+        self.items[item_id].update(is_active=active, updated_at=self._tick())
+
+    # --- supabase_repo と同じシグネチャ（db 引数は無視する） ---
+
+    def _feature_row(self, item_id: str) -> Dict[str, Any]:
+        return {**self.features[item_id], "item": dict(self.items[item_id])}
+
+    @staticmethod
+    def _page(rows: List[Dict[str, Any]], offset: int, limit: int) -> List[Dict[str, Any]]:
+        return rows[offset : offset + limit]
+
+    @staticmethod
+    def _since(row: Dict[str, Any], updated_since: str) -> bool:
+        return datetime.fromisoformat(row["updated_at"]) >= datetime.fromisoformat(updated_since)
+
+    def fetch_item_features_page(self, db, offset, updated_since=None, limit=1000):
+        rows = [self._feature_row(i) for i in sorted(self.features)]
+        if updated_since is None:
+            rows = [r for r in rows if r["item"]["is_active"]]
+        else:
+            rows = [r for r in rows if self._since(r, updated_since)]
+        return self._page(rows, offset, limit)
+
+    def fetch_item_features_by_ids(self, db, item_ids):
+        return [self._feature_row(i) for i in item_ids if i in self.features]
+
+    def fetch_items_updated_page(self, db, updated_since, offset, limit=1000):
+        rows = [dict(self.items[i]) for i in sorted(self.items) if self._since(self.items[i], updated_since)]
+        return self._page(rows, offset, limit)
+
+    def fetch_item_embeddings_page(self, db, model, offset, updated_since=None, limit=1000):
+        rows = [
+            {**self.embeddings[i], "item": {"is_active": self.items[i]["is_active"]}}
+            for i in sorted(self.embeddings)
+        ]
+        if updated_since is None:
+            rows = [r for r in rows if r["item"]["is_active"]]
+        else:
+            rows = [r for r in rows if self._since(r, updated_since)]
+        return self._page(rows, offset, limit)
+
+    def fetch_item_embeddings_by_ids(self, db, model, item_ids):
+        return [dict(self.embeddings[i]) for i in item_ids if i in self.embeddings]
+
+
+@pytest.fixture
+def catalog_db(monkeypatch) -> FakeCatalogDb:
+    db = FakeCatalogDb()
+    for name in (
+        "fetch_item_features_page",
+        "fetch_item_features_by_ids",
+        "fetch_items_updated_page",
+        "fetch_item_embeddings_page",
+        "fetch_item_embeddings_by_ids",
+    ):
+        monkeypatch.setattr(catalog, name, getattr(db, name))
+    return db
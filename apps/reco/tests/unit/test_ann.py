@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "src"))
+
+from reco.core.ann import QUANTIZED_SCAN_CHUNK, ExactIndex, QuantizedMatrix, build_index  # noqa: E402
+
+
+def _matrix(n: int = QUANTIZED_SCAN_CHUNK * 2 + 37, dim: int = 16, seed: int = 0) -> np.ndarray:
+    matrix = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def _dequantized(quantized: QuantizedMatrix) -> np.ndarray:
+    values = np.asarray(quantized.codes, dtype=np.float32)
+    return values * quantized.scales[:, None] if quantized.scales is not None else values
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("kind", ["float16", "int8"])
+def test_quantized_scores_match_dequantized_dot(kind) -> None:
+    matrix = _matrix()
+    query = matrix[3]
+    quantized = QuantizedMatrix.quantize(matrix, kind)
+    expected = _dequantized(quantized) @ query
+
+    # チャンク境界をまたぐ範囲・行番号の指定でも、全体を展開した場合と同じ値になる
+    np.testing.assert_allclose(quantized.scores(0, len(matrix), query), expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(quantized.scores(100, 290, query), expected[100:290], rtol=1e-5, atol=1e-6)
+    rows = np.array([0, 5, 127, 128, 129, 250, 292])
+    np.testing.assert_allclose(quantized.scores_at(rows, query), expected[rows], rtol=1e-5, atol=1e-6)
+    assert quantized.scores(10, 10, query).size == 0
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("kind", ["float16", "int8"])
+def test_rescored_search_matches_exact_top_k(kind) -> None:
+    matrix = _matrix()
+    exact = ExactIndex(matrix)
+    index = build_index(matrix, "exact", quantization=kind, rescore=4)
+
+    for query in matrix[:5]:
+        want_rows, want_scores = exact.search(query, 10, 20, 250)
+        got_rows, got_scores = index.search(query, 10, 20, 250)
+        np.testing.assert_array_equal(got_rows, want_rows)
+        np.testing.assert_allclose(got_scores, want_scores)
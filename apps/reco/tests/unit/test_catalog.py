@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "src"))
+
+from reco.infra import catalog  # noqa: E402
+from reco.infra.catalog import CatalogSnapshot, load_catalog, refresh_catalog  # noqa: E402
+
+MODEL = "text-embedding-3-small"
+# conftest の FakeCatalogDb と同じ次元
+QUERY = np.linspace(-1.0, 1.0, 8).tolist()
+BUDGETS = [(None, None), (1000, 5000), (None, 3000), (6000, None)]
+
+
+def _assert_same(refreshed: CatalogSnapshot, loaded: CatalogSnapshot) -> None:
+    assert refreshed.features == loaded.features
+    assert refreshed.embeddings.item_ids == loaded.embeddings.item_ids
+    np.testing.assert_allclose(refreshed.embeddings.matrix, loaded.embeddings.matrix)
+    np.testing.assert_array_equal(refreshed.row_prices, loaded.row_prices)
+    np.testing.assert_array_equal(refreshed.feature_prices, loaded.feature_prices)
+    for budget_min, budget_max in BUDGETS:
+        got = refreshed.search(QUERY, budget_min, budget_max, 10)
+        want = loaded.search(QUERY, budget_min, budget_max, 10)
+        assert [r["item_id"] for r in got] == [r["item_id"] for r in want]
+
+
+@pytest.mark.unit
+def test_refresh_without_changes_keeps_version(catalog_db) -> None:
+    prev = load_catalog(None, MODEL)
+
+    snapshot = refresh_catalog(None, prev)
+
+    assert snapshot.version == prev.version
+    assert snapshot.embeddings is prev.embeddings
+
+
+@pytest.mark.unit
+def test_refresh_matches_full_load_after_insert(catalog_db) -> None:
+    prev = load_catalog(None, MODEL)
+
+    catalog_db.add_item("item-new", price_yen=3333)
+    snapshot = refresh_catalog(None, prev)
+
+    assert snapshot.version == prev.version + 1
+    assert "item-new" in snapshot.features
+    _assert_same(snapshot, load_catalog(None, MODEL))
+
+
+@pytest.mark.unit
+def test_refresh_matches_full_load_after_update(catalog_db) -> None:
+    prev = load_catalog(None, MODEL)
+
+    # 価格の変更は行の並び順（予算範囲）に、embedding の変更は検索結果に反映される
+    catalog_db.update_features("item-0003", price_yen=99999)
+    catalog_db.set_embedding("item-0005", QUERY)
+    snapshot = refresh_catalog(None, prev)
+
+    assert snapshot.search(QUERY, None, None, 1)[0]["item_id"] == "item-0005"
+    _assert_same(snapshot, load_catalog(None, MODEL))
+
+
+@pytest.mark.unit
+def test_refresh_matches_full_load_after_deactivate_and_reactivate(catalog_db) -> None:
+    prev = load_catalog(None, MODEL)
+
+    catalog_db.set_active("item-0002", False)
+    deactivated = refresh_catalog(None, prev)
+
+    assert "item-0002" not in deactivated.features
+    assert "item-0002" not in deactivated.embeddings.row_of
+    _assert_same(deactivated, load_catalog(None, MODEL))
+
+    catalog_db.set_active("item-0002", True)
+    reactivated = refresh_catalog(None, deactivated)
+
+    assert "item-0002" in reactivated.embeddings.row_of
+    _assert_same(reactivated, load_catalog(None, MODEL))
+
+
+@pytest.mark.unit
+def test_quantized_catalog_rescores_from_spilled_matrix(catalog_db, monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(catalog, "EMBEDDING_QUANTIZATION", "int8")
+    monkeypatch.setattr(catalog, "EMBEDDING_SPILL_DIR", str(tmp_path))
+    prev = load_catalog(None, MODEL)
+
+    # float32 はファイルの mmap（ヒープに二重に持たない）。ファイル自体は開いた直後に削除される
+    assert isinstance(prev.embeddings.matrix, np.memmap)
+    assert prev.index.matrix is prev.embeddings.matrix
+    assert prev.index.quantized is not None
+    assert list(tmp_path.iterdir()) == []
+
+    catalog_db.add_item("item-new", price_yen=3333)
+    snapshot = refresh_catalog(None, prev)
+
+    assert isinstance(snapshot.embeddings.matrix, np.memmap)
+    _assert_same(snapshot, load_catalog(None, MODEL))
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "src"))
+
+from reco.infra import embedding_cache, embedding_client  # noqa: E402
+from reco.infra.embedding_cache import EmbeddingCache  # noqa: E402
+
+
+class FakeTime:
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def wall_clock(monkeypatch) -> FakeTime:
+    clock = FakeTime(1_000_000.0)
+    monkeypatch.setattr(embedding_cache.time, "time", clock.time)
+    return clock
+
+
+def _write_through(path: str, model: str, text: str, vector) -> None:
+    cache = EmbeddingCache(max_size=10, ttl_sec=100.0, path=path)
+    cache.put(model, text, vector)
+    cache.flush()
+
+
+@pytest.mark.unit
+def test_disk_hit_keeps_remaining_ttl(tmp_path, wall_clock) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    _write_through(path, "m", "text", [0.5, 0.25])
+
+    # 再起動後（メモリは空）、ディスクの行は書き込みから 90 秒経過している
+    wall_clock.now += 90.0
+    cache = EmbeddingCache(max_size=10, ttl_sec=100.0, path=path)
+    ttls = []
+    put = cache._memory.put
+    cache._memory.put = lambda key, value, ttl_sec=None: (ttls.append(ttl_sec), put(key, value, ttl_sec))
+
+    assert cache.get("m", "text") == [0.5, 0.25]
+    assert ttls == [pytest.approx(10.0)]
+    assert cache.stats()["diskHits"] == 1
+
+
+@pytest.mark.unit
+def test_expired_disk_entry_is_a_miss(tmp_path, wall_clock) -> None:
+    path = str(tmp_path / "cache.sqlite3")
+    _write_through(path, "m", "text", [0.5])
+
+    wall_clock.now += 100.0
+    cache = EmbeddingCache(max_size=10, ttl_sec=100.0, path=path)
+
+    assert cache.get("m", "text") is None
+    assert cache.stats()["diskHits"] == 0
+
+
+class RecordingStore:
+    """SqliteEmbeddingStore を包み、呼ばれたスレッドを記録する。"""
+
+    def __init__(self, store) -> None:
+        self._store = store
+        self.threads = []
+
+    def get(self, key, ttl_sec):
+        self.threads.append(("get", threading.current_thread().name))
+        return self._store.get(key, ttl_sec)
+
+    def put(self, key, model, vector):
+        self.threads.append(("put", threading.current_thread().name))
+        self._store.put(key, model, vector)
+
+
+class FakeResponse:
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self):
+        return {"data": [{"embedding": [0.1, 0.2]}]}
+
+
+class FakeAsyncClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def post(self, url, json, headers):
+        self.calls += 1
+        return FakeResponse()
+
+
+@pytest.mark.unit
+def test_embed_text_async_keeps_sqlite_off_the_event_loop(tmp_path, monkeypatch) -> None:
+    cache = EmbeddingCache(max_size=10, ttl_sec=100.0, path=str(tmp_path / "cache.sqlite3"))
+    store = RecordingStore(cache._store)
+    cache._store = store
+    client = FakeAsyncClient()
+    monkeypatch.setattr(embedding_client, "_cache", cache)
+    monkeypatch.setattr(embedding_client, "_get_async_client", lambda: client)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+
+    loop_thread = threading.current_thread().name
+    assert asyncio.run(embedding_client.embed_text_async("text", "m")) == [0.1, 0.2]
+    cache.flush()
+
+    # ミス時の読み出しも書き込みもイベントループのスレッドでは行わない
+    assert [op for op, _ in store.threads] == ["get", "put"]
+    assert all(thread != loop_thread for _, thread in store.threads)
+
+    # 2 回目はメモリで解決し、API もディスクも参照しない
+    assert asyncio.run(embedding_client.embed_text_async("text", "m")) == [0.1, 0.2]
+    assert client.calls == 1
+    assert len(store.threads) == 2
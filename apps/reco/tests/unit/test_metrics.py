@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "src"))
+
+from reco.infra.metrics import (  # noqa: E402
+    Histogram,
+    metrics_suppressed,
+    render_prometheus,
+    request_timer,
+    stage,
+)
+
+
+def _samples(text: str):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+@pytest.mark.unit
+def test_histogram_renders_cumulative_buckets() -> None:
+    histogram = Histogram("test_seconds", "Test.", "stage", (0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe("score", value)
+
+    assert histogram.render() == [
+        "# HELP test_seconds Test.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="score",le="0.1"} 1',
+        'test_seconds_bucket{stage="score",le="1"} 2',
+        'test_seconds_bucket{stage="score",le="+Inf"} 3',
+        'test_seconds_sum{stage="score"} 5.550000',
+        'test_seconds_count{stage="score"} 3',
+    ]
+
+
+@pytest.mark.unit
+def test_render_prometheus_includes_recorded_stage() -> None:
+    before = _samples(render_prometheus())
+
+    with request_timer("test_endpoint") as timer:
+        with stage("test_stage") as s:
+            s.rows = 42
+
+    text = render_prometheus({"reco_test_gauge": 3})
+    after = _samples(text)
+    count = 'reco_stage_duration_seconds_count{stage="test_stage"}'
+    assert after[count] == before.get(count, 0) + 1
+    assert after['reco_stage_rows_bucket{stage="test_stage",le="50"}'] >= 1
+    assert after['reco_stage_rows_bucket{stage="test_stage",le="10"}'] == before.get(
+        'reco_stage_rows_bucket{stage="test_stage",le="10"}', 0
+    )
+    assert after['reco_request_duration_seconds_count{endpoint="test_endpoint"}'] >= 1
+    assert "# TYPE reco_test_gauge gauge\nreco_test_gauge 3\n" in text
+    assert timer.snapshot()["stages"]["test_stage"]["rows"] == 42
+
+
+@pytest.mark.unit
+def test_suppressed_stages_are_not_recorded() -> None:
+    before = _samples(render_prometheus())
+
+    with metrics_suppressed():
+        with request_timer("test_suppressed") as timer:
+            with stage("test_suppressed_stage") as s:
+                s.rows = 1
+
+    after = _samples(render_prometheus())
+    assert after == before
+    # リクエスト単位の内訳（ログ・レスポンスヘッダ用）は記録する
+    assert "test_suppressed_stage" in timer.snapshot()["stages"]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "src"))
+
+from reco.api import handlers  # noqa: E402
+from reco.api.schemas import RecommendationRequest, RecommendationResponse  # noqa: E402
+from reco.infra.response_cache import ResponseCache, request_key  # noqa: E402
+
+
+@pytest.mark.unit
+def test_miss_hit_and_invalidate_on_version_bump() -> None:
+    cache: ResponseCache[str] = ResponseCache(max_size=10, ttl_sec=60.0)
+
+    assert cache.get("k", 1) is None
+    cache.put("k", 1, "v1")
+    assert cache.get("k", 1) == "v1"
+
+    # カタログ更新で version が変わると全エントリを破棄する
+    assert cache.get("k", 2) is None
+    assert cache.stats()["invalidations"] == 1
+    assert cache.stats()["version"] == 2
+
+
+@pytest.mark.unit
+def test_put_with_stale_version_is_ignored() -> None:
+    cache: ResponseCache[str] = ResponseCache(max_size=10, ttl_sec=60.0)
+    cache.get("k", 2)
+
+    # version 1 のスナップショットで計算した結果は、version 2 に切り替わった後は保存しない
+    cache.put("k", 1, "stale")
+
+    assert cache.get("k", 2) is None
+
+
+@pytest.mark.unit
+def test_request_key_ignores_deprecated_fields() -> None:
+    a = RecommendationRequest(mode="balanced", eventName="誕生日", eventId="e1")
+    b = RecommendationRequest(mode="balanced", eventName="誕生日", eventId="e2")
+    c = RecommendationRequest(mode="popular", eventName="誕生日")
+
+    assert request_key(a, "m") == request_key(b, "m")
+    assert request_key(a, "m") != request_key(c, "m")
+    assert request_key(a, "m") != request_key(a, "other-model")
+
+
+@pytest.mark.unit
+def test_cached_recommendation_gets_fresh_request_id(monkeypatch) -> None:
+    computed = []
+    snapshot = SimpleNamespace(version=1)
+
+    async def fake_recommend(req, snap=None):
+        computed.append(snap.version)
+        return RecommendationResponse.model_construct(
+            requestId=f"computed-{len(computed)}", context={}, resolved=None, items=[], generatedAt=""
+        )
+
+    monkeypatch.setattr(handlers, "_response_cache", ResponseCache(max_size=10, ttl_sec=60.0))
+    monkeypatch.setattr(handlers, "_current_snapshot", lambda: snapshot)
+    monkeypatch.setattr(handlers, "recommend_async", fake_recommend)
+    req = RecommendationRequest(mode="balanced", eventName="誕生日")
+
+    first, first_status = asyncio.run(handlers.recommend_cached_async(req))
+    second, second_status = asyncio.run(handlers.recommend_cached_async(req))
+    third, third_status = asyncio.run(handlers.recommend_cached_async(req))
+
+    assert (first_status, second_status, third_status) == ("MISS", "HIT", "HIT")
+    assert first.requestId == "computed-1"
+    assert second.requestId not in ("computed-1", third.requestId)
+    assert computed == [1]
+
+    snapshot.version = 2
+    refreshed, status = asyncio.run(handlers.recommend_cached_async(req))
+
+    assert status == "MISS"
+    assert refreshed.requestId == "computed-2"
+    assert computed == [1, 2]
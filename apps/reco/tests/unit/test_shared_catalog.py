@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "src"))
+
+from reco.infra import catalog, shared_catalog  # noqa: E402
+from reco.infra.catalog import load_catalog  # noqa: E402
+from reco.infra.shared_catalog import (  # noqa: E402
+    MappedFeatures,
+    SharedCatalogRefresher,
+    open_snapshot,
+    publish_snapshot,
+    read_current,
+)
+
+MODEL = "text-embedding-3-small"
+# conftest の FakeCatalogDb と同じ次元
+QUERY = np.linspace(-1.0, 1.0, 8).tolist()
+BUDGETS = [(None, None), (1000, 5000), (None, 3000), (6000, None)]
+
+
+@pytest.fixture(autouse=True)
+def reset_catalog():
+    yield
+    catalog.set_catalog(None)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "ann_index, quantization",
+    [("exact", "none"), ("ivf", "none"), ("exact", "int8"), ("ivf", "float16")],
+)
+def test_open_snapshot_matches_published(tmp_path, monkeypatch, catalog_db, ann_index, quantization) -> None:
+    monkeypatch.setattr(catalog, "ANN_INDEX", ann_index)
+    monkeypatch.setattr(catalog, "IVF_NLIST", 4)
+    monkeypatch.setattr(catalog, "EMBEDDING_QUANTIZATION", quantization)
+    snapshot = load_catalog(None, MODEL)
+
+    publish_snapshot(str(tmp_path), snapshot)
+    opened = open_snapshot(str(tmp_path), read_current(str(tmp_path)))
+
+    assert isinstance(opened.features, MappedFeatures)
+    assert isinstance(opened.embeddings.matrix, np.memmap)
+    assert opened.index.kind == snapshot.index.kind
+    assert dict(opened.features) == dict(snapshot.features)
+    assert opened.embeddings.item_ids == snapshot.embeddings.item_ids
+    assert opened.watermarks == snapshot.watermarks
+    for budget_min, budget_max in BUDGETS:
+        assert opened.count_in_budget(budget_min, budget_max) == snapshot.count_in_budget(budget_min, budget_max)
+        got = opened.search(QUERY, budget_min, budget_max, 10)
+        want = snapshot.search(QUERY, budget_min, budget_max, 10)
+        assert [(r["item_id"], r["vector_score"]) for r in got] == [
+            (r["item_id"], r["vector_score"]) for r in want
+        ]
+        assert [r["item"] for r in got] == [r["item"] for r in want]
+
+
+@pytest.mark.unit
+def test_mapped_features_lookup(tmp_path) -> None:
+    features = {"b": {"item_id": "b", "tag_ids": [1, 2]}, "a": {"item_id": "a", "tag_ids": []}}
+    MappedFeatures.save(tmp_path, features)
+    mapped = MappedFeatures.open(tmp_path)
+
+    assert len(mapped) == 2
+    assert list(mapped) == ["a", "b"]
+    assert mapped["b"] == {"item_id": "b", "tag_ids": [1, 2]}
+    assert "a" in mapped and "c" not in mapped
+    with pytest.raises(KeyError):
+        mapped["c"]
+
+    MappedFeatures.save(tmp_path, {})
+    assert len(MappedFeatures.open(tmp_path)) == 0
+
+
+@pytest.mark.unit
+def test_leader_publishes_and_follower_adopts(tmp_path, monkeypatch, catalog_db) -> None:
+    monkeypatch.setattr(shared_catalog, "get_apl_db", lambda: None)
+    directory = str(tmp_path)
+    leader = SharedCatalogRefresher(MODEL, directory, interval_sec=0.0)
+    follower = SharedCatalogRefresher(MODEL, directory, interval_sec=0.0)
+
+    first = leader.refresh_once()
+    assert leader.is_leader
+    assert follower.refresh_once().version == first.version
+    assert not follower.is_leader
+
+    catalog_db.add_item("item-new", price_yen=4321)
+    second = leader.refresh_once()
+    followed = follower.refresh_once()
+    assert second.version == first.version + 1
+    assert followed.version == second.version
+    assert "item-new" in followed.features
+
+    # リーダーが終了すると、次に確認したワーカーが公開済みの版から差分更新を引き継ぐ
+    leader.stop()
+    catalog_db.update_features("item-0001", price_yen=77777)
+    third = follower.refresh_once()
+    assert follower.is_leader
+    assert third.version == second.version + 1
+    assert third.features["item-0001"]["price_yen"] == 77777
+    follower.stop()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.append(str(ROOT / "src"))
+
+from reco.api import warmup  # noqa: E402
+from reco.api.warmup import WarmupState, run_warmup  # noqa: E402
+from reco.infra.metrics import render_prometheus, stage  # noqa: E402
+
+
+@pytest.mark.unit
+def test_warmup_requests_are_not_recorded_in_metrics(monkeypatch) -> None:
+    calls = []
+
+    async def fake_recommend(req):
+        # 推薦パイプラインと同様に to_thread 内のステージも含める
+        def search() -> None:
+            with stage("test_warmup_search") as s:
+                s.rows = 10
+
+        with stage("test_warmup_embed"):
+            calls.append(req.mode)
+        await asyncio.to_thread(search)
+
+    monkeypatch.setattr(warmup, "check_health", lambda: {"ok": True})
+    monkeypatch.setattr(warmup, "recommend_async", fake_recommend)
+    state = WarmupState()
+
+    asyncio.run(run_warmup(None, state))
+
+    assert state.done
+    assert len(calls) == len(warmup.load_warmup_requests())
+    assert state.snapshot()["steps"]["embeddings"]["primed"] == len(calls)
+    assert "test_warmup" not in render_prometheus()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""量子化（float16 / int8）した embedding による探索と float32 全件探索の比較。
+
+runs には再スコア倍率ごとの recall@k とレイテンシを、quantized には量子化方式ごとの
+メモリ削減量と量子化スコアのみでの順位一致度（Kendall tau。再スコア倍率には依存しない）を出力する。
+
+実行例:
+    python apps/reco/tools/bench_quantization.py --items 100000 --dim 1536 --rescore 1 2 4 8
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from bench_ann import clustered_embeddings  # noqa: E402
+from reco.core.ann import ExactIndex, QuantizedMatrix, recall_at_k  # noqa: E402
+
+
+def kendall_tau(a: Sequence[float], b: Sequence[float]) -> float:
+    """2 つのスコア列の Kendall tau-b（同点を考慮）。"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    n = a.size
+    if n < 2:
+        return 1.0
+    iu = np.triu_indices(n, k=1)
+    da = np.sign(a[:, None] - a[None, :])[iu]
+    db = np.sign(b[:, None] - b[None, :])[iu]
+    denom = np.sqrt(np.count_nonzero(da) * np.count_nonzero(db))
+    return float((da * db).sum() / denom) if denom > 0 else 1.0
+
+
+def _percentile_ms(samples: List[float], q: float) -> float:
+    return round(float(np.percentile(samples, q)) * 1000.0, 3)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    matrix = clustered_embeddings(args.items, args.dim, args.topics, args.seed)
+    queries = clustered_embeddings(args.queries, args.dim, args.topics, args.seed + 1)
+    exact = ExactIndex(matrix)
+
+    results: Dict[str, Any] = {
+        "items": args.items,
+        "dim": args.dim,
+        "queries": args.queries,
+        "float32Bytes": int(matrix.nbytes),
+        "quantized": [],
+        "runs": [],
+    }
+    for k in args.k:
+        truth = []
+        exact_times = []
+        for q in queries:
+            t0 = time.perf_counter()
+            rows, _ = exact.search(q, k)
+            exact_times.append(time.perf_counter() - t0)
+            truth.append(rows)
+        results["runs"].append(
+            {
+                "quantization": "none",
+                "k": k,
+                "recall": 1.0,
+                "p50_ms": _percentile_ms(exact_times, 50),
+                "p95_ms": _percentile_ms(exact_times, 95),
+            }
+        )
+
+        for kind in args.quantization:
+            started = time.perf_counter()
+            quantized = QuantizedMatrix.quantize(matrix, kind)
+            quantize_sec = time.perf_counter() - started
+            # 再スコアなしの量子化スコアが、正解上位 k 件の順位をどれだけ保つか
+            taus = [
+                kendall_tau(matrix[rows] @ q, quantized.scores_at(rows, q))
+                for q, rows in zip(queries, truth)
+            ]
+            results["quantized"].append(
+                {
+                    "quantization": kind,
+                    "k": k,
+                    "bytes": quantized.nbytes,
+                    "savedRatio": round(1.0 - quantized.nbytes / matrix.nbytes, 4),
+                    "quantizeSec": round(quantize_sec, 3),
+                    "kendallTau": round(float(np.mean(taus)), 4),
+                }
+            )
+            for rescore in args.rescore:
+                index = ExactIndex(matrix, quantized, rescore)
+                times = []
+                recalls = []
+                for q, rows in zip(queries, truth):
+                    t0 = time.perf_counter()
+                    found, _ = index.search(q, k)
+                    times.append(time.perf_counter() - t0)
+                    recalls.append(recall_at_k(rows.tolist(), found.tolist()))
+                results["runs"].append(
+                    {
+                        "quantization": kind,
+                        "k": k,
+                        "rescore": rescore,
+                        "recall": round(float(np.mean(recalls)), 4),
+                        "recallMin": round(float(np.min(recalls)), 4),
+                        "p50_ms": _percentile_ms(times, 50),
+                        "p95_ms": _percentile_ms(times, 95),
+                    }
+                )
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="quantized embedding search benchmark")
+    parser.add_argument("--items", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, nargs="+", default=[100, 200])
+    parser.add_argument("--quantization", nargs="+", default=["float16", "int8"], choices=["float16", "int8"])
+    parser.add_argument("--rescore", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""推薦パイプライン全体のオフラインベンチマーク。
+
+合成カタログ（items / features / tags / embeddings）を生成し、embed_text とデータアクセス層
+（PostgREST / RPC）をスタブに差し替えて、retrieval モード × mode × algorithm ごとに
+エンドツーエンド・ステージ別のレイテンシ、スループット、メモリを計測して JSON で出力する。
+コミット間の性能比較（回帰検出）に使う。
+
+注意:
+- postgrest / rpc / pgvector モードの DB ステージには、スタブ側の行生成・シリアライズの
+  コストが含まれる（ネットワーク・Postgres の処理時間は含まれない）
+- 1M 件・1536 次元の embedding だけで約 6GB のメモリを使う
+
+実行例:
+    python apps/reco/tools/bench_reco.py --items 10000 100000 --requests 200
+    python apps/reco/tools/bench_reco.py --items 20000 --retrieval catalog rpc postgrest --dim 256
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+import reco.api.handlers as handlers  # noqa: E402
+from reco.api.schemas import RecommendationRequest  # noqa: E402
+from reco.core.ann import ExactIndex  # noqa: E402
+from reco.infra import catalog as catalog_module  # noqa: E402
+from reco.infra.catalog import EmbeddingMatrix, _build_snapshot, set_catalog  # noqa: E402
+from reco.infra.embedding_client import DEFAULT_EMBEDDING_MODEL  # noqa: E402
+from reco.infra.metrics import request_timer  # noqa: E402
+from reco.infra.supabase_repo import format_vector  # noqa: E402
+
+GENERATE_CHUNK = 16384
+MODES = ("popular", "balanced", "diverse")
+ALGORITHMS = ("vector_only", "vector_ranked", "vector_ranked_mmr", "vector_ranked_mmr_embedding")
+BUDGETS: Tuple[Tuple[Optional[int], Optional[int]], ...] = (
+    (None, None),
+    (1000, 3000),
+    (3000, 5000),
+    (5000, 10000),
+    (10000, None),
+)
+EVENTS = ("誕生日", "結婚祝い", "出産祝い", "母の日", "父の日", "クリスマス", "退職祝い", "お中元")
+RECIPIENTS = ("30代の女性の友人", "上司（50代男性）", "祖母", "同僚", "大学生の弟", "取引先")
+
+
+@dataclass
+class SyntheticCatalog:
+    item_ids: List[str]
+    features: Dict[str, Dict[str, Any]]
+    matrix: np.ndarray
+    prices: np.ndarray
+    active: np.ndarray
+    topics: np.ndarray
+    tag_names: List[str]
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+
+def generate_catalog(
+    n: int,
+    dim: int,
+    n_topics: int,
+    n_tags: int,
+    seed: int,
+    active_ratio: float = 0.95,
+) -> SyntheticCatalog:
+    """トピック中心 + ノイズの embedding と、トピックに相関するタグ・価格を持つカタログを生成する。"""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal(size=(n_topics, dim), dtype=np.float32)
+    labels = rng.integers(n_topics, size=n)
+
+    # 1M 件でも float64 の一時配列を作らないよう、チャンクごとに float32 で生成・正規化する
+    matrix = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, GENERATE_CHUNK):
+        end = min(n, start + GENERATE_CHUNK)
+        block = topics[labels[start:end]] + 0.8 * rng.standard_normal(size=(end - start, dim), dtype=np.float32)
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        matrix[start:end] = block
+
+    prices = np.clip(rng.lognormal(mean=8.3, sigma=0.9, size=n), 300, 300000).astype(np.int64)
+    active = rng.random(n) < active_ratio
+    # 各トピックに 12 個のタグを割り当て、アイテムは自トピックのタグを中心に 0〜8 個持つ
+    topic_tags = rng.integers(n_tags, size=(n_topics, 12))
+    tag_counts = rng.integers(0, 9, size=n)
+    ranks = rng.integers(1, 1001, size=n)
+    has_rank = rng.random(n) < 0.6
+    popularity = rng.random(n)
+    has_popularity = rng.random(n) < 0.7
+    review_average = np.round(rng.uniform(2.5, 5.0, size=n), 2)
+    review_count = rng.geometric(0.01, size=n) - 1
+
+    item_ids = [f"{i:08x}-0000-4000-8000-{i:012x}" for i in range(n)]
+    features: Dict[str, Dict[str, Any]] = {}
+    for i, item_id in enumerate(item_ids):
+        own = topic_tags[labels[i]]
+        tags = [int(own[j]) for j in rng.integers(12, size=int(tag_counts[i]))]
+        if tags and rng.random() < 0.3:
+            tags[-1] = int(rng.integers(n_tags))
+        features[item_id] = {
+            "item_id": item_id,
+            "price_yen": int(prices[i]),
+            "rank": int(ranks[i]) if has_rank[i] else None,
+            "popularity_score": float(popularity[i]) if has_popularity[i] else None,
+            "review_average": float(review_average[i]),
+            "review_count": int(review_count[i]),
+            "tag_ids": tags,
+            "item": {
+                "id": item_id,
+                "item_name": f"合成アイテム {i}",
+                "item_url": f"https://item.example.com/{i}",
+                "affiliate_url": None,
+                "is_active": bool(active[i]),
+            },
+        }
+    return SyntheticCatalog(
+        item_ids=item_ids,
+        features=features,
+        matrix=matrix,
+        prices=prices,
+        active=active,
+        topics=topics,
+        tag_names=[f"tag-{t}" for t in range(n_tags)],
+    )
+
+
+def build_snapshot(cat: SyntheticCatalog, version: int = 1) -> catalog_module.CatalogSnapshot:
+    """DB を経由せず、load_catalog と同じ形（有効アイテムのみ）のスナップショットを組み立てる。"""
+    rows = np.flatnonzero(cat.active)
+    item_ids = [cat.item_ids[i] for i in rows.tolist()]
+    now = datetime.now(timezone.utc)
+    return _build_snapshot(
+        version=version,
+        model=DEFAULT_EMBEDDING_MODEL,
+        features={item_id: cat.features[item_id] for item_id in item_ids},
+        embeddings=EmbeddingMatrix(item_ids, cat.matrix[rows]),
+        watermarks={t: now for t in catalog_module.WATERMARK_TABLES},
+        loaded_at=now,
+        refreshed_at=now,
+    )
+
+
+class _Query:
+    """handlers / supabase_repo が使う PostgREST クエリビルダの最小実装。"""
+
+    def __init__(self, db: "SyntheticPostgrest", table: str) -> None:
+        self._db = db
+        self._table = table
+        self._filters: List[Tuple[str, str, Any]] = []
+
+    def select(self, _columns: str) -> "_Query":
+        return self
+
+    def eq(self, column: str, value: Any) -> "_Query":
+        self._filters.append(("eq", column, value))
+        return self
+
+    def gte(self, column: str, value: Any) -> "_Query":
+        self._filters.append(("gte", column, value))
+        return self
+
+    def lte(self, column: str, value: Any) -> "_Query":
+        self._filters.append(("lte", column, value))
+        return self
+
+    def in_(self, column: str, values: Sequence[Any]) -> "_Query":
+        self._filters.append(("in", column, list(values)))
+        return self
+
+    def order(self, *_args: Any, **_kwargs: Any) -> "_Query":
+        return self
+
+    def range(self, *_args: Any) -> "_Query":
+        return self
+
+    def execute(self) -> SimpleNamespace:
+        cat = self._db.catalog
+        self._db.calls += 1
+        ids: Optional[List[str]] = None
+        mask = np.ones(len(cat), dtype=bool)
+        for op, column, value in self._filters:
+            if op == "in":
+                ids = value
+            elif column == "item.is_active":
+                mask &= cat.active == value
+            elif column == "price_yen":
+                mask &= cat.prices >= value if op == "gte" else cat.prices <= value
+        rows = np.flatnonzero(mask) if ids is None else [self._db.row_of[i] for i in ids if i in self._db.row_of]
+        if self._table == "item_embedding":
+            data = [
+                {"item_id": cat.item_ids[i], "embedding": format_vector(cat.matrix[i].tolist())}
+                for i in rows
+            ]
+        else:
+            data = [dict(cat.features[cat.item_ids[i]]) for i in rows]
+        return SimpleNamespace(data=data)
+
+
+class SyntheticPostgrest:
+    """合成カタログを返す PostgREST クライアントのスタブ（table / rpc）。"""
+
+    def __init__(self, cat: SyntheticCatalog) -> None:
+        self.catalog = cat
+        self.row_of = {item_id: i for i, item_id in enumerate(cat.item_ids)}
+        self.calls = 0
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def _candidate_rows(self, params: Dict[str, Any]) -> np.ndarray:
+        cat = self.catalog
+        mask = cat.active.copy()
+        if params.get("p_budget_min") is not None:
+            mask &= cat.prices >= params["p_budget_min"]
+        if params.get("p_budget_max") is not None:
+            mask &= cat.prices <= params["p_budget_max"]
+        return np.flatnonzero(mask)
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> SimpleNamespace:
+        self.calls += 1
+        cat = self.catalog
+        rows = self._candidate_rows(params)
+        if name == "reco_candidates":
+            data = []
+            for i in rows.tolist():
+                row = dict(cat.features[cat.item_ids[i]])
+                row["embedding_b64"] = base64.b64encode(cat.matrix[i].astype(">f4").tobytes()).decode("ascii")
+                data.append(row)
+        elif name == "reco_vector_search":
+            query = np.asarray(json.loads(params["p_query"]), dtype=np.float32)
+            query /= np.linalg.norm(query)
+            top_rows, top_scores = ExactIndex(cat.matrix[rows]).search(query, params["p_k"])
+            data = []
+            for row, score in zip(top_rows.tolist(), top_scores.tolist()):
+                item = dict(cat.features[cat.item_ids[int(rows[row])]])
+                item["vector_score"] = score
+                data.append(item)
+        else:
+            raise ValueError(f"unknown rpc: {name}")
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=data))
+
+
+def stub_embedder(cat: SyntheticCatalog, latency_ms: float):
+    """contextText のハッシュから決定的にトピック寄りのベクトルを返す embed_text のスタブ。"""
+
+    def vector_for(text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        rng = np.random.default_rng(seed)
+        topic = cat.topics[rng.integers(cat.topics.shape[0])]
+        vec = topic + 0.8 * rng.standard_normal(size=topic.shape[0], dtype=np.float32)
+        return (vec / np.linalg.norm(vec)).astype(np.float64).tolist()
+
+    def embed_text(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> List[float]:
+        if latency_ms > 0:
+            time.sleep(latency_ms / 1000.0)
+        return vector_for(text)
+
+    async def embed_text_async(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> List[float]:
+        if latency_ms > 0:
+            await asyncio.sleep(latency_ms / 1000.0)
+        return vector_for(text)
+
+    return embed_text, embed_text_async
+
+
+def synthetic_requests(
+    n: int,
+    mode: str,
+    algorithm: Optional[str],
+    tag_names: Sequence[str],
+    seed: int,
+) -> List[RecommendationRequest]:
+    rng = np.random.default_rng(seed)
+    reqs = []
+    for _ in range(n):
+        budget_min, budget_max = BUDGETS[int(rng.integers(len(BUDGETS)))]
+        reqs.append(
+            RecommendationRequest(
+                mode=mode,
+                eventName=EVENTS[int(rng.integers(len(EVENTS)))],
+                recipientDescription=RECIPIENTS[int(rng.integers(len(RECIPIENTS)))],
+                budgetMin=budget_min,
+                budgetMax=budget_max,
+                featuresLike=[tag_names[int(t)] for t in rng.integers(len(tag_names), size=int(rng.integers(0, 3)))],
+                algorithmOverride=algorithm,
+            )
+        )
+    return reqs
+
+
+def _percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    arr = np.asarray(samples)
+    return {
+        "p50": round(float(np.percentile(arr, 50)), 3),
+        "p95": round(float(np.percentile(arr, 95)), 3),
+        "p99": round(float(np.percentile(arr, 99)), 3),
+        "max": round(float(arr.max()), 3),
+    }
+
+
+def _rss_mb() -> float:
+    # Linux の ru_maxrss は KB（プロセス開始以降のピーク）
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)
+
+
+async def _run_one(req: RecommendationRequest) -> Tuple[float, Dict[str, Any]]:
+    with request_timer("bench") as timer:
+        await handlers.recommend_async(req)
+    return timer.elapsed() * 1000.0, timer.snapshot()["stages"]
+
+
+async def run_combo(reqs: List[RecommendationRequest], concurrency: int, warmup: int) -> Dict[str, Any]:
+    for req in reqs[:warmup]:
+        await _run_one(req)
+
+    latencies: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    rows: Dict[str, List[int]] = {}
+    started = time.perf_counter()
+    for i in range(0, len(reqs), concurrency):
+        for ms, per_stage in await asyncio.gather(*(_run_one(r) for r in reqs[i : i + concurrency])):
+            latencies.append(ms)
+            for name, entry in per_stage.items():
+                stages.setdefault(name, []).append(entry["ms"])
+                if "rows" in entry:
+                    rows.setdefault(name, []).append(entry["rows"])
+    wall = time.perf_counter() - started
+
+    # 1 リクエストあたりの Python ヒープ確保量のピーク（計測のオーバーヘッドが大きいため 1 件のみ）
+    tracemalloc.start()
+    await _run_one(reqs[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "requests": len(reqs),
+        "concurrency": concurrency,
+        "throughputRps": round(len(reqs) / wall, 2) if wall > 0 else None,
+        "latencyMs": _percentiles(latencies),
+        "stagesMs": {name: _percentiles(values) for name, values in stages.items()},
+        "stageRowsMean": {name: round(float(np.mean(values)), 1) for name, values in rows.items()},
+        "requestPeakAllocKb": round(peak / 1024.0, 1),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    catalog_module.ANN_INDEX = args.ann
+    catalog_module.EMBEDDING_QUANTIZATION = args.quantization
+    results: Dict[str, Any] = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "startedAt": datetime.now(timezone.utc).isoformat(),
+        "params": {
+            "dim": args.dim,
+            "topics": args.topics,
+            "tags": args.tags,
+            "ann": args.ann,
+            "quantization": args.quantization,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "embedLatencyMs": args.embed_latency_ms,
+            "seed": args.seed,
+        },
+        "catalogs": [],
+    }
+
+    for n in args.items:
+        rss_before = _rss_mb()
+        t0 = time.perf_counter()
+        cat = generate_catalog(n, args.dim, args.topics, args.tags, args.seed)
+        generate_sec = time.perf_counter() - t0
+
+        embed_text, embed_text_async = stub_embedder(cat, args.embed_latency_ms)
+        handlers.embed_text = embed_text
+        handlers.embed_text_async = embed_text_async
+        db = SyntheticPostgrest(cat)
+        handlers.get_apl_db = lambda: db
+
+        entry: Dict[str, Any] = {
+            "items": n,
+            "activeItems": int(cat.active.sum()),
+            "generateSec": round(generate_sec, 3),
+            "embeddingsMb": round(cat.matrix.nbytes / 1024.0 / 1024.0, 1),
+            "runs": [],
+        }
+        for retrieval in args.retrieval:
+            handlers.RETRIEVAL_MODE = retrieval
+            set_catalog(None)
+            if retrieval == "catalog":
+                t0 = time.perf_counter()
+                set_catalog(build_snapshot(cat))
+                entry["catalogBuildSec"] = round(time.perf_counter() - t0, 3)
+            for mode in args.modes:
+                for algorithm in args.algorithms:
+                    override = None if algorithm == "default" else algorithm
+                    reqs = synthetic_requests(args.requests, mode, override, cat.tag_names, args.seed)
+                    calls_before = db.calls
+                    stats = asyncio.run(run_combo(reqs, args.concurrency, args.warmup))
+                    stats["dbCallsPerRequest"] = round(
+                        (db.calls - calls_before) / (args.requests + args.warmup + 1), 2
+                    )
+                    entry["runs"].append({"retrieval": retrieval, "mode": mode, "algorithm": algorithm, **stats})
+        set_catalog(None)
+        entry["rssBeforeMb"] = rss_before
+        entry["peakRssMb"] = _rss_mb()
+        results["catalogs"].append(entry)
+        del cat, db
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="reco pipeline benchmark (synthetic catalog, stubbed I/O)")
+    parser.add_argument("--items", type=int, nargs="+", default=[10000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--tags", type=int, default=500)
+    parser.add_argument("--retrieval", nargs="+", default=["catalog"], choices=sorted(handlers.RETRIEVAL_MODES))
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument(
+        "--algorithms",
+        nargs="+",
+        default=["default"],
+        choices=["default", *ALGORITHMS],
+        help="default = mode の標準アルゴリズム",
+    )
+    parser.add_argument("--ann", default="exact", choices=["exact", "ivf"])
+    parser.add_argument("--quantization", default="none", choices=["none", "float16", "int8"])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="embedding API の擬似レイテンシ")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="JSON の出力先（省略時は標準出力）")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""score_candidates の列指向実装と従来の dict 実装の比較（結果の一致 + レイテンシ）。
+
+実行例:
+    python apps/reco/tools/bench_scoring.py --k 120 220 2000
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from reco.core.mode_resolver import resolve_mode  # noqa: E402
+from reco.core.scoring import _normalize_0_1, _safe_float, score_columns  # noqa: E402
+
+
+def reference_score_candidates(rows: List[Dict[str, Any]], params: Any) -> List[Dict[str, Any]]:
+    """列指向化する前の score_candidates（比較用にそのまま残す）。"""
+    vec_raw = []
+    pop_raw = []
+    rev_raw = []
+
+    filtered_rows = [r for r in rows if _safe_float(r.get("vector_score")) is not None]
+    if not filtered_rows:
+        return []
+
+    review_counts = [_safe_float(r.get("review_count")) or 0.0 for r in filtered_rows]
+    max_review_count = max(review_counts) if review_counts else 0.0
+
+    for r in filtered_rows:
+        vec_raw.append(_safe_float(r.get("vector_score")))
+
+        popularity_score = _safe_float(r.get("popularity_score"))
+        if popularity_score is None:
+            rank = _safe_float(r.get("rank"))
+            popularity_score = 1.0 / (rank + 1.0) if rank is not None else 0.0
+        pop_raw.append(popularity_score)
+
+        review_avg = _safe_float(r.get("review_average")) or 0.0
+        review_count = _safe_float(r.get("review_count")) or 0.0
+        quality = max(0.0, min(review_avg / 5.0, 1.0))
+        if max_review_count > 0:
+            confidence = math.log(1.0 + review_count) / math.log(1.0 + max_review_count)
+        else:
+            confidence = 0.0
+        rev_raw.append(quality * confidence)
+
+    vec_norm = _normalize_0_1(vec_raw)
+    pop_norm = _normalize_0_1(pop_raw)
+    rev_norm = _normalize_0_1(rev_raw)
+
+    scored = []
+    for i, r in enumerate(filtered_rows):
+        s_vec = vec_norm[i]
+        s_pop = pop_norm[i]
+        s_rev = rev_norm[i]
+        s_final = params.w_vec * s_vec + params.w_pop * s_pop + params.w_rev * s_rev
+        scored.append(
+            {
+                "item_id": r.get("item_id"),
+                "score": s_final,
+                "vector_score": s_vec,
+                "rerank_score": s_final,
+                "tag_ids": r.get("tag_ids") or [],
+                "reason": {
+                    "type": "scoring",
+                    "scores": {"s_vec": s_vec, "s_pop": s_pop, "s_rev": s_rev},
+                },
+            }
+        )
+    return scored
+
+
+def synthetic_rows(n: int, seed: int) -> List[Dict[str, Any]]:
+    """catalog の行と同じ形の候補（欠損値を含む）を生成する。"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        rows.append(
+            {
+                "item_id": f"item-{i}",
+                "vector_score": float(rng.uniform(0.1, 0.6)),
+                "popularity_score": float(rng.random()) if rng.random() < 0.7 else None,
+                "rank": int(rng.integers(1, 1000)) if rng.random() < 0.8 else None,
+                "review_average": float(rng.uniform(0, 5)) if rng.random() < 0.9 else None,
+                "review_count": int(rng.integers(0, 5000)),
+                "tag_ids": rng.integers(1000, 1100, size=int(rng.integers(0, 8))).tolist(),
+            }
+        )
+    return rows
+
+
+def _reference_final(rows: List[Dict[str, Any]], params: Any) -> List[Dict[str, Any]]:
+    ranked = sorted(reference_score_candidates(rows, params), key=lambda x: x["score"], reverse=True)
+    return ranked[: params.n_in]
+
+
+def _columnar_final(rows: List[Dict[str, Any]], params: Any) -> List[Dict[str, Any]]:
+    scored = score_columns(rows, params)
+    return scored.materialize(scored.order_by("score")[: params.n_in])
+
+
+def _percentile_ms(samples: List[float], q: float) -> float:
+    return round(float(np.percentile(samples, q)) * 1000.0, 4)
+
+
+def _time(fn: Any, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    params = resolve_mode(args.mode, None)
+    results: Dict[str, Any] = {"mode": args.mode, "repeat": args.repeat, "runs": []}
+    for k in args.k:
+        rows = synthetic_rows(k, args.seed)
+        identical = (
+            reference_score_candidates(rows, params) == score_columns(rows, params).materialize(range(k))
+            and _reference_final(rows, params) == _columnar_final(rows, params)
+        )
+        for name, fn in (("reference", _reference_final), ("columnar", _columnar_final)):
+            samples = _time(lambda: fn(rows, params), args.repeat)
+            results["runs"].append(
+                {
+                    "impl": name,
+                    "k": k,
+                    "identical": identical,
+                    "p50_ms": _percentile_ms(samples, 50),
+                    "p95_ms": _percentile_ms(samples, 95),
+                }
+            )
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="score_candidates micro-benchmark")
+    parser.add_argument("--k", type=int, nargs="+", default=[120, 220, 2000])
+    parser.add_argument("--mode", default="balanced")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args), ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+-- apl.reco_candidates (MVP)
+-- Purpose: Reco サービスの候補取得を 1 往復にまとめる RPC（RECO_RETRIEVAL_MODE=rpc）
+-- Notes:
+-- - 予算内・is_active の features + 商品詳細 + embedding を jsonb 配列 1 値で返す
+--   （setof と違い PostgREST の max-rows で切り詰められない）
+-- - embedding は float4send（ビッグエンディアン float32）を連結した base64 文字列
+--   JSON の数値配列より転送量・パースコストが小さい
+-- - embedding が無いアイテムは返さない（ベクトル検索の対象外のため）
+--
+-- 実行方法: Supabase Dashboard → SQL Editor で実行
+
+create or replace function apl.reco_candidates(
+  p_model text,
+  p_budget_min int default null,
+  p_budget_max int default null
+)
+returns jsonb
+language sql
+stable
+as $$
+  select coalesce(
+    jsonb_agg(
+      jsonb_build_object(
+        'item_id',          f.item_id,
+        'price_yen',        f.price_yen,
+        'rank',             f.rank,
+        'popularity_score', f.popularity_score,
+        'review_average',   f.review_average,
+        'review_count',     f.review_count,
+        'tag_ids',          f.tag_ids,
+        'item', jsonb_build_object(
+          'id',            i.id,
+          'item_name',     i.item_name,
+          'item_url',      i.item_url,
+          'affiliate_url', i.affiliate_url,
+          'is_active',     i.is_active
+        ),
+        'embedding_b64', (
+          select encode(string_agg(float4send(u.v), ''::bytea order by u.ord), 'base64')
+          from unnest(e.embedding::real[]) with ordinality as u(v, ord)
+        )
+      )
+      order by f.item_id
+    ),
+    '[]'::jsonb
+  )
+  from apl.item_features f
+  join apl.item i
+    on i.id = f.item_id
+   and i.is_active
+  join apl.item_embedding e
+    on e.item_id = f.item_id
+   and e.model = p_model
+  where (p_budget_min is null or f.price_yen >= p_budget_min)
+    and (p_budget_max is null or f.price_yen <= p_budget_max);
+$$;
+
+create index if not exists idx_apl_item_features_price_yen
+  on apl.item_features (price_yen);
+
+grant execute on function apl.reco_candidates(text, int, int) to service_role;
@@ -0,0 +1,86 @@
+-- apl.reco_vector_search (MVP)
+-- Purpose: Reco サービスの類似度検索を DB 側で行う RPC（RECO_RETRIEVAL_MODE=pgvector）
+-- Notes:
+-- - context vector を受け取り、予算内・is_active のアイテムから cosine 距離の近い上位 k 件を返す
+-- - 返却は features + 商品詳細 + vector_score（= 1 - cosine 距離）の jsonb 配列。embedding は返さない
+-- - item_embedding.embedding は次元なしの vector 型のため、HNSW インデックスは
+--   vector(1536) へのキャスト式 + model の部分インデックスとして作成する
+--   （text-embedding-3-small = 1536 次元。モデルを追加する場合はインデックスも追加する）
+-- - 部分インデックスを確実に使わせるため、model はリテラルとして埋め込んだ動的 SQL で実行する
+-- - 予算・is_active の絞り込みで k 件に満たないことを防ぐため、pgvector 0.8.0 以降の
+--   iterative index scan（relaxed_order）を使い、最後に距離で並べ直す
+--
+-- 実行方法: Supabase Dashboard → SQL Editor で実行
+
+create index if not exists idx_apl_item_embedding_hnsw_3_small
+  on apl.item_embedding
+  using hnsw ((embedding::vector(1536)) vector_cosine_ops)
+  where model = 'text-embedding-3-small';
+
+create or replace function apl.reco_vector_search(
+  p_model text,
+  p_query vector(1536),
+  p_k int,
+  p_budget_min int default null,
+  p_budget_max int default null
+)
+returns jsonb
+language plpgsql
+stable
+set hnsw.ef_search = 200
+set hnsw.iterative_scan = 'relaxed_order'
+as $$
+declare
+  result jsonb;
+begin
+  execute format(
+    $sql$
+    select coalesce(
+      jsonb_agg(
+        jsonb_build_object(
+          'item_id',          f.item_id,
+          'price_yen',        f.price_yen,
+          'rank',             f.rank,
+          'popularity_score', f.popularity_score,
+          'review_average',   f.review_average,
+          'review_count',     f.review_count,
+          'tag_ids',          f.tag_ids,
+          'item', jsonb_build_object(
+            'id',            i.id,
+            'item_name',     i.item_name,
+            'item_url',      i.item_url,
+            'affiliate_url', i.affiliate_url,
+            'is_active',     i.is_active
+          ),
+          'vector_score',     1 - c.distance
+        )
+        order by c.distance, c.item_id
+      ),
+      '[]'::jsonb
+    )
+    from (
+      select e.item_id, e.embedding::vector(1536) <=> $1 as distance
+      from apl.item_embedding e
+      join apl.item i
+        on i.id = e.item_id
+       and i.is_active
+      join apl.item_features f
+        on f.item_id = e.item_id
+      where e.model = %L
+        and ($3 is null or f.price_yen >= $3)
+        and ($4 is null or f.price_yen <= $4)
+      order by e.embedding::vector(1536) <=> $1
+      limit $2
+    ) c
+    join apl.item_features f on f.item_id = c.item_id
+    join apl.item i on i.id = c.item_id
+    $sql$,
+    p_model
+  )
+  into result
+  using p_query, p_k, p_budget_min, p_budget_max;
+  return result;
+end;
+$$;
+
+grant execute on function apl.reco_vector_search(text, vector, int, int, int) to service_role;